@@ -26,12 +26,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'main.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'main.middleware.ReplicaPinMiddleware',
 ]
 
 ROOT_URLCONF = 'dspace.urls'
@@ -55,11 +57,59 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'dspace.wsgi.application'
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# База данных: SQLite по умолчанию, PostgreSQL при DB_ENGINE=postgresql.
+# Соединения постоянные (CONN_MAX_AGE) и проверяются перед повторным использованием
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 600))
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'deev_space'),
+            'USER': os.environ.get('DB_USER', 'deev_space'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            # PgBouncer в режиме pool_mode=transaction не поддерживает серверные курсоры
+            'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('DB_POOLER') == 'pgbouncer',
+            'OPTIONS': {'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5))},
+        }
     }
+    # Реплика для чтения (main.db_router): страницы, которые только читают данные
+    if os.environ.get('DB_REPLICA_HOST'):
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'HOST': os.environ['DB_REPLICA_HOST'],
+            'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+            'TEST': {'MIRROR': 'default'},
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            # PRAGMA применяются один раз на соединение
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+
+DATABASE_ROUTERS = ['main.db_router.ReplicaRouter']
+REPLICA_DB_ALIAS = 'replica' if 'replica' in DATABASES else None
+# После изменяющего запроса посетитель читает с основной базы, пока реплика догоняет
+REPLICA_PIN_SECONDS = int(os.environ.get('DB_REPLICA_PIN_SECONDS', 5))
+
+# PRAGMA для каждого соединения с SQLite (main.sqlite, сигнал connection_created)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),  # мс
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'cache_size': -int(os.environ.get('SQLITE_CACHE_SIZE_KB', 64 * 1024)),  # отрицательное значение — в КиБ
+    'temp_store': 'MEMORY',
 }
 
 AUTH_USER_MODEL = 'main.CustomUser'
@@ -88,26 +138,164 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
-# Хеширование статических файлов в production
+# Хеширование, сборка бандлов и сжатие статических файлов в production (collectstatic)
 if not DEBUG:
-    STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.ManifestStaticFilesStorage'
+    STATICFILES_STORAGE = 'main.storage.CompressedManifestStaticFilesStorage'
+
+# Бандлы страниц: файлы склеиваются в указанном порядке (media.css всегда
+# последним) и сохраняются как css/<имя>.bundle.css и js/<имя>.bundle.js.
+# В режиме DEBUG тег {% bundle %} подключает исходные файлы по отдельности
+_CSS_BASE = ['css/variables.css', 'css/base.css', 'css/components.css', 'css/layout.css']
+_CSS_TAIL = ['css/pages.css', 'css/media.css']
+STATIC_BUNDLES = {
+    'core': {
+        'css': [*_CSS_BASE, *_CSS_TAIL],
+        'js': ['js/main.js'],
+    },
+    'home': {
+        'css': [*_CSS_BASE, 'css/projects.css', 'css/blog.css', *_CSS_TAIL],
+    },
+    'projects': {
+        'css': [*_CSS_BASE, 'css/projects.css', *_CSS_TAIL],
+    },
+    'blog': {
+        'css': [*_CSS_BASE, 'css/blog.css', 'css/code.css', *_CSS_TAIL],
+        'js': ['js/main.js', 'js/blog.js'],
+    },
+}
+
+# Сжатые копии (.br, .gz) создаются для файлов с этими расширениями не меньше STATIC_COMPRESS_MIN_SIZE байт
+STATIC_COMPRESS_EXTENSIONS = ('.css', '.js', '.map', '.json', '.svg', '.xml', '.txt', '.html', '.ico')
+STATIC_COMPRESS_MIN_SIZE = 1024
+STATIC_COMPRESS_WORKERS = None  # по числу ядер
+
+# Отдача статики из STATIC_ROOT средствами Django (main.middleware.StaticFilesMiddleware),
+# когда перед gunicorn нет nginx. Файлы с хешем в имени кешируются навсегда (immutable)
+STATIC_SERVE = os.environ.get('DJANGO_STATIC_SERVE', str(not DEBUG)) == 'True'
+STATIC_MAX_AGE = 60 * 60  # для файлов без хеша в имени
+
+# Карта сайта: файлы пишутся в SITEMAP_ROOT, разделы больше SITEMAP_LIMIT ссылок
+# разбиваются на несколько файлов, а sitemap.xml становится индексом
+SITEMAP_ROOT = BASE_DIR / 'sitemaps'
+SITEMAP_LIMIT = 50000
+
+# RSS/Atom ленты блога (main.feeds): файлы в FEEDS_ROOT, последние FEED_LIMIT статей
+FEEDS_ROOT = BASE_DIR / 'feeds'
+FEED_LIMIT = 20
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache Settings
+# default — память процесса, остальные — общие для всех воркеров gunicorn хранилища.
+# При переполнении файловый кеш удаляет каждую CULL_FREQUENCY-ю запись вслепую,
+# поэтому записи разделены по цене потери:
+# shared — страницы, подсветка, превью ссылок: потеря стоит лишнего рендера;
+# state — версии моделей и настроек, предохранитель капчи, счётчики: записей
+#   единицы, лимит с большим запасом, вытеснение не должно их задевать;
+# throttle — корзины лимитов, отметки просмотров, токены капчи: живут минуты,
+#   при переполнении удаляется десятая часть
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'dspace-local',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 5000, 'CULL_FREQUENCY': 4},
+    },
+    'state': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'state',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'throttle',
+        'OPTIONS': {'MAX_ENTRIES': 20000, 'CULL_FREQUENCY': 10},
+    },
+}
+SHARED_CACHE_ALIAS = 'shared'
+STATE_CACHE_ALIAS = 'state'
+THROTTLE_CACHE_ALIAS = 'throttle'
+
+# Page Cache Settings (страницы для анонимных посетителей)
+PAGE_CACHE_ENABLED = True
+PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+PAGE_CACHE_STATS_FLUSH_EVERY = 100  # счётчики попаданий копятся в процессе и пишутся в кеш пачкой
+
+# Link Preview Settings (карточки ссылок в статьях)
+LINK_PREVIEW_ASYNC = True
+LINK_PREVIEW_WORKERS = int(os.environ.get('LINK_PREVIEW_WORKERS', 4))
+LINK_PREVIEW_TIMEOUT = 10  # секунды
+LINK_PREVIEW_FRESH_FOR = 60 * 60 * 24  # после этого превью перепроверяется по ETag/Last-Modified
+LINK_PREVIEW_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+
+# Code Highlight Settings (тема Pygments, CSS в static/css/code.css)
+CODE_HIGHLIGHT_STYLE = 'one-dark'
+
+# Responsive Image Settings (производные изображения в MEDIA_ROOT/variants)
+IMAGE_VARIANTS_ASYNC = True
+IMAGE_VARIANTS_DIR = 'variants'
+IMAGE_VARIANT_WIDTHS = (320, 640, 960, 1280, 1920)
+IMAGE_VARIANT_FORMATS = ('avif', 'webp')
+IMAGE_VARIANT_QUALITY = 70
+IMAGE_VARIANTS_WORKERS = int(os.environ.get('IMAGE_VARIANTS_WORKERS', 2))
+
 # Yandex SmartCaptcha Settings
 SMARTCAPTCHA_CLIENT_KEY = os.environ.get('SMARTCAPTCHA_CLIENT_KEY', '*****')
 SMARTCAPTCHA_SERVER_KEY = os.environ.get('SMARTCAPTCHA_SERVER_KEY', '*****')
+SMARTCAPTCHA_VERIFY_URL = 'https://smartcaptcha.yandexcloud.net/validate'
+SMARTCAPTCHA_TIMEOUT = 2
+SMARTCAPTCHA_POOL_SIZE = 4
+SMARTCAPTCHA_TOKEN_TTL = 5 * 60  # повторная отправка формы с отклонённым токеном не ходит в API
+# Fail-open после нескольких ошибок подряд вместо ожидания таймаута на каждой форме
+SMARTCAPTCHA_BREAKER_THRESHOLD = 3
+SMARTCAPTCHA_BREAKER_COOLDOWN = 30
 
 # Telegram Bot Settings
 TELEGRAM_BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN', '')
 TELEGRAM_CHANNEL_ID = os.environ.get('TELEGRAM_CHANNEL_ID', '')
+TELEGRAM_API_URL = os.environ.get('TELEGRAM_API_URL', 'https://api.telegram.org')
 
 # VK API Settings
 VK_ACCESS_TOKEN = os.environ.get('VK_ACCESS_TOKEN', '')
 VK_GROUP_ID = os.environ.get('VK_GROUP_ID', '')
+VK_API_URL = os.environ.get('VK_API_URL', 'https://api.vk.com/method')
+
+# Social Outbox Settings
+OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', 20))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 8))
+OUTBOX_RETRY_BASE_DELAY = int(os.environ.get('OUTBOX_RETRY_BASE_DELAY', 30))  # секунды
+OUTBOX_RETRY_MAX_DELAY = int(os.environ.get('OUTBOX_RETRY_MAX_DELAY', 6 * 60 * 60))
+OUTBOX_REQUEST_TIMEOUT = int(os.environ.get('OUTBOX_REQUEST_TIMEOUT', 10))
+
+# View Counter Settings
+VIEW_COUNTER_BUFFERED = True
+VIEW_COUNTER_FLUSH_INTERVAL = int(os.environ.get('VIEW_COUNTER_FLUSH_INTERVAL', 10))  # секунды
+VIEW_COUNTER_FLUSH_THRESHOLD = int(os.environ.get('VIEW_COUNTER_FLUSH_THRESHOLD', 100))
+VIEW_COUNTER_DEDUP_TIMEOUT = 30 * 60  # повторный просмотр из той же сессии не считается
+
+# Votes API Settings (пакетная запись оценок, main.views.article_votes)
+VOTES_BATCH_LIMIT = 100
+
+# Rate Limit Settings (main.ratelimit): корзины токенов по IP и по сессии, формат 'N/s|m|h|d'
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'True') == 'True'
+RATE_LIMIT_LOCK_FILE = os.environ.get('RATE_LIMIT_LOCK_FILE', str(BASE_DIR / 'cache' / 'ratelimit.lock'))
+# Заголовок с адресом клиента от прокси (например, HTTP_X_REAL_IP за nginx)
+RATE_LIMIT_IP_HEADER = os.environ.get('RATE_LIMIT_IP_HEADER', 'REMOTE_ADDR')
+RATE_LIMITS = {
+    'comment': {'user': '5/m', 'ip': '20/m'},
+    'vote': {'user': '30/m', 'ip': '60/m'},
+    'login': {'ip': '10/m'},
+    'register': {'ip': '5/h'},
+    'contact': {'ip': '5/h'},
+}
 
 # Email Settings
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -118,9 +306,18 @@ EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'egor@deev.space')
 CONTACT_EMAIL = os.environ.get('CONTACT_EMAIL', 'egor@deev.space')
+EMAIL_TIMEOUT = int(os.environ.get('EMAIL_TIMEOUT', 10))
+
+# Contact Mail Queue Settings
+MAIL_QUEUE_BATCH_SIZE = int(os.environ.get('MAIL_QUEUE_BATCH_SIZE', 50))
+MAIL_QUEUE_MAX_ATTEMPTS = int(os.environ.get('MAIL_QUEUE_MAX_ATTEMPTS', 8))
+MAIL_QUEUE_RETRY_BASE_DELAY = int(os.environ.get('MAIL_QUEUE_RETRY_BASE_DELAY', 60))  # секунды
+MAIL_QUEUE_RETRY_MAX_DELAY = int(os.environ.get('MAIL_QUEUE_RETRY_MAX_DELAY', 6 * 60 * 60))
+MAIL_QUEUE_LEASE = int(os.environ.get('MAIL_QUEUE_LEASE', 15 * 60))  # аренда захваченного сообщения
 
 # Site Settings
 SITE_NAME = 'deev.space'
+SITE_URL = 'https://deev.space'
 SITE_AUTHOR = 'Деев Егор Викторович'
 SITE_DESCRIPTION = 'Персональный сайт backend-разработчика'
 
@@ -1,20 +1,14 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from django.contrib.sitemaps.views import sitemap
-from main.sitemaps import ArticleSitemap, ProjectSitemap, StaticViewSitemap
-
-sitemaps = {
-    'articles': ArticleSitemap,
-    'projects': ProjectSitemap,
-    'static': StaticViewSitemap,
-}
+from main.views import sitemap_file
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('main.urls')),
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='sitemap'),
+    path('sitemap.xml', sitemap_file, name='sitemap'),
+    re_path(r'^(?P<name>sitemap-[a-z]+-\d+\.xml)$', sitemap_file, name='sitemap_section'),
 ]
 
 if settings.DEBUG:
@@ -1,10 +1,13 @@
 from django.contrib import admin
+from django.utils import timezone
 from django.utils.html import format_html
 from .models import (
     CustomUser, Category, Article, ArticleImage, ArticleFile, ArticleLink,
     Project, ProjectStatus, Skill, Comment, ArticleLike, CommentLike,
-    ContactMessage, Experience, Education, SiteSettings
+    ContactMessage, Experience, Education, SiteSettings, OutboxMessage
 )
+from .counters import recount_comments
+from . import page_cache
 
 
 @admin.register(CustomUser)
@@ -58,7 +61,9 @@ class ArticleAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('title',)}
     date_hierarchy = 'date'
     list_editable = ['is_published', 'comments_enabled']
-    readonly_fields = ['views', 'date', 'updated_at', 'image_preview_large']
+    readonly_fields = [
+        'views', 'likes_count', 'dislikes_count', 'comments_count', 'date', 'updated_at', 'image_preview_large'
+    ]
     inlines = [ArticleImageInline, ArticleFileInline, ArticleLinkInline]
 
     fieldsets = (
@@ -84,7 +89,7 @@ class ArticleAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
         ('Публикация', {
-            'fields': ('is_published', 'views', 'date', 'updated_at')
+            'fields': ('is_published', 'views', 'likes_count', 'dislikes_count', 'comments_count', 'date', 'updated_at')
         }),
     )
 
@@ -194,24 +199,34 @@ class CommentAdmin(admin.ModelAdmin):
     content_short.short_description = 'Содержание'
 
     def approve_comments(self, request, queryset):
+        article_ids = set(queryset.values_list('article_id', flat=True))
         count = queryset.update(is_approved=True)
+        recount_comments(article_ids)
+        page_cache.invalidate(Comment)
         self.message_user(request, f'Одобрено {count} комментариев')
     approve_comments.short_description = 'Одобрить выбранные комментарии'
 
     def reject_comments(self, request, queryset):
+        article_ids = set(queryset.values_list('article_id', flat=True))
         count = queryset.update(is_approved=False)
+        recount_comments(article_ids)
+        page_cache.invalidate(Comment)
         self.message_user(request, f'Отклонено {count} комментариев')
     reject_comments.short_description = 'Отклонить выбранные комментарии'
 
 
 @admin.register(ContactMessage)
 class ContactMessageAdmin(admin.ModelAdmin):
-    list_display = ['name', 'email', 'subject', 'is_read', 'is_replied', 'created_at']
-    list_filter = ['is_read', 'is_replied', 'created_at']
+    list_display = ['name', 'email', 'subject', 'is_read', 'is_replied', 'mail_status', 'created_at']
+    list_filter = ['is_read', 'is_replied', 'mail_status', 'created_at']
     search_fields = ['name', 'email', 'subject', 'message']
-    readonly_fields = ['name', 'email', 'subject', 'message', 'created_at']
+    readonly_fields = [
+        'name', 'email', 'subject', 'message', 'created_at',
+        'mail_status', 'mail_attempts', 'mail_next_attempt_at', 'mail_error', 'mail_sent_at'
+    ]
     list_editable = ['is_read', 'is_replied']
     ordering = ['-created_at']
+    actions = ['retry_mail']
 
     fieldsets = (
         ('Сообщение', {
@@ -220,8 +235,41 @@ class ContactMessageAdmin(admin.ModelAdmin):
         ('Статус', {
             'fields': ('is_read', 'is_replied', 'admin_notes')
         }),
+        ('Уведомление', {
+            'fields': ('mail_status', 'mail_attempts', 'mail_next_attempt_at', 'mail_error', 'mail_sent_at'),
+            'classes': ('collapse',)
+        }),
     )
 
+    def retry_mail(self, request, queryset):
+        # Захваченные воркером сообщения не трогаем: повтор отправил бы письмо дважды
+        queryset = queryset.exclude(mail_status__in=[ContactMessage.MAIL_SENT, ContactMessage.MAIL_SENDING])
+        count = queryset.update(
+            mail_status=ContactMessage.MAIL_PENDING, mail_attempts=0, mail_next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f'Повторно поставлено в очередь: {count}')
+    retry_mail.short_description = 'Повторить отправку уведомления'
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ['article', 'channel', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['channel', 'status', 'created_at']
+    search_fields = ['article__title', 'idempotency_key', 'last_error']
+    readonly_fields = [
+        'channel', 'article', 'idempotency_key', 'payload', 'attempts',
+        'last_error', 'created_at', 'sent_at'
+    ]
+    actions = ['retry_messages']
+
+    def retry_messages(self, request, queryset):
+        # Захваченные воркером сообщения не трогаем: повтор опубликовал бы пост дважды
+        count = queryset.exclude(status__in=[OutboxMessage.STATUS_SENT, OutboxMessage.STATUS_SENDING]).update(
+            status=OutboxMessage.STATUS_PENDING, attempts=0, next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f'Повторно поставлено в очередь: {count}')
+    retry_messages.short_description = 'Повторить отправку'
+
 
 @admin.register(SiteSettings)
 class SiteSettingsAdmin(admin.ModelAdmin):
@@ -0,0 +1,78 @@
+"""
+Подготовка HTML статьи при сохранении.
+
+Результат хранится в полях Article и при показе статьи только выводится:
+
+- post_html — текст с id и якорями у заголовков h2/h3, подсвеченным кодом
+  (main.highlight) и кнопками копирования;
+- toc — оглавление [{'level', 'id', 'title'}];
+- word_count и reading_time (минуты).
+"""
+import math
+import re
+
+from bs4 import BeautifulSoup
+
+from .highlight import highlight_blocks
+
+WORDS_PER_MINUTE = 200
+TOC_LEVELS = ('h2', 'h3')
+
+HEADER_ID_RE = re.compile(r'[^a-zа-яё0-9]+')
+
+ANCHOR_HTML = (
+    '<a class="header-anchor" href="#{id}" aria-label="Ссылка на раздел"><i class="fas fa-link"></i></a>'
+)
+COPY_BUTTON_HTML = (
+    '<button type="button" class="code-copy-btn" aria-label="Копировать код">'
+    '<i class="fas fa-copy"></i><span class="copy-text">Копировать</span></button>'
+)
+
+
+def header_id(text):
+    """id заголовка по его тексту (как делал раньше main.js)."""
+    return HEADER_ID_RE.sub('-', text.lower()).strip('-') or 'section'
+
+
+def add_header_anchors(soup):
+    """id и якоря у заголовков; возвращает оглавление."""
+    toc = []
+    used = set()
+    for header in soup.find_all(TOC_LEVELS):
+        title = header.get_text(' ', strip=True)
+        base = header.get('id') or header_id(title)
+        anchor_id, counter = base, 2
+        while anchor_id in used:
+            anchor_id = f'{base}-{counter}'
+            counter += 1
+        used.add(anchor_id)
+
+        header['id'] = anchor_id
+        header.append(BeautifulSoup(ANCHOR_HTML.format(id=anchor_id), 'html.parser'))
+        toc.append({'level': int(header.name[1]), 'id': anchor_id, 'title': title})
+    return toc
+
+
+def add_copy_buttons(soup):
+    for pre in soup.find_all('pre'):
+        if pre.code is not None and pre.find(class_='code-copy-btn') is None:
+            pre.append(BeautifulSoup(COPY_BUTTON_HTML, 'html.parser'))
+
+
+def count_words(soup):
+    return len(soup.get_text(' ').split())
+
+
+def render_article(html, use_cache=True):
+    """Обработанный HTML, оглавление, число слов и время чтения статьи."""
+    soup = BeautifulSoup(html or '', 'html.parser')
+    word_count = count_words(soup)
+    toc = add_header_anchors(soup)
+    highlight_blocks(soup, use_cache)
+    add_copy_buttons(soup)
+    return {
+        'post_html': str(soup),
+        'toc': toc,
+        'word_count': word_count,
+        'reading_time': max(1, math.ceil(word_count / WORDS_PER_MINUTE)),
+    }
@@ -0,0 +1,106 @@
+"""
+Склейка и минификация CSS/JS в бандлы страниц (settings.STATIC_BUNDLES).
+
+Бандлы собираются при collectstatic (main.storage) и затем хешируются
+вместе с остальной статикой. Минификация консервативная: удаляются
+комментарии и лишние пробелы, строки и шаблонные литералы не меняются.
+"""
+import re
+
+from django.conf import settings
+
+KINDS = ('css', 'js')
+
+CSS_TOKEN_RE = re.compile(r'''(?P<comment>/\*.*?\*/)|(?P<string>"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')''', re.S)
+JS_TOKEN_RE = re.compile(
+    r'''(?P<comment>/\*.*?\*/|^[ \t]*//[^\n]*)'''
+    r'''|(?P<string>`(?:\\.|[^`\\])*`|"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')''',
+    re.S | re.M
+)
+PLACEHOLDER_RE = re.compile('\x00(\\d+)\x00')
+
+CSS_SPACES_RE = re.compile(r'\s+')
+CSS_PUNCTUATION_RE = re.compile(r'\s*([{};,>])\s*')
+CSS_COLON_RE = re.compile(r':\s+')
+# Объявление — текст перед ; или }; перед { стоит селектор, где пробел
+# перед двоеточием значим (.a :hover — не то же самое, что .a:hover)
+CSS_DECLARATION_RE = re.compile(r'[^{};]+(?=[;}])')
+CSS_DECLARATION_COLON_RE = re.compile(r'\s*:\s*')
+
+
+def _protect(text, token_re):
+    """Удаление комментариев и замена строк метками; возвращает текст и строки."""
+    strings = []
+
+    def replace(match):
+        if match.group('comment') is not None:
+            return ''
+        strings.append(match.group('string'))
+        return f'\x00{len(strings) - 1}\x00'
+
+    return token_re.sub(replace, text), strings
+
+
+def _restore(text, strings):
+    return PLACEHOLDER_RE.sub(lambda m: strings[int(m.group(1))], text)
+
+
+def minify_css(text):
+    text, strings = _protect(text, CSS_TOKEN_RE)
+    text = CSS_SPACES_RE.sub(' ', text)
+    text = CSS_PUNCTUATION_RE.sub(r'\1', text)
+    text = CSS_COLON_RE.sub(':', text)
+    text = CSS_DECLARATION_RE.sub(lambda m: CSS_DECLARATION_COLON_RE.sub(':', m.group()), text)
+    text = text.replace(';}', '}')
+    return _restore(text.strip(), strings)
+
+
+def minify_js(text):
+    """Удаление комментариев, отступов и пустых строк.
+
+    Переводы строк сохраняются, чтобы не зависеть от автоматической
+    расстановки точек с запятой.
+    """
+    text, strings = _protect(text, JS_TOKEN_RE)
+    lines = (line.strip() for line in text.splitlines())
+    return _restore('\n'.join(line for line in lines if line), strings)
+
+
+MINIFIERS = {'css': minify_css, 'js': minify_js}
+
+
+def bundle_path(name, kind):
+    return f'{kind}/{name}.bundle.{kind}'
+
+
+def get_bundles():
+    """[(имя, тип, [исходные файлы])] для всех бандлов из настроек."""
+    return [
+        (name, kind, sources)
+        for name, bundle in settings.STATIC_BUNDLES.items()
+        for kind, sources in bundle.items()
+    ]
+
+
+def get_sources(name, kind):
+    try:
+        return settings.STATIC_BUNDLES[name][kind]
+    except KeyError:
+        raise ValueError(f'Бандл {name}.{kind} не описан в STATIC_BUNDLES')
+
+
+def build_bundle(kind, sources, open_file):
+    """Содержимое бандла; open_file(path) открывает исходный файл в хранилище."""
+    parts = []
+    for path in sources:
+        with open_file(path) as f:
+            parts.append(MINIFIERS[kind](f.read().decode('utf-8')))
+    # Точка с запятой на случай файла без неё в конце
+    separator = '\n' if kind == 'css' else ';\n'
+    return separator.join(parts) + '\n'
+
+
+def build_bundles(open_file):
+    """Итератор [(путь бандла, содержимое)] для collectstatic."""
+    for name, kind, sources in get_bundles():
+        yield bundle_path(name, kind), build_bundle(kind, sources, open_file)
@@ -0,0 +1,190 @@
+"""
+Проверка токенов Yandex SmartCaptcha.
+
+- запросы идут через общую сессию с пулом постоянных соединений;
+- отклонённый токен кешируется на SMARTCAPTCHA_TOKEN_TTL секунд, поэтому
+  повторная отправка формы с ним не ходит в API; пройденный токен не
+  кешируется — токен одноразовый, и повтор с ним снова проверяет API;
+- после SMARTCAPTCHA_BREAKER_THRESHOLD ошибок подряд (таймауты, 5xx) цепь
+  размыкается на SMARTCAPTCHA_BREAKER_COOLDOWN секунд: проверка сразу
+  считается пройденной (fail-open, как советует документация), не дожидаясь
+  таймаута. Затем цепь полуоткрыта: в API идёт только один пробный запрос
+  (остальные пропускаются без проверки), его успех замыкает цепь, ошибка
+  снова размыкает её.
+
+Состояние предохранителя и счётчики метрик хранятся в общем кеше состояния,
+результаты проверки токенов — в кеше throttle; и то и другое видно всем
+процессам.
+"""
+import hashlib
+import logging
+import threading
+import time
+
+import requests
+from django.conf import settings
+from django.core.cache import caches
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+TOKEN_KEY = 'captcha:token:{}'
+FAILURES_KEY = 'captcha:breaker:failures'
+OPEN_KEY = 'captcha:breaker:open'
+HALF_OPEN_KEY = 'captcha:breaker:half_open'
+PROBE_KEY = 'captcha:breaker:probe'
+METRIC_KEY = 'captcha:metric:{}'
+METRICS = ('ok', 'rejected', 'cached', 'errors', 'timeouts', 'short_circuited', 'latency_ms', 'requests')
+
+# Результаты проверки
+PASSED = 'ok'
+FAILED = 'failed'
+
+_lock = threading.Lock()
+_session = None
+
+
+def _cache():
+    return caches[settings.STATE_CACHE_ALIAS]
+
+
+def _token_cache():
+    return caches[settings.THROTTLE_CACHE_ALIAS]
+
+
+def get_session():
+    """Общая для потоков сессия с пулом соединений к API капчи."""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.SMARTCAPTCHA_POOL_SIZE)
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+        return _session
+
+
+def _count(metric, value=1):
+    cache = _cache()
+    key = METRIC_KEY.format(metric)
+    try:
+        cache.incr(key, value)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key, value)
+
+
+def _token_key(token):
+    return TOKEN_KEY.format(hashlib.sha256(token.encode()).hexdigest())
+
+
+def is_open():
+    """Цепь разомкнута: API недавно не отвечал."""
+    return bool(_cache().get(OPEN_KEY))
+
+
+def _acquire_probe():
+    """Разрешение на запрос к API: в полуоткрытой цепи его получает только один запрос."""
+    cache = _cache()
+    if not cache.get(HALF_OPEN_KEY):
+        return True
+    # Ключ истекает, если пробный запрос не вернулся (процесс упал)
+    return cache.add(PROBE_KEY, True, settings.SMARTCAPTCHA_TIMEOUT * 2 + 1)
+
+
+def _trip(reason):
+    cache = _cache()
+    cooldown = settings.SMARTCAPTCHA_BREAKER_COOLDOWN
+    if cache.add(OPEN_KEY, True, cooldown):
+        logger.warning(f'SmartCaptcha недоступна ({reason}), проверка отключена на {cooldown} с')
+    cache.set(HALF_OPEN_KEY, True, None)
+    cache.delete_many([FAILURES_KEY, PROBE_KEY])
+
+
+def _record_failure():
+    cache = _cache()
+    if cache.get(HALF_OPEN_KEY):
+        _trip('пробный запрос не прошёл')
+        return
+    cache.add(FAILURES_KEY, 0, settings.SMARTCAPTCHA_BREAKER_COOLDOWN)
+    try:
+        failures = cache.incr(FAILURES_KEY)
+    except ValueError:
+        failures = 1
+    if failures >= settings.SMARTCAPTCHA_BREAKER_THRESHOLD:
+        _trip(f'{failures} ошибок подряд')
+
+
+def _record_success():
+    _cache().delete_many([FAILURES_KEY, HALF_OPEN_KEY, PROBE_KEY])
+
+
+def _request(token, ip=None):
+    """Запрос к API; PASSED / FAILED или None при недоступности сервиса."""
+    data = {'secret': settings.SMARTCAPTCHA_SERVER_KEY, 'token': token}
+    if ip:
+        data['ip'] = ip
+
+    started = time.monotonic()
+    try:
+        response = get_session().post(
+            settings.SMARTCAPTCHA_VERIFY_URL, data=data, timeout=settings.SMARTCAPTCHA_TIMEOUT
+        )
+    except requests.Timeout:
+        _count('timeouts')
+        return None
+    except requests.RequestException as e:
+        logger.warning(f'Ошибка запроса к SmartCaptcha: {e}')
+        _count('errors')
+        return None
+    finally:
+        _count('requests')
+        _count('latency_ms', int((time.monotonic() - started) * 1000))
+
+    if response.status_code != 200:
+        _count('errors')
+        return None
+    try:
+        status = response.json().get('status')
+    except ValueError:
+        _count('errors')
+        return None
+    return PASSED if status == 'ok' else FAILED
+
+
+def verify(token, ip=None):
+    """Проверка токена; при недоступности API возвращает True (fail-open)."""
+    key = _token_key(token)
+    if _token_cache().get(key) == FAILED:
+        _count('cached')
+        return False
+
+    if is_open() or not _acquire_probe():
+        _count('short_circuited')
+        return True
+
+    result = _request(token, ip)
+    if result is None:
+        _record_failure()
+        return True
+
+    _record_success()
+    if result == PASSED:
+        _count('ok')
+        return True
+    _count('rejected')
+    _token_cache().set(key, FAILED, settings.SMARTCAPTCHA_TOKEN_TTL)
+    return False
+
+
+def get_stats():
+    """Счётчики проверок, средняя задержка и состояние предохранителя."""
+    values = _cache().get_many([METRIC_KEY.format(metric) for metric in METRICS])
+    stats = {metric: values.get(METRIC_KEY.format(metric), 0) for metric in METRICS}
+    stats['avg_latency_ms'] = stats['latency_ms'] / stats['requests'] if stats['requests'] else 0.0
+    stats['open'] = is_open()
+    return stats
+
+
+def reset_stats():
+    _cache().delete_many([METRIC_KEY.format(metric) for metric in METRICS])
@@ -0,0 +1,56 @@
+"""
+Загрузка дерева комментариев статьи одним запросом.
+
+Дерево строится в памяти, а шаблон получает плоский список в порядке
+обхода, где у каждого комментария заранее посчитаны:
+
+- depth — уровень вложенности;
+- tree_children — прямые ответы;
+- tree_closes — сколько уровней вложенности закрывается после комментария.
+"""
+from .models import Comment
+
+
+def build_comment_tree(comments):
+    """Построение плоского списка в порядке обхода дерева из набора комментариев."""
+    by_id = {}
+    for comment in comments:
+        comment.tree_children = []
+        by_id[comment.pk] = comment
+
+    roots = []
+    for comment in by_id.values():
+        if comment.parent_id is None:
+            roots.append(comment)
+        elif comment.parent_id in by_id:
+            by_id[comment.parent_id].tree_children.append(comment)
+        # Ответы на скрытые комментарии не показываются, как и раньше
+
+    # Новые ветки сверху, ответы внутри ветки — по порядку
+    roots.sort(key=lambda c: c.created_at, reverse=True)
+
+    flat = []
+    _walk(roots, 0, flat)
+    for comment in flat:
+        comment.tree_closes = range(comment.tree_closes)
+    return flat
+
+
+def _walk(nodes, depth, flat):
+    for node in nodes:
+        node.depth = depth
+        node.tree_closes = 0
+        flat.append(node)
+        if node.tree_children:
+            node.tree_children.sort(key=lambda c: c.created_at)
+            _walk(node.tree_children, depth + 1, flat)
+            # Последний выведенный лист закрывает контейнер ответов этого узла
+            flat[-1].tree_closes += 1
+
+
+def load_comment_tree(article):
+    """Все одобренные комментарии статьи с авторами за один запрос."""
+    comments = Comment.objects.filter(
+        article=article, is_approved=True
+    ).select_related('user').order_by('created_at')
+    return build_comment_tree(comments)
@@ -0,0 +1,82 @@
+"""
+Условные GET-запросы (ETag / Last-Modified).
+
+Перед построением контекста выполняется дешёвый запрос валидаторов. Если
+содержимое страницы не изменилось с прошлого визита, браузер получает
+304 Not Modified без рендера шаблона.
+"""
+import hashlib
+from calendar import timegm
+
+from django.contrib.messages import get_messages
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .page_cache import get_versions
+
+
+def make_etag(*parts):
+    """ETag из частей состояния страницы."""
+    raw = '|'.join(str(part) for part in parts)
+    return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+
+def user_key(request):
+    """Часть ETag, зависящая от посетителя: шапка и формы различаются."""
+    user = request.user
+    return f'user:{user.pk}' if user.is_authenticated else 'anon'
+
+
+def model_versions(models):
+    """Версии моделей из кеша страниц в стабильном порядке."""
+    versions = get_versions(models)
+    return tuple(versions[key] for key in sorted(versions))
+
+
+def timestamp(value):
+    return timegm(value.utctimetuple()) if value else None
+
+
+def get_validators_response(request, etag, last_modified):
+    """304/412 для неизменившейся страницы, иначе None."""
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    # Отложенные флеш-сообщения должны попасть в свежий ответ
+    if len(get_messages(request)):
+        return None
+    return get_conditional_response(request, etag=etag, last_modified=timestamp(last_modified))
+
+
+def set_validators(response, etag, last_modified):
+    if response.status_code != 200:
+        return response
+    if etag and not response.has_header('ETag'):
+        response['ETag'] = etag
+    if last_modified and not response.has_header('Last-Modified'):
+        response['Last-Modified'] = http_date(timestamp(last_modified))
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Поддержка ETag и Last-Modified для представления.
+
+    Подкласс реализует get_validators() и возвращает (etag, last_modified)
+    или None, если страницу проверить нельзя (например, объекта нет).
+    Миксин ставится перед PageCacheMixin, чтобы 304 отдавался раньше кеша.
+    """
+
+    def get_validators(self):
+        raise NotImplementedError
+
+    def dispatch(self, request, *args, **kwargs):
+        validators = self.get_validators() if request.method in ('GET', 'HEAD') else None
+
+        if validators is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        etag, last_modified = validators
+        response = get_validators_response(request, etag, last_modified)
+        if response is not None:
+            return response
+        return set_validators(super().dispatch(request, *args, **kwargs), etag, last_modified)
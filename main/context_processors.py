@@ -1,8 +1,10 @@
+from django.utils.functional import SimpleLazyObject
+
 from .models import SiteSettings
 
 
 def site_settings(request):
-    """Глобальный контекст с настройками сайта."""
+    """Глобальный контекст с настройками сайта (загружаются при первом обращении)."""
     return {
-        'global_settings': SiteSettings.load()
+        'global_settings': SimpleLazyObject(SiteSettings.get_cached)
     }
\ No newline at end of file
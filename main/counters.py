@@ -0,0 +1,190 @@
+"""
+Денормализованные счётчики лайков, дизлайков и комментариев.
+
+Счётчики хранятся в колонках Article и Comment и меняются атомарно
+через F-выражения, без повторного подсчёта строк.
+"""
+from contextvars import ContextVar
+
+from django.db import IntegrityError, transaction
+from django.db.models import CharField, Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Article, ArticleLike, Comment, CommentLike
+
+# Счётчики удаляемого голоса меняет remove_vote, а не обработчик post_delete
+_removing_votes = ContextVar('removing_votes', default=False)
+
+
+def _vote_field(is_like):
+    return 'likes_count' if is_like else 'dislikes_count'
+
+
+def adjust_vote_counters(model, pk, old_vote=None, new_vote=None):
+    """Перенос голоса между счётчиками лайков и дизлайков объекта."""
+    if old_vote == new_vote:
+        return
+
+    changes = {}
+    if old_vote is not None:
+        changes[_vote_field(old_vote)] = F(_vote_field(old_vote)) - 1
+    if new_vote is not None:
+        changes[_vote_field(new_vote)] = F(_vote_field(new_vote)) + 1
+    model.objects.filter(pk=pk).update(**changes)
+
+
+def vote_target(vote):
+    """Модель и id объекта, за который отдан голос."""
+    if isinstance(vote, ArticleLike):
+        return Article, vote.article_id
+    return Comment, vote.comment_id
+
+
+def removing_votes():
+    return _removing_votes.get()
+
+
+def remove_vote(vote):
+    """
+    Удаление прочитанного голоса.
+
+    select_for_update на SQLite ничего не блокирует, и два параллельных
+    запроса могут прочитать один и тот же голос. Счётчик уменьшается, только
+    если строку удалил именно этот запрос.
+    """
+    token = _removing_votes.set(True)
+    try:
+        deleted, _ = type(vote).objects.filter(pk=vote.pk, is_like=vote.is_like).delete()
+    finally:
+        _removing_votes.reset(token)
+    if deleted == 1:
+        adjust_vote_counters(*vote_target(vote), vote.is_like, None)
+    return deleted == 1
+
+
+def adjust_comments_count(article_id, delta):
+    """Изменение счётчика одобренных комментариев статьи."""
+    if delta:
+        Article.objects.filter(pk=article_id).update(comments_count=F('comments_count') + delta)
+
+
+def toggle_vote(vote_model, target, user, is_like):
+    """
+    Переключение голоса пользователя за статью или комментарий.
+
+    Повторный голос того же знака снимает оценку, противоположный — меняет её.
+    Возвращает кортеж (user_vote, likes_count, dislikes_count).
+    """
+    target_field = 'article' if vote_model is ArticleLike else 'comment'
+    lookup = {target_field: target, 'user': user}
+
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                vote = vote_model.objects.select_for_update().filter(**lookup).first()
+                if vote is None:
+                    vote_model.objects.create(is_like=is_like, **lookup)
+                    user_vote = is_like
+                elif vote.is_like == is_like:
+                    remove_vote(vote)
+                    user_vote = None
+                else:
+                    vote.is_like = is_like
+                    vote.save(update_fields=['is_like'])
+                    user_vote = is_like
+
+                likes, dislikes = type(target).objects.filter(pk=target.pk).values_list(
+                    'likes_count', 'dislikes_count'
+                ).get()
+            return user_vote, likes, dislikes
+        except IntegrityError:
+            # Параллельный запрос того же пользователя успел создать голос
+            if attempt:
+                raise
+
+
+def _set_vote(vote_model, lookup, is_like):
+    """Установка голоса (None — снять оценку) внутри открытой транзакции."""
+    vote = vote_model.objects.select_for_update().filter(**lookup).first()
+    if vote is None:
+        if is_like is not None:
+            vote_model.objects.create(is_like=is_like, **lookup)
+    elif is_like is None:
+        remove_vote(vote)
+    elif vote.is_like != is_like:
+        vote.is_like = is_like
+        vote.save(update_fields=['is_like'])
+
+
+def apply_votes(article, user, votes):
+    """
+    Применение нескольких голосов одной транзакцией.
+
+    votes — словарь {'article': bool | None, 'comments': {comment_id: bool | None}};
+    в отличие от toggle_vote значение задаёт итоговую оценку, а не переключает её.
+    Комментарии должны принадлежать статье (проверяет вызывающий код).
+    """
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                if 'article' in votes:
+                    _set_vote(ArticleLike, {'article': article, 'user': user}, votes['article'])
+                # Стабильный порядок блокировок для параллельных запросов
+                for comment_id, is_like in sorted(votes.get('comments', {}).items()):
+                    _set_vote(CommentLike, {'comment_id': comment_id, 'user': user}, is_like)
+            return
+        except IntegrityError:
+            if attempt:
+                raise
+
+
+def get_user_votes(article_id, user):
+    """
+    Голоса пользователя за статью и все её комментарии одним запросом.
+
+    Возвращает {'article': bool | None, 'comments': {comment_id: bool}}.
+    """
+    article_votes = ArticleLike.objects.filter(article_id=article_id, user=user).annotate(
+        kind=Value('article', output_field=CharField()), target=F('article_id'), vote=F('is_like')
+    ).values_list('kind', 'target', 'vote')
+    comment_votes = CommentLike.objects.filter(comment__article_id=article_id, user=user).annotate(
+        kind=Value('comment', output_field=CharField()), target=F('comment_id'), vote=F('is_like')
+    ).values_list('kind', 'target', 'vote')
+
+    state = {'article': None, 'comments': {}}
+    for kind, target, vote in article_votes.union(comment_votes, all=True):
+        if kind == 'article':
+            state['article'] = vote
+        else:
+            state['comments'][target] = vote
+    return state
+
+
+def _count_subquery(model, outer_field, **filters):
+    counts = model.objects.filter(**{outer_field: OuterRef('pk')}, **filters).order_by().values(
+        outer_field
+    ).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counts), Value(0))
+
+
+def recount_comments(article_ids=None):
+    """Пересчёт счётчиков комментариев для указанных статей (или всех)."""
+    articles = Article.objects.all()
+    if article_ids is not None:
+        articles = articles.filter(pk__in=article_ids)
+    return articles.update(comments_count=_count_subquery(Comment, 'article', is_approved=True))
+
+
+def rebuild_counters():
+    """Полный пересчёт всех денормализованных счётчиков."""
+    with transaction.atomic():
+        articles = Article.objects.update(
+            likes_count=_count_subquery(ArticleLike, 'article', is_like=True),
+            dislikes_count=_count_subquery(ArticleLike, 'article', is_like=False),
+            comments_count=_count_subquery(Comment, 'article', is_approved=True),
+        )
+        comments = Comment.objects.update(
+            likes_count=_count_subquery(CommentLike, 'comment', is_like=True),
+            dislikes_count=_count_subquery(CommentLike, 'comment', is_like=False),
+        )
+    return articles, comments
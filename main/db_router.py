@@ -0,0 +1,76 @@
+"""
+Чтение с реплики PostgreSQL для страниц, которые только читают данные.
+
+Представления с ReplicaReadMixin (главная, блог, статья, проекты) на время
+GET-запроса читают модели сайта с settings.REPLICA_DB_ALIAS. Запись всегда
+идёт в основную базу; пользователи и сессии читаются только из неё, чтобы
+вход и регистрация не зависели от отставания реплики. После изменяющего
+запроса посетитель REPLICA_PIN_SECONDS секунд читает с основной базы
+(cookie ставит main.middleware.ReplicaPinMiddleware) и сразу видит свой
+комментарий или оценку.
+
+Без настроенной реплики роутер ничего не меняет.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = 'db_primary'
+# Приложения, которые всегда читаются из основной базы
+PRIMARY_ONLY_APPS = {'admin', 'auth', 'contenttypes', 'sessions'}
+
+_use_replica = ContextVar('use_replica', default=False)
+
+
+@contextmanager
+def read_from_replica():
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def replica_enabled():
+    return settings.REPLICA_DB_ALIAS is not None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not (_use_replica.get() and replica_enabled()):
+            return None
+        if model._meta.app_label in PRIMARY_ONLY_APPS or model._meta.label == settings.AUTH_USER_MODEL:
+            return None
+        return settings.REPLICA_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Объект, прочитанный с реплики, сохраняется в основную базу
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, settings.REPLICA_DB_ALIAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Схему реплики переносит репликация
+        if db == settings.REPLICA_DB_ALIAS:
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """Чтение с реплики для GET/HEAD-запросов представления."""
+
+    def dispatch(self, request, *args, **kwargs):
+        if (
+            not replica_enabled()
+            or request.method not in ('GET', 'HEAD')
+            or PIN_COOKIE in request.COOKIES
+        ):
+            return super().dispatch(request, *args, **kwargs)
+        with read_from_replica():
+            return super().dispatch(request, *args, **kwargs)
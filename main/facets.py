@@ -0,0 +1,41 @@
+"""
+Фасеты фильтров страницы проектов: языки и технологии с количеством проектов.
+
+Список строится двумя агрегирующими запросами и хранится в общем кеше
+до следующего изменения проектов или тегов.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Language, Technology
+
+PROJECT_FACETS_KEY = 'projects:facets'
+
+
+def _facet(model):
+    return list(
+        model.objects.filter(projects__is_visible=True)
+        .annotate(count=Count('projects'))
+        .order_by('name')
+        .values('name', 'key', 'count')
+    )
+
+
+def get_project_facets():
+    """Языки и технологии видимых проектов с количеством проектов."""
+    cache = caches[settings.SHARED_CACHE_ALIAS]
+    facets = cache.get(PROJECT_FACETS_KEY)
+    if facets is None:
+        facets = {
+            'languages': _facet(Language),
+            'technologies': _facet(Technology),
+        }
+        cache.set(PROJECT_FACETS_KEY, facets, None)
+    return facets
+
+
+def invalidate_project_facets():
+    """Сброс кеша фасетов после коммита текущей транзакции."""
+    transaction.on_commit(lambda: caches[settings.SHARED_CACHE_ALIAS].delete(PROJECT_FACETS_KEY))
@@ -0,0 +1,128 @@
+"""
+RSS и Atom ленты блога, заранее записанные в файлы (settings.FEEDS_ROOT).
+
+Общая лента и ленты категорий перестраиваются после сохранения статьи или
+категории; агрегаторы получают готовый файл, а при повторном опросе — 304.
+"""
+import os
+
+from django.conf import settings
+from django.http import Http404
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils.html import strip_tags
+from django.urls import reverse
+
+from .models import Article, Category, SiteSettings
+from .prebuilt import file_etag, file_last_modified, remove, write_atomic
+
+FEED_TYPES = {
+    'rss': Rss201rev2Feed,
+    'atom': Atom1Feed,
+}
+SITE_FEED = 'blog'
+CATEGORY_FEED = 'category-{slug}'
+
+
+def feed_path(kind, category_slug=None):
+    name = CATEGORY_FEED.format(slug=category_slug) if category_slug else SITE_FEED
+    return os.path.join(settings.FEEDS_ROOT, f'{name}.{kind}.xml')
+
+
+def feed_url(kind, category_slug=None):
+    if category_slug:
+        return reverse('category_feed', kwargs={'category_slug': category_slug, 'kind': kind})
+    return reverse('feed', kwargs={'kind': kind})
+
+
+def get_articles(category=None):
+    articles = Article.objects.filter(is_published=True, is_achievement=False)
+    if category is not None:
+        articles = articles.filter(category=category)
+    return articles.select_related('category').only(
+        'title', 'slug', 'excerpt', 'author', 'date', 'updated_at', 'category__name'
+    ).order_by('-date')[:settings.FEED_LIMIT]
+
+
+def render_feed(kind, articles, category=None):
+    site_settings = SiteSettings.load()
+    title = site_settings.site_name
+    link = reverse('blog')
+    if category is not None:
+        title = f'{title} — {category.name}'
+        link = category.get_absolute_url()
+
+    feed = FEED_TYPES[kind](
+        title=title,
+        link=settings.SITE_URL + link,
+        description=category.description if category and category.description else site_settings.site_description,
+        language='ru',
+        feed_url=settings.SITE_URL + feed_url(kind, category.slug if category else None),
+        author_name=site_settings.owner_name,
+    )
+    for article in articles:
+        feed.add_item(
+            title=article.title,
+            link=settings.SITE_URL + article.get_absolute_url(),
+            description=strip_tags(article.excerpt),
+            unique_id=settings.SITE_URL + article.get_absolute_url(),
+            author_name=article.author,
+            pubdate=article.date,
+            updateddate=article.updated_at,
+            categories=[article.category.name] if article.category else None,
+        )
+    return feed.writeString('utf-8')
+
+
+def write_feeds(category=None):
+    """Запись RSS и Atom ленты (общей или категории)."""
+    os.makedirs(settings.FEEDS_ROOT, exist_ok=True)
+    articles = list(get_articles(category))
+    slug = category.slug if category is not None else None
+    for kind in FEED_TYPES:
+        write_atomic(feed_path(kind, slug), render_feed(kind, articles, category))
+
+
+def regenerate():
+    """Общая лента и ленты всех категорий.
+
+    Категорий немного, поэтому после изменения статьи перестраиваются все
+    ленты: так статья пропадает и из ленты прежней категории. Файлы
+    удалённых и переименованных категорий удаляются.
+    """
+    write_feeds()
+    slugs = set()
+    for category in Category.objects.all():
+        write_feeds(category)
+        slugs.add(category.slug)
+
+    current = {os.path.basename(feed_path(kind, slug)) for slug in slugs for kind in FEED_TYPES}
+    prefix = CATEGORY_FEED.format(slug='')
+    for name in os.listdir(settings.FEEDS_ROOT):
+        if name.startswith(prefix) and name.endswith('.xml') and name not in current:
+            remove(os.path.join(settings.FEEDS_ROOT, name))
+
+
+def regenerate_if_built():
+    """Перестроение лент, если они уже были построены."""
+    if os.path.exists(feed_path('rss')):
+        regenerate()
+
+
+def get_feed_path(kind, category_slug=None):
+    """Путь к ленте; при первом запросе строятся все ленты."""
+    path = feed_path(kind, category_slug)
+    if not os.path.exists(path):
+        if os.path.exists(feed_path(kind)):
+            raise Http404
+        regenerate()
+        if not os.path.exists(path):
+            raise Http404
+    return path
+
+
+def feed_etag(request, kind, category_slug=None):
+    return file_etag(get_feed_path(kind, category_slug))
+
+
+def feed_last_modified(request, kind, category_slug=None):
+    return file_last_modified(get_feed_path(kind, category_slug))
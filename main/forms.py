@@ -3,8 +3,8 @@ from django.contrib.auth.forms import AuthenticationForm
 from django.core.validators import RegexValidator
 from django.conf import settings
 import bleach
-import requests
 
+from . import captcha
 from .models import CustomUser, Comment, ContactMessage
 
 
@@ -26,27 +26,8 @@ class SmartCaptchaField(forms.CharField):
             raise forms.ValidationError('Проверка капчи не пройдена. Попробуйте снова.')
 
     def _verify_captcha(self, token):
-        """Проверка токена на сервере Yandex SmartCaptcha."""
-        try:
-            response = requests.post(
-                'https://smartcaptcha.yandexcloud.net/validate',
-                data={
-                    'secret': settings.SMARTCAPTCHA_SERVER_KEY,
-                    'token': token,
-                },
-                timeout=5
-            )
-
-            # Рекомендация документации: при ошибке HTTP считать проверку успешной
-            if response.status_code != 200:
-                return True
-
-            result = response.json()
-            return result.get('status') == 'ok'
-
-        except requests.RequestException:
-            # При сетевой ошибке пропускаем, чтобы не блокировать пользователей
-            return True
+        """Проверка токена на сервере Yandex SmartCaptcha (см. main.captcha)."""
+        return captcha.verify(token)
 
 
 class SmartCaptchaWidget(forms.Widget):
@@ -0,0 +1,98 @@
+"""
+Подсветка блоков кода статей на сервере (Pygments).
+
+Язык берётся из класса language-* или lang-* у <code> или <pre>, как было
+принято для Prism; блоки без языка остаются без подсветки. Готовый HTML
+кешируется по хешу языка и текста блока, поэтому при повторном сохранении
+статьи заново подсвечиваются только изменённые блоки.
+"""
+import hashlib
+import os
+
+from bs4 import BeautifulSoup
+from django.conf import settings
+from django.core.cache import caches
+from pygments import highlight as pygments_highlight
+from pygments.formatters import HtmlFormatter
+from pygments.lexers import get_lexer_by_name
+from pygments.util import ClassNotFound
+
+CACHE_KEY = 'code_highlight:{}'
+# Меняется при изменении разметки, чтобы не использовать старые записи кеша
+CACHE_VERSION = 1
+CSS_SELECTOR = '.article-body pre.highlight'
+LANGUAGE_PREFIXES = ('language-', 'lang-')
+
+
+def _cache():
+    return caches[settings.SHARED_CACHE_ALIAS]
+
+
+def get_language(pre, code):
+    for tag in (code, pre):
+        for css_class in tag.get('class', []):
+            for prefix in LANGUAGE_PREFIXES:
+                if css_class.startswith(prefix):
+                    return css_class[len(prefix):].lower()
+    return None
+
+
+def highlight_code(source, language, use_cache=True):
+    """HTML подсвеченного кода (без обёртки) или None для неизвестного языка."""
+    digest = hashlib.sha256(f'{CACHE_VERSION}\0{language}\0{source}'.encode()).hexdigest()
+    key = CACHE_KEY.format(digest)
+    if use_cache:
+        cached = _cache().get(key)
+        if cached is not None:
+            return cached or None
+
+    try:
+        lexer = get_lexer_by_name(language, stripnl=True)
+    except ClassNotFound:
+        html = ''
+    else:
+        html = pygments_highlight(source, lexer, HtmlFormatter(nowrap=True)).rstrip('\n')
+
+    # Пустая строка запоминает неизвестный язык
+    _cache().set(key, html, None)
+    return html or None
+
+
+def highlight_blocks(soup, use_cache=True):
+    """Подсветка всех блоков <pre><code> с указанным языком; возвращает их число."""
+    count = 0
+    for pre in soup.find_all('pre'):
+        code = pre.code
+        if code is None:
+            continue
+        language = get_language(pre, code)
+        if not language:
+            continue
+
+        html = highlight_code(code.get_text(), language, use_cache)
+        if html is None:
+            continue
+        code.clear()
+        code.append(BeautifulSoup(html, 'html.parser'))
+        pre['class'] = [*(c for c in pre.get('class', []) if c != 'highlight'), 'highlight']
+        count += 1
+    return count
+
+
+def style_css(style=None):
+    """CSS темы подсветки для блоков кода статей."""
+    style = style or settings.CODE_HIGHLIGHT_STYLE
+    formatter = HtmlFormatter(style=style)
+    return '\n'.join([
+        f'/* Generated by `manage.py rehighlight_articles` (Pygments style: {style}) */',
+        *formatter.get_token_style_defs(CSS_SELECTOR),
+        '',
+    ])
+
+
+def write_style_css(path=None):
+    """Запись CSS темы в статический файл; возвращает путь."""
+    path = path or os.path.join(settings.STATICFILES_DIRS[0], 'css', 'code.css')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(style_css())
+    return path
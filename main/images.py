@@ -0,0 +1,196 @@
+"""
+Адаптивные изображения: уменьшенные копии в AVIF/WebP.
+
+Для каждой загруженной картинки в MEDIA_ROOT/variants создаются копии
+нескольких ширин без EXIF, а в таблицу ImageVariants записываются размеры
+оригинала, крошечная заглушка (data URI) и список копий. Кодирование
+выполняется в пуле процессов: AVIF заметно нагружает CPU. Если Pillow не
+умеет записывать AVIF (до версии 11.3 или без libavif), создаются только
+копии в WebP.
+
+Тег {% responsive_image %} строит по этим данным <picture> со srcset.
+"""
+import base64
+import hashlib
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = 'image_variants:{}'
+PLACEHOLDER_WIDTH = 16
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp'}
+PIL_FORMATS = {'avif': 'AVIF', 'webp': 'WEBP'}
+
+_lock = threading.Lock()
+_pool = None
+
+
+# ===== Кодирование (выполняется в дочернем процессе, без ORM) =====
+
+def _placeholder(image):
+    small = image.copy()
+    small.thumbnail((PLACEHOLDER_WIDTH, PLACEHOLDER_WIDTH))
+    buffer = io.BytesIO()
+    small.save(buffer, 'WEBP', quality=30)
+    return 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def supported_formats(formats):
+    """Форматы, которые может записать установленный Pillow."""
+    Image.init()
+    return tuple(fmt for fmt in formats if PIL_FORMATS[fmt] in Image.SAVE)
+
+
+def render_variants(source_path, output_dir, base_name, widths, formats, quality):
+    """
+    Создание копий изображения; возвращает метаданные для ImageVariants.
+
+    Поворот из EXIF применяется к пикселям, сами метаданные в копии
+    не попадают. Копии шире оригинала не создаются.
+    """
+    with Image.open(source_path) as original:
+        image = ImageOps.exif_transpose(original)
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'PA', 'P') else 'RGB')
+
+    formats = supported_formats(formats)
+    width, height = image.size
+    targets = sorted({w for w in widths if w < width} | {min(width, max(widths))})
+    os.makedirs(output_dir, exist_ok=True)
+
+    variants = []
+    for target in targets:
+        resized = image if target == width else image.resize(
+            (target, max(1, round(height * target / width))), Image.LANCZOS
+        )
+        for fmt in formats:
+            name = f'{base_name}-{target}.{fmt}'
+            resized.save(os.path.join(output_dir, name), PIL_FORMATS[fmt], quality=quality)
+            variants.append({'width': target, 'height': resized.height, 'format': fmt, 'name': name})
+
+    return {
+        'width': width,
+        'height': height,
+        'placeholder': _placeholder(image),
+        'variants': variants,
+    }
+
+
+# ===== Работа с медиафайлами и базой =====
+
+def variants_dir(source):
+    """Каталог копий относительно MEDIA_ROOT: variants/<каталог исходника>."""
+    return os.path.join(settings.IMAGE_VARIANTS_DIR, os.path.dirname(source))
+
+
+def render_args(source):
+    # Имя исходника целиком, с расширением: у photo.jpg и photo.png копии не совпадут
+    base_name = os.path.basename(source)
+    return (
+        os.path.join(settings.MEDIA_ROOT, source),
+        os.path.join(settings.MEDIA_ROOT, variants_dir(source)),
+        base_name,
+        tuple(settings.IMAGE_VARIANT_WIDTHS),
+        tuple(settings.IMAGE_VARIANT_FORMATS),
+        settings.IMAGE_VARIANT_QUALITY,
+    )
+
+
+def _cache_key(source):
+    return CACHE_KEY.format(hashlib.md5(source.encode()).hexdigest())
+
+
+def store_metadata(source, metadata):
+    """Запись результата кодирования в ImageVariants."""
+    from .models import ImageVariants
+
+    directory = variants_dir(source)
+    for variant in metadata['variants']:
+        variant['name'] = os.path.join(directory, variant['name']).replace(os.sep, '/')
+    ImageVariants.objects.update_or_create(source=source, defaults=metadata)
+    caches[settings.SHARED_CACHE_ALIAS].delete(_cache_key(source))
+
+
+def process_image(source):
+    """Синхронное создание копий изображения."""
+    store_metadata(source, render_variants(*render_args(source)))
+
+
+def get_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=settings.IMAGE_VARIANTS_WORKERS)
+        return _pool
+
+
+def _store_result(source, future):
+    try:
+        store_metadata(source, future.result())
+    except Exception:
+        logger.exception(f'Не удалось создать копии изображения {source}')
+    finally:
+        connections.close_all()
+
+
+def schedule(source):
+    """Создание копий после коммита: в пуле процессов или сразу."""
+    def run():
+        if not settings.IMAGE_VARIANTS_ASYNC:
+            try:
+                process_image(source)
+            except Exception:
+                logger.exception(f'Не удалось создать копии изображения {source}')
+            return
+        future = get_pool().submit(render_variants, *render_args(source))
+        future.add_done_callback(lambda f: _store_result(source, f))
+    transaction.on_commit(run)
+
+
+def ensure_variants(field_file):
+    """Постановка изображения в обработку, если копий для него ещё нет."""
+    from .models import ImageVariants
+
+    if field_file and not ImageVariants.objects.filter(source=field_file.name).exists():
+        schedule(field_file.name)
+
+
+def delete_variants(source):
+    """Удаление копий и записи об изображении."""
+    from .models import ImageVariants
+
+    record = ImageVariants.objects.filter(source=source).first()
+    if record is None:
+        return
+    for variant in record.variants:
+        try:
+            os.remove(os.path.join(settings.MEDIA_ROOT, variant['name']))
+        except OSError:
+            pass
+    record.delete()
+    caches[settings.SHARED_CACHE_ALIAS].delete(_cache_key(source))
+
+
+def get_metadata(source):
+    """Метаданные изображения для шаблона: из общего кеша или из базы."""
+    from .models import ImageVariants
+
+    cache = caches[settings.SHARED_CACHE_ALIAS]
+    key = _cache_key(source)
+    metadata = cache.get(key)
+    if metadata is None:
+        record = ImageVariants.objects.filter(source=source).values(
+            'width', 'height', 'placeholder', 'variants'
+        ).first()
+        # Пустой словарь запоминает отсутствие копий, чтобы не спрашивать базу снова
+        metadata = record or {}
+        cache.set(key, metadata, None)
+    return metadata or None
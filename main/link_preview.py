@@ -0,0 +1,227 @@
+"""
+Превью ссылок статей (заголовок, описание, картинка).
+
+Страницы загружаются в пуле потоков через общую HTTP-сессию, из ответа
+читается только <head>. Результаты хранятся в общем кеше по нормализованному
+URL и после срока свежести перепроверяются условным запросом
+(If-None-Match / If-Modified-Since), так что неизменившаяся страница
+не скачивается повторно.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from bs4 import BeautifulSoup
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, transaction
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = 'link_preview:{}'
+USER_AGENT = 'Mozilla/5.0 (compatible; ArticleBot/1.0)'
+MAX_HEAD_BYTES = 256 * 1024
+CHUNK_SIZE = 8192
+
+HEAD_END_RE = re.compile(rb'</head\s*>|<body[\s>]', re.IGNORECASE)
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+_lock = threading.Lock()
+_session = None
+_executor = None
+
+
+def _cache():
+    return caches[settings.SHARED_CACHE_ALIAS]
+
+
+def get_session():
+    """Общая для потоков сессия с пулом соединений."""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.headers['User-Agent'] = USER_AGENT
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=settings.LINK_PREVIEW_WORKERS)
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+        return _session
+
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.LINK_PREVIEW_WORKERS, thread_name_prefix='link-preview'
+            )
+        return _executor
+
+
+def normalize_url(url):
+    """URL без фрагмента, порта по умолчанию и с хостом в нижнем регистре."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f'{host}:{parts.port}'
+    return urlunsplit((scheme, host, parts.path or '/', parts.query, ''))
+
+
+def _cache_key(url):
+    return CACHE_KEY.format(hashlib.md5(url.encode()).hexdigest())
+
+
+# ===== Загрузка и разбор =====
+
+def read_head(response):
+    """Байты документа до конца <head>; остальное тело не скачивается."""
+    data = b''
+    for chunk in response.iter_content(CHUNK_SIZE):
+        data += chunk
+        match = HEAD_END_RE.search(data)
+        if match:
+            return data[:match.start()]
+        if len(data) >= MAX_HEAD_BYTES:
+            break
+    return data
+
+
+def _decode(data, response):
+    match = META_CHARSET_RE.search(data)
+    for encoding in (match and match.group(1).decode('ascii'), response.encoding, 'utf-8'):
+        if not encoding:
+            continue
+        try:
+            return data.decode(encoding, errors='replace')
+        except LookupError:
+            continue
+    return data.decode('utf-8', errors='replace')
+
+
+def parse_head(html):
+    """Метаданные превью из разметки <head>."""
+    soup = BeautifulSoup(html, 'html.parser')
+    preview = {'title': '', 'description': '', 'image': ''}
+
+    og_title = soup.find('meta', property='og:title')
+    if og_title:
+        preview['title'] = og_title.get('content', '')[:255]
+    elif soup.title and soup.title.string:
+        preview['title'] = soup.title.string.strip()[:255]
+
+    og_desc = soup.find('meta', property='og:description')
+    meta_desc = og_desc or soup.find('meta', attrs={'name': 'description'})
+    if meta_desc:
+        preview['description'] = meta_desc.get('content', '')
+
+    og_image = soup.find('meta', property='og:image')
+    if og_image:
+        preview['image'] = og_image.get('content', '')
+    return preview
+
+
+def get_preview(url):
+    """
+    Превью ссылки из кеша или с сайта.
+
+    Возвращает словарь с ключами title, description и image либо None,
+    если страницу получить не удалось.
+    """
+    url = normalize_url(url)
+    key = _cache_key(url)
+    cached = _cache().get(key)
+    if cached and time.time() - cached['checked_at'] < settings.LINK_PREVIEW_FRESH_FOR:
+        return cached['preview']
+
+    headers = {}
+    if cached:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+
+    try:
+        with get_session().get(url, headers=headers, stream=True, timeout=settings.LINK_PREVIEW_TIMEOUT) as response:
+            if response.status_code == 304 and cached:
+                preview = cached['preview']
+            else:
+                response.raise_for_status()
+                if 'html' not in response.headers.get('Content-Type', 'text/html'):
+                    preview = {'title': '', 'description': '', 'image': ''}
+                else:
+                    preview = parse_head(_decode(read_head(response), response))
+            etag = response.headers.get('ETag', cached and cached.get('etag'))
+            last_modified = response.headers.get('Last-Modified', cached and cached.get('last_modified'))
+    except requests.RequestException as e:
+        logger.warning(f'Не удалось получить превью {url}: {e}')
+        # Устаревшее превью лучше, чем никакого
+        return cached['preview'] if cached else None
+
+    _cache().set(key, {
+        'preview': preview,
+        'etag': etag,
+        'last_modified': last_modified,
+        'checked_at': time.time(),
+    }, settings.LINK_PREVIEW_CACHE_TIMEOUT)
+    return preview
+
+
+def fetch_previews(urls):
+    """Параллельная загрузка превью: {url: preview или None}."""
+    urls = list(dict.fromkeys(urls))
+    return dict(zip(urls, get_executor().map(get_preview, urls)))
+
+
+# ===== Заполнение ArticleLink =====
+
+def apply_preview(link, preview):
+    """Перенос превью в поля ссылки (без сохранения)."""
+    link.title = preview['title']
+    if preview['description']:
+        link.description = preview['description']
+    if preview['image']:
+        link.preview_image = preview['image']
+
+
+def update_link(link_id):
+    """Загрузка превью и запись в ссылку, если заголовок всё ещё пуст."""
+    from .models import ArticleLink
+    from . import page_cache
+
+    try:
+        link = ArticleLink.objects.filter(pk=link_id, title='').first()
+        if link is None:
+            return
+        preview = get_preview(link.url)
+        if not preview or not preview['title']:
+            return
+
+        apply_preview(link, preview)
+        updated = ArticleLink.objects.filter(pk=link_id, title='').update(
+            title=link.title, description=link.description, preview_image=link.preview_image
+        )
+        if updated:
+            page_cache.invalidate(ArticleLink)
+    except Exception:
+        logger.exception(f'Ошибка обновления превью ссылки #{link_id}')
+    finally:
+        if settings.LINK_PREVIEW_ASYNC:
+            connections.close_all()
+
+
+def schedule_update(link_id):
+    """Загрузка превью после коммита: в фоновом потоке или сразу."""
+    def run():
+        if settings.LINK_PREVIEW_ASYNC:
+            get_executor().submit(update_link, link_id)
+        else:
+            update_link(link_id)
+    transaction.on_commit(run)
@@ -0,0 +1,141 @@
+"""
+Очередь уведомлений о сообщениях обратной связи.
+
+ContactsView только сохраняет ContactMessage (статус уведомления «Ожидает»)
+и сразу отвечает. Команда send_contact_mail забирает готовые сообщения
+по одному (аренда выдаётся на каждое письмо перед отправкой) и отправляет
+их через одно SMTP-соединение. Временные ошибки
+(обрыв соединения, коды 4xx) повторяются с экспоненциальной задержкой,
+после MAIL_QUEUE_MAX_ATTEMPTS попыток или ответа 5xx сообщение получает
+статус «Не доставлено» и видно в админке.
+"""
+import logging
+import smtplib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ContactMessage
+
+logger = logging.getLogger(__name__)
+
+
+class PermanentError(Exception):
+    """Сервер отклонил письмо, повтор не поможет."""
+
+
+def build_email(message, connection=None):
+    return EmailMessage(
+        subject=f'[deev.space] Новое сообщение: {message.subject}',
+        body=f'От: {message.name} ({message.email})\n\nТема: {message.subject}\n\n{message.message}',
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[settings.CONTACT_EMAIL],
+        reply_to=[message.email],
+        connection=connection,
+    )
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка перед следующей попыткой."""
+    delay = settings.MAIL_QUEUE_RETRY_BASE_DELAY * 2 ** max(attempts - 1, 0)
+    return min(delay, settings.MAIL_QUEUE_RETRY_MAX_DELAY)
+
+
+def claim_next(batch_size):
+    """Захват одного готового к отправке сообщения (см. main.outbox.claim_next)."""
+    now = timezone.now()
+    lease_until = now + timedelta(seconds=settings.MAIL_QUEUE_LEASE)
+    due = Q(
+        mail_status__in=[ContactMessage.MAIL_PENDING, ContactMessage.MAIL_SENDING],
+        mail_next_attempt_at__lte=now,
+    )
+
+    candidates = ContactMessage.objects.filter(due).order_by('mail_next_attempt_at')[:batch_size]
+    for message in candidates:
+        updated = ContactMessage.objects.filter(
+            due, pk=message.pk, mail_next_attempt_at=message.mail_next_attempt_at
+        ).update(
+            mail_status=ContactMessage.MAIL_SENDING, mail_next_attempt_at=lease_until,
+            mail_attempts=message.mail_attempts + 1,
+        )
+        if updated:
+            message.mail_attempts += 1
+            return message
+    return None
+
+
+def send(connection, message):
+    """
+    Отправка письма через общее соединение. Соединение открывается при
+    первом письме и закрывается после временной ошибки, чтобы следующее
+    письмо пошло через новое.
+    """
+    if connection.connection is None:
+        connection.open()
+    try:
+        build_email(message, connection).send()
+    except smtplib.SMTPResponseException as e:
+        if 500 <= e.smtp_code < 600:
+            raise PermanentError(f'SMTP {e.smtp_code}: {e.smtp_error!r}')
+        connection.close()
+        raise
+    except smtplib.SMTPRecipientsRefused as e:
+        codes = {code for code, _ in e.recipients.values()}
+        if all(500 <= code < 600 for code in codes):
+            raise PermanentError(f'Адресат отклонён: {e.recipients}')
+        connection.close()
+        raise
+    except (smtplib.SMTPException, OSError):
+        connection.close()
+        raise
+
+
+def deliver(connection, message):
+    """Отправка одного сообщения и запись результата. Возвращает новый статус."""
+    try:
+        send(connection, message)
+    except PermanentError as e:
+        logger.error(f'Уведомление о сообщении #{message.pk} отклонено: {e}')
+        ContactMessage.objects.filter(pk=message.pk).update(
+            mail_status=ContactMessage.MAIL_FAILED, mail_error=str(e)
+        )
+        return ContactMessage.MAIL_FAILED
+    except (smtplib.SMTPException, OSError) as e:
+        if message.mail_attempts >= settings.MAIL_QUEUE_MAX_ATTEMPTS:
+            status, next_attempt_at = ContactMessage.MAIL_FAILED, timezone.now()
+        else:
+            status = ContactMessage.MAIL_PENDING
+            next_attempt_at = timezone.now() + timedelta(seconds=retry_delay(message.mail_attempts))
+        logger.warning(f'Ошибка отправки уведомления #{message.pk} (попытка {message.mail_attempts}): {e}')
+        ContactMessage.objects.filter(pk=message.pk).update(
+            mail_status=status, mail_next_attempt_at=next_attempt_at, mail_error=str(e) or e.__class__.__name__
+        )
+        return status
+
+    ContactMessage.objects.filter(pk=message.pk).update(
+        mail_status=ContactMessage.MAIL_SENT, mail_sent_at=timezone.now(), mail_error=''
+    )
+    return ContactMessage.MAIL_SENT
+
+
+def drain(connection=None, batch_size=None):
+    """
+    Отправка всех готовых уведомлений через одно SMTP-соединение.
+    Возвращает счётчики по статусам.
+    """
+    batch_size = batch_size or settings.MAIL_QUEUE_BATCH_SIZE
+    own_connection = connection is None
+    connection = connection or get_connection(fail_silently=False)
+    stats = {ContactMessage.MAIL_SENT: 0, ContactMessage.MAIL_PENDING: 0, ContactMessage.MAIL_FAILED: 0}
+    try:
+        while True:
+            message = claim_next(batch_size)
+            if message is None:
+                return stats
+            stats[deliver(connection, message)] += 1
+    finally:
+        if own_connection:
+            connection.close()
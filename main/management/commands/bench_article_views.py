@@ -0,0 +1,58 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+
+from main.models import Article
+from main.view_counter import view_buffer
+
+BROWSER_USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+
+
+class Command(BaseCommand):
+    help = 'Замер запросов в секунду для страницы статьи с прямым и буферизованным счётчиком просмотров'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--slug', help='Slug статьи (по умолчанию — последняя опубликованная)')
+        parser.add_argument('--requests', type=int, default=500, help='Количество запросов на режим')
+        parser.add_argument('--threads', type=int, default=4, help='Количество параллельных клиентов')
+
+    def handle(self, *args, **options):
+        article = Article.objects.filter(is_published=True)
+        if options['slug']:
+            article = article.filter(slug=options['slug'])
+        article = article.first()
+        if article is None:
+            raise CommandError('Нет опубликованных статей для замера')
+
+        url = article.get_absolute_url()
+        for label, buffered in (('Прямая запись', False), ('Буфер', True)):
+            with override_settings(VIEW_COUNTER_BUFFERED=buffered):
+                rps = self._run(url, options['requests'], options['threads'])
+            view_buffer.flush()
+            self.stdout.write(f'{label}: {rps:.1f} запросов/с')
+
+    def _run(self, url, total, threads):
+        per_thread = max(1, total // threads)
+        errors = []
+
+        def worker():
+            client = Client(HTTP_USER_AGENT=BROWSER_USER_AGENT, HTTP_HOST='localhost')
+            for _ in range(per_thread):
+                response = client.get(url, secure=True)
+                if response.status_code != 200:
+                    errors.append(response.status_code)
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        if errors:
+            self.stderr.write(f'Ошибочных ответов: {len(errors)}')
+        return per_thread * threads / elapsed
@@ -0,0 +1,109 @@
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from main.sqlite import apply_pragmas
+
+READ_SQL = (
+    'SELECT id, title, slug, views, likes_count FROM main_article '
+    'WHERE is_published = 1 ORDER BY date DESC LIMIT 10'
+)
+WRITE_SQL = 'UPDATE main_article SET views = views + 1 WHERE id = ?'
+
+# Настройки SQLite по умолчанию: журнал отката, полная синхронизация
+DEFAULT_PRAGMAS = {'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+
+
+class Command(BaseCommand):
+    help = 'Пропускная способность чтения SQLite при параллельной записи: настройки по умолчанию и профиль WAL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4, help='Количество читающих потоков')
+        parser.add_argument('--writers', type=int, default=2, help='Количество пишущих потоков')
+        parser.add_argument('--duration', type=float, default=5.0, help='Длительность замера для профиля, с')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда предназначена только для SQLite')
+
+        source = str(settings.DATABASES['default']['NAME'])
+        with sqlite3.connect(source) as db:
+            article_ids = [row[0] for row in db.execute('SELECT id FROM main_article')]
+        if not article_ids:
+            raise CommandError('Нет статей для замера')
+
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            profiles = (('По умолчанию', DEFAULT_PRAGMAS), ('WAL-профиль', settings.SQLITE_PRAGMAS))
+            for index, (label, pragmas) in enumerate(profiles):
+                path = os.path.join(tmp_dir, f'bench-{index}.sqlite3')
+                self._copy(source, path, pragmas)
+                reads, writes, errors = self._run(path, pragmas, article_ids, options)
+                self.stdout.write(
+                    f'{label}: чтение {reads:.0f} запросов/с, запись {writes:.0f} запросов/с, '
+                    f'ошибок блокировки: {errors}'
+                )
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def _copy(self, source, path, pragmas):
+        """Копия рабочей базы, чтобы замер не менял данные и режим журнала."""
+        with sqlite3.connect(source) as src, sqlite3.connect(path) as dst:
+            src.backup(dst)
+        db = sqlite3.connect(path)
+        db.execute(f"PRAGMA journal_mode = {pragmas['journal_mode']}")
+        db.close()
+
+    def _connect(self, path, pragmas):
+        db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        apply_pragmas(db.cursor(), pragmas)
+        return db
+
+    def _run(self, path, pragmas, article_ids, options):
+        counts = {'reads': 0, 'writes': 0, 'errors': 0}
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def count(key):
+            with lock:
+                counts[key] += 1
+
+        def reader():
+            db = self._connect(path, pragmas)
+            while not stop.is_set():
+                try:
+                    db.execute(READ_SQL).fetchall()
+                    count('reads')
+                except sqlite3.OperationalError:
+                    count('errors')
+            db.close()
+
+        def writer():
+            db = self._connect(path, pragmas)
+            while not stop.is_set():
+                try:
+                    db.execute(WRITE_SQL, (random.choice(article_ids),))
+                    count('writes')
+                except sqlite3.OperationalError:
+                    count('errors')
+            db.close()
+
+        threads = [threading.Thread(target=reader) for _ in range(options['readers'])]
+        threads += [threading.Thread(target=writer) for _ in range(options['writers'])]
+        for thread in threads:
+            thread.start()
+        time.sleep(options['duration'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        duration = options['duration']
+        return counts['reads'] / duration, counts['writes'] / duration, counts['errors']
@@ -0,0 +1,41 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main import images
+from main.models import ImageVariants
+from main.signals import IMAGE_FIELDS
+
+
+class Command(BaseCommand):
+    help = 'Параллельное создание адаптивных копий для уже загруженных изображений'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Число процессов')
+        parser.add_argument('--force', action='store_true', help='Пересоздать копии для всех изображений')
+
+    def handle(self, *args, **options):
+        sources = set()
+        for model, field in IMAGE_FIELDS:
+            names = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+            sources.update(names.values_list(field, flat=True))
+
+        if not options['force']:
+            sources -= set(ImageVariants.objects.values_list('source', flat=True))
+        sources = sorted(s for s in sources if os.path.exists(os.path.join(settings.MEDIA_ROOT, s)))
+
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            futures = {pool.submit(images.render_variants, *images.render_args(s)): s for s in sources}
+            for future in as_completed(futures):
+                source = futures[future]
+                try:
+                    images.store_metadata(source, future.result())
+                    done += 1
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f'{source}: {e}')
+
+        self.stdout.write(self.style.SUCCESS(f'Обработано изображений: {done}, ошибок: {failed}'))
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from main import sitemaps
+
+
+class Command(BaseCommand):
+    help = 'Построение файлов карты сайта (все разделы или указанные)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('sections', nargs='*', help=f"Разделы: {', '.join(sitemaps.SECTIONS)}")
+
+    def handle(self, *args, **options):
+        unknown = set(options['sections']) - set(sitemaps.SECTIONS)
+        if unknown:
+            raise CommandError(f"Неизвестные разделы: {', '.join(sorted(unknown))}")
+
+        sitemaps.regenerate(*options['sections'])
+        state = sitemaps.load_state()
+        total = sum(page['count'] for pages in state.values() for page in pages)
+        self.stdout.write(self.style.SUCCESS(f'Карта сайта записана в {settings.SITEMAP_ROOT}: ссылок {total}'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from main import captcha
+
+
+class Command(BaseCommand):
+    help = 'Статистика проверок SmartCaptcha: ответы API, задержка, срабатывания предохранителя'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Обнулить счётчики после вывода')
+
+    def handle(self, *args, **options):
+        stats = captcha.get_stats()
+        self.stdout.write(
+            f"Запросов к API: {stats['requests']}, средняя задержка: {stats['avg_latency_ms']:.0f} мс\n"
+            f"Пройдено: {stats['ok']}, отклонено: {stats['rejected']}, из кеша: {stats['cached']}\n"
+            f"Таймауты: {stats['timeouts']}, ошибки: {stats['errors']}, "
+            f"пропущено без проверки: {stats['short_circuited']}\n"
+            f"Предохранитель: {'разомкнут' if stats['open'] else 'замкнут'}"
+        )
+        if options['reset']:
+            captcha.reset_stats()
+            self.stdout.write(self.style.SUCCESS('Счётчики обнулены'))
@@ -0,0 +1,110 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+SOURCE_ALIAS = 'sqlite_source'
+
+
+class Command(BaseCommand):
+    help = 'Перенос данных из файла SQLite в основную базу (PostgreSQL) пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='Путь к файлу db.sqlite3')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Размер пачки при чтении и вставке')
+        parser.add_argument(
+            '--noinput', '--no-input', action='store_false', dest='interactive',
+            help='Не спрашивать подтверждение перед очисткой таблиц в целевой базе'
+        )
+
+    def handle(self, *args, **options):
+        target = connections[DEFAULT_DB_ALIAS]
+        if target.vendor != 'postgresql':
+            raise CommandError('Основная база должна быть PostgreSQL (DB_ENGINE=postgresql)')
+
+        source = self._open_source(options['source'])
+        source_tables = set(source.introspection.table_names())
+        models = [
+            model for model in apps.get_models(include_auto_created=True)
+            if model._meta.managed and not model._meta.proxy and model._meta.db_table in source_tables
+        ]
+        target_tables = set(target.introspection.table_names())
+        missing = [model._meta.db_table for model in models if model._meta.db_table not in target_tables]
+        if missing:
+            raise CommandError(f"В целевой базе нет таблиц: {', '.join(missing)}. Сначала выполните migrate")
+
+        if options['interactive']:
+            answer = input(
+                f'Таблицы {len(models)} моделей в базе «{target.settings_dict["NAME"]}» будут очищены '
+                'и заполнены данными из SQLite. Продолжить? [yes/no]: '
+            )
+            if answer != 'yes':
+                raise CommandError('Перенос отменён')
+
+        tables = [model._meta.db_table for model in models]
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            # Внешние ключи Django в PostgreSQL — DEFERRABLE INITIALLY DEFERRED,
+            # поэтому порядок моделей не важен: ссылки проверяются при COMMIT
+            with target.cursor() as cursor:
+                for sql in target.ops.sql_flush(no_style(), tables, allow_cascade=True):
+                    cursor.execute(sql)
+
+            for model in models:
+                copied = self._copy_model(model, options['batch_size'])
+                if copied:
+                    self.stdout.write(f'{model._meta.label}: {copied}')
+
+            with target.cursor() as cursor:
+                for sql in target.ops.sequence_reset_sql(no_style(), models):
+                    cursor.execute(sql)
+
+        source.close()
+        self.stdout.write(self.style.SUCCESS(f'Перенесено таблиц: {len(models)}'))
+
+    def _open_source(self, path):
+        """Подключение к файлу SQLite как к дополнительной базе Django."""
+        settings_dict = connections.configure_settings({
+            DEFAULT_DB_ALIAS: connections.settings[DEFAULT_DB_ALIAS],
+            SOURCE_ALIAS: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': path},
+        })[SOURCE_ALIAS]
+        connections.settings[SOURCE_ALIAS] = settings_dict
+        source = connections[SOURCE_ALIAS]
+        try:
+            source.ensure_connection()
+            source.introspection.table_names()
+        except Exception as e:
+            raise CommandError(f'Не удалось открыть {path}: {e}')
+        return source
+
+    def _copy_model(self, model, batch_size):
+        """
+        Потоковое чтение таблицы из SQLite и вставка пачками.
+
+        Строки вставляются напрямую, а не через bulk_create: тот вызывает
+        pre_save и перезаписал бы поля auto_now/auto_now_add текущим временем.
+        Сигналы моделей при переносе тоже не нужны.
+        """
+        target = connections[DEFAULT_DB_ALIAS]
+        quote = target.ops.quote_name
+        fields = model._meta.concrete_fields
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote(model._meta.db_table),
+            ', '.join(quote(field.column) for field in fields),
+            ', '.join(['%s'] * len(fields)),
+        )
+
+        rows = model._base_manager.using(SOURCE_ALIAS).order_by('pk').iterator(chunk_size=batch_size)
+        batch, total = [], 0
+        with target.cursor() as cursor:
+            for obj in rows:
+                batch.append(tuple(
+                    field.get_db_prep_save(getattr(obj, field.attname), connection=target) for field in fields
+                ))
+                if len(batch) >= batch_size:
+                    cursor.executemany(sql, batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                cursor.executemany(sql, batch)
+                total += len(batch)
+        return total
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from main.outbox import create_session, drain
+
+
+class Command(BaseCommand):
+    help = 'Отправка публикаций статей из outbox в Telegram и VK'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Разобрать очередь один раз и выйти')
+        parser.add_argument('--interval', type=float, default=5.0, help='Пауза между проверками очереди, с')
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        session = create_session()
+        try:
+            while True:
+                close_old_connections()
+                stats = drain(session, options['batch_size'])
+                if any(stats.values()):
+                    self.stdout.write(
+                        f"Отправлено: {stats['sent']}, отложено: {stats['pending']}, ошибок: {stats['failed']}, "
+                        f"с неизвестным результатом: {stats['unknown']}"
+                    )
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            session.close()
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from main import page_cache
+from main.link_preview import apply_preview, fetch_previews
+from main.models import ArticleLink
+
+
+class Command(BaseCommand):
+    help = 'Параллельная загрузка превью для ссылок статей без заголовка'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Обновить превью всех ссылок (неизменившиеся страницы проверяются по ETag)'
+        )
+
+    def handle(self, *args, **options):
+        links = ArticleLink.objects.all() if options['all'] else ArticleLink.objects.filter(title='')
+        links = list(links)
+        previews = fetch_previews(link.url for link in links)
+
+        updated = []
+        for link in links:
+            preview = previews.get(link.url)
+            if preview and preview['title']:
+                apply_preview(link, preview)
+                updated.append(link)
+        ArticleLink.objects.bulk_update(updated, ['title', 'description', 'preview_image'])
+        if updated:
+            page_cache.invalidate(ArticleLink)
+
+        self.stdout.write(self.style.SUCCESS(f'Обновлено превью: {len(updated)} из {len(links)}'))
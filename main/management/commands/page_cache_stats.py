@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from main import page_cache
+
+
+class Command(BaseCommand):
+    help = 'Статистика попаданий в кеш страниц для анонимных посетителей'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Обнулить счётчики после вывода')
+
+    def handle(self, *args, **options):
+        stats = page_cache.get_stats()
+        self.stdout.write(
+            f"Попадания: {stats['hits']}, промахи: {stats['misses']}, доля попаданий: {stats['ratio']:.1%}"
+        )
+        if options['reset']:
+            page_cache.reset_stats()
+            self.stdout.write(self.style.SUCCESS('Счётчики обнулены'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from main.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт денормализованных счётчиков лайков, дизлайков и комментариев'
+
+    def handle(self, *args, **options):
+        articles, comments = rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f'Счётчики пересчитаны: статей — {articles}, комментариев — {comments}'
+        ))
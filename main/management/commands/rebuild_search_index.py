@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from main import search
+
+
+class Command(BaseCommand):
+    help = 'Пересоздание полнотекстового индекса статей (SQLite FTS5)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Размер пачки при вставке')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Полнотекстовый индекс FTS5 доступен только для SQLite')
+
+        total = search.rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Проиндексировано статей: {total}'))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from main import highlight, page_cache
+from main.models import Article, RENDERED_FIELDS
+
+
+class Command(BaseCommand):
+    help = 'Повторная подсветка кода во всех статьях и обновление static/css/code.css'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--no-cache', action='store_true',
+            help='Подсветить все блоки заново, не используя кеш (например, после обновления Pygments)'
+        )
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        path = highlight.write_style_css()
+        self.stdout.write(f'CSS темы записан в {path}')
+
+        use_cache = not options['no_cache']
+        batch, total = [], 0
+        for article in Article.objects.only('pk', 'post').iterator(chunk_size=options['batch_size']):
+            article.render(use_cache=use_cache)
+            batch.append(article)
+            if len(batch) >= options['batch_size']:
+                total += Article.objects.bulk_update(batch, RENDERED_FIELDS)
+                batch = []
+        if batch:
+            total += Article.objects.bulk_update(batch, RENDERED_FIELDS)
+
+        page_cache.invalidate(Article)
+        self.stdout.write(self.style.SUCCESS(f'Статей обработано: {total}'))
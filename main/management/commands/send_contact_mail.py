@@ -0,0 +1,36 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from main.mail_queue import drain
+
+
+class Command(BaseCommand):
+    help = 'Отправка уведомлений о сообщениях обратной связи из очереди'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Разобрать очередь один раз и выйти')
+        parser.add_argument('--interval', type=float, default=5.0, help='Пауза между проверками очереди, с')
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        connection = get_connection(fail_silently=False)
+        try:
+            while True:
+                close_old_connections()
+                stats = drain(connection, options['batch_size'])
+                # Между проверками очереди соединение с SMTP не держим
+                connection.close()
+                if any(stats.values()):
+                    self.stdout.write(
+                        f"Отправлено: {stats['sent']}, отложено: {stats['pending']}, ошибок: {stats['failed']}"
+                    )
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connection.close()
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+
+from main.sqlite import maintain
+
+
+class Command(BaseCommand):
+    help = 'Обслуживание базы SQLite: ANALYZE, PRAGMA optimize, incremental vacuum и checkpoint WAL'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Повторять каждые N секунд (по умолчанию — один раз, например из cron)'
+        )
+        parser.add_argument('--pages', type=int, default=None, help='Не больше N страниц за incremental vacuum')
+        parser.add_argument(
+            '--full-vacuum', action='store_true',
+            help='Включить auto_vacuum=INCREMENTAL полным VACUUM (блокирует базу)'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда предназначена только для SQLite')
+
+        try:
+            while True:
+                close_old_connections()
+                started = time.perf_counter()
+                report = maintain(connection, options['pages'], options['full_vacuum'])
+                elapsed = time.perf_counter() - started
+
+                freed = report['freed_pages']
+                vacuum = 'auto_vacuum не INCREMENTAL, см. --full-vacuum' if freed is None else f'освобождено страниц: {freed}'
+                self.stdout.write(f'Обслуживание за {elapsed:.2f} с; {vacuum}')
+
+                if not options['interval']:
+                    break
+                # Полный VACUUM нужен только при первом запуске
+                options['full_vacuum'] = False
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,184 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from .db_router import PIN_COOKIE
+from .storage import ENCODINGS
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+BLOCK_SIZE = 64 * 1024
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding с ненулевым q."""
+    accepted = set()
+    for part in header.split(','):
+        encoding, _, params = part.strip().partition(';')
+        q = params.strip()
+        if q.startswith('q='):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(encoding.strip().lower())
+    return accepted
+
+
+def parse_range(header, size):
+    """
+    (начало, конец) для заголовка Range с одним диапазоном байтов.
+
+    None — заголовок не поддерживается и файл отдаётся целиком;
+    ValueError — диапазон за пределами файла (416).
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if not start:
+        # bytes=-N — последние N байт
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start, end = int(start), min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError
+    return start, end
+
+
+def read_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(BLOCK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+class StaticFilesMiddleware:
+    """
+    Отдача собранной статики из STATIC_ROOT без nginx.
+
+    - выбирает сжатую копию (.br, .gz) по Accept-Encoding;
+    - файлам с хешем из манифеста отдаёт Cache-Control: immutable;
+    - поддерживает условные запросы и Range (диапазоны отдаются без сжатия).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = settings.STATIC_SERVE
+        self.immutable = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+    def __call__(self, request):
+        if self.enabled and request.method in ('GET', 'HEAD') and request.path.startswith(settings.STATIC_URL):
+            response = self.serve(request, request.path[len(settings.STATIC_URL):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        range_header = request.META.get('HTTP_RANGE')
+        encoding, served_path = None, path
+        if not range_header:
+            accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+            for candidate, suffix in ENCODINGS.items():
+                if candidate in accepted and os.path.isfile(path + suffix):
+                    encoding, served_path = candidate, path + suffix
+                    break
+
+        stat = os.stat(served_path)
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        headers = HttpResponse()
+        headers['ETag'] = etag
+        headers['Last-Modified'] = http_date(stat.st_mtime)
+        headers['Accept-Ranges'] = 'bytes'
+        headers['Cache-Control'] = (
+            IMMUTABLE_CACHE_CONTROL if name in self.immutable else f'public, max-age={settings.STATIC_MAX_AGE}'
+        )
+        if any(os.path.isfile(path + suffix) for suffix in ENCODINGS.values()):
+            patch_vary_headers(headers, ('Accept-Encoding',))
+
+        conditional = get_conditional_response(
+            request, etag=etag, last_modified=int(stat.st_mtime), response=headers
+        )
+        if conditional is not headers:
+            return conditional
+
+        if range_header and self.range_applies(request, etag):
+            try:
+                byte_range = parse_range(range_header, stat.st_size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{stat.st_size}'
+                return response
+            if byte_range is not None:
+                start, end = byte_range
+                response = StreamingHttpResponse(
+                    read_range(served_path, start, end - start + 1), status=206, content_type=content_type
+                )
+                response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+                response['Content-Length'] = end - start + 1
+                return self.copy_headers(headers, response)
+
+        response = FileResponse(open(served_path, 'rb'), content_type=content_type)
+        # FileResponse подставляет имя файла (в т.ч. .br/.gz), для статики оно не нужно
+        response.headers.pop('Content-Disposition', None)
+        if encoding:
+            response['Content-Encoding'] = encoding
+        return self.copy_headers(headers, response)
+
+    @staticmethod
+    def range_applies(request, etag):
+        """If-Range: диапазон отдаётся, только если файл не изменился."""
+        if_range = request.META.get('HTTP_IF_RANGE')
+        return not if_range or if_range.strip() == etag
+
+    @staticmethod
+    def copy_headers(source, response):
+        for header, value in source.items():
+            if header != 'Content-Type':
+                response[header] = value
+        return response
+
+
+class ReplicaPinMiddleware:
+    """
+    После изменяющего запроса (POST и т.п.) ставит короткоживущую cookie,
+    по которой ReplicaReadMixin читает с основной базы, а не с отстающей
+    реплики (main.db_router).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            settings.REPLICA_DB_ALIAS is not None
+            and request.method not in ('GET', 'HEAD', 'OPTIONS')
+            and response.status_code < 400
+        ):
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                secure=request.is_secure(), httponly=True, samesite='Lax',
+            )
+        return response
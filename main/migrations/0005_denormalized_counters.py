@@ -0,0 +1,63 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def _count_subquery(model, outer_field, **filters):
+    counts = model.objects.filter(**{outer_field: OuterRef('pk')}, **filters).order_by().values(
+        outer_field
+    ).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counts), Value(0))
+
+
+def fill_counters(apps, schema_editor):
+    Article = apps.get_model('main', 'Article')
+    ArticleLike = apps.get_model('main', 'ArticleLike')
+    Comment = apps.get_model('main', 'Comment')
+    CommentLike = apps.get_model('main', 'CommentLike')
+
+    Article.objects.update(
+        likes_count=_count_subquery(ArticleLike, 'article', is_like=True),
+        dislikes_count=_count_subquery(ArticleLike, 'article', is_like=False),
+        comments_count=_count_subquery(Comment, 'article', is_approved=True),
+    )
+    Comment.objects.update(
+        likes_count=_count_subquery(CommentLike, 'comment', is_like=True),
+        dislikes_count=_count_subquery(CommentLike, 'comment', is_like=False),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0004_alter_article_img_alter_project_technologies'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Комментарии'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='dislikes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Дизлайки'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Лайки'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='dislikes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Дизлайки'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Лайки'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+from django.db import migrations
+from django.utils.html import strip_tags
+
+CREATE_TABLE_SQL = (
+    'CREATE VIRTUAL TABLE IF NOT EXISTS main_article_fts USING fts5('
+    "title, excerpt, body, tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')"
+)
+
+
+def _normalize(text):
+    return text.replace('ё', 'е').replace('Ё', 'Е')
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+
+    Article = apps.get_model('main', 'Article')
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_TABLE_SQL)
+        cursor.executemany(
+            'INSERT INTO main_article_fts (rowid, title, excerpt, body) VALUES (%s, %s, %s, %s)',
+            [
+                (a.pk, _normalize(a.title), _normalize(a.excerpt or ''), _normalize(strip_tags(a.post or '')))
+                for a in Article.objects.all()
+            ]
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS main_article_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0005_denormalized_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
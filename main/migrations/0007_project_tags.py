@@ -0,0 +1,75 @@
+from django.db import migrations, models
+
+
+def _split(value):
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+
+def _resolve(model, names, registry):
+    tags = []
+    for name in names:
+        key = name.lower()
+        if key not in registry:
+            registry[key] = model.objects.get_or_create(key=key, defaults={'name': name})[0]
+        tags.append(registry[key])
+    return tags
+
+
+def backfill_tags(apps, schema_editor):
+    Project = apps.get_model('main', 'Project')
+    Language = apps.get_model('main', 'Language')
+    Technology = apps.get_model('main', 'Technology')
+
+    languages, technologies = {}, {}
+    for project in Project.objects.all():
+        project.language_tags.set(_resolve(Language, _split(project.programming_languages), languages))
+        project.technology_tags.set(_resolve(Technology, _split(project.technologies), technologies))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0006_article_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Language',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Название')),
+                ('key', models.CharField(max_length=100, unique=True, verbose_name='Ключ для фильтрации')),
+            ],
+            options={
+                'verbose_name': 'Язык программирования',
+                'verbose_name_plural': 'Языки программирования',
+                'ordering': ['name'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Technology',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Название')),
+                ('key', models.CharField(max_length=100, unique=True, verbose_name='Ключ для фильтрации')),
+            ],
+            options={
+                'verbose_name': 'Технология',
+                'verbose_name_plural': 'Технологии',
+                'ordering': ['name'],
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='language_tags',
+            field=models.ManyToManyField(blank=True, related_name='projects', to='main.language', verbose_name='Теги языков'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='technology_tags',
+            field=models.ManyToManyField(blank=True, related_name='projects', to='main.technology', verbose_name='Теги технологий'),
+        ),
+        migrations.RunPython(backfill_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_outbox_message'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageVariants',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255, unique=True, verbose_name='Исходный файл')),
+                ('width', models.PositiveIntegerField(verbose_name='Ширина')),
+                ('height', models.PositiveIntegerField(verbose_name='Высота')),
+                ('placeholder', models.TextField(blank=True, verbose_name='Заглушка (data URI)')),
+                ('variants', models.JSONField(default=list, verbose_name='Копии')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+            ],
+            options={
+                'verbose_name': 'Копии изображения',
+                'verbose_name_plural': 'Копии изображений',
+            },
+        ),
+    ]
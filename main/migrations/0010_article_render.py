@@ -0,0 +1,89 @@
+import math
+import re
+
+from bs4 import BeautifulSoup
+from django.db import migrations, models
+
+# Копия main.article_render на момент миграции: она не должна зависеть от
+# текущего кода приложения. Подсветку кода в уже перенесённых статьях
+# добавляет команда rehighlight_articles.
+WORDS_PER_MINUTE = 200
+TOC_LEVELS = ('h2', 'h3')
+HEADER_ID_RE = re.compile(r'[^a-zа-яё0-9]+')
+ANCHOR_HTML = (
+    '<a class="header-anchor" href="#{id}" aria-label="Ссылка на раздел"><i class="fas fa-link"></i></a>'
+)
+COPY_BUTTON_HTML = (
+    '<button type="button" class="code-copy-btn" aria-label="Копировать код">'
+    '<i class="fas fa-copy"></i><span class="copy-text">Копировать</span></button>'
+)
+
+
+def render_article(html):
+    soup = BeautifulSoup(html or '', 'html.parser')
+    word_count = len(soup.get_text(' ').split())
+
+    toc = []
+    used = set()
+    for header in soup.find_all(TOC_LEVELS):
+        title = header.get_text(' ', strip=True)
+        base = header.get('id') or HEADER_ID_RE.sub('-', title.lower()).strip('-') or 'section'
+        anchor_id, counter = base, 2
+        while anchor_id in used:
+            anchor_id = f'{base}-{counter}'
+            counter += 1
+        used.add(anchor_id)
+        header['id'] = anchor_id
+        header.append(BeautifulSoup(ANCHOR_HTML.format(id=anchor_id), 'html.parser'))
+        toc.append({'level': int(header.name[1]), 'id': anchor_id, 'title': title})
+
+    for pre in soup.find_all('pre'):
+        if pre.code is not None and pre.find(class_='code-copy-btn') is None:
+            pre.append(BeautifulSoup(COPY_BUTTON_HTML, 'html.parser'))
+
+    return {
+        'post_html': str(soup),
+        'toc': toc,
+        'word_count': word_count,
+        'reading_time': max(1, math.ceil(word_count / WORDS_PER_MINUTE)),
+    }
+
+
+def render_articles(apps, schema_editor):
+    Article = apps.get_model('main', 'Article')
+    articles = list(Article.objects.only('pk', 'post'))
+    for article in articles:
+        for field, value in render_article(article.post).items():
+            setattr(article, field, value)
+    Article.objects.bulk_update(articles, ['post_html', 'toc', 'word_count', 'reading_time'], batch_size=100)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0009_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='post_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Обработанный текст'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='reading_time',
+            field=models.PositiveIntegerField(default=1, editable=False, verbose_name='Время чтения, мин'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='toc',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='Оглавление'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число слов'),
+        ),
+        migrations.RunPython(render_articles, migrations.RunPython.noop),
+    ]
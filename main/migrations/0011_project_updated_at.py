@@ -0,0 +1,25 @@
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def copy_date(apps, schema_editor):
+    Project = apps.get_model('main', 'Project')
+    Project.objects.update(updated_at=F('date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0010_article_render'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Дата обновления'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_date, migrations.RunPython.noop),
+    ]
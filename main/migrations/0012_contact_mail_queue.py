@@ -0,0 +1,47 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0011_project_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contactmessage',
+            name='mail_attempts',
+            field=models.PositiveIntegerField(default=0, verbose_name='Попыток отправки'),
+        ),
+        migrations.AddField(
+            model_name='contactmessage',
+            name='mail_error',
+            field=models.TextField(blank=True, verbose_name='Ошибка отправки'),
+        ),
+        migrations.AddField(
+            model_name='contactmessage',
+            name='mail_next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Следующая попытка'),
+        ),
+        migrations.AddField(
+            model_name='contactmessage',
+            name='mail_sent_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Уведомление отправлено'),
+        ),
+        # Старые сообщения уже отправлялись из ContactsView, воркер не должен слать их повторно
+        migrations.AddField(
+            model_name='contactmessage',
+            name='mail_status',
+            field=models.CharField(choices=[('pending', 'Ожидает'), ('sending', 'Отправляется'), ('sent', 'Отправлено'), ('failed', 'Не доставлено')], default='sent', max_length=20, verbose_name='Уведомление'),
+        ),
+        migrations.AlterField(
+            model_name='contactmessage',
+            name='mail_status',
+            field=models.CharField(choices=[('pending', 'Ожидает'), ('sending', 'Отправляется'), ('sent', 'Отправлено'), ('failed', 'Не доставлено')], default='pending', max_length=20, verbose_name='Уведомление'),
+        ),
+        migrations.AddIndex(
+            model_name='contactmessage',
+            index=models.Index(fields=['mail_status', 'mail_next_attempt_at'], name='contact_mail_due_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0012_contact_mail_queue'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('is_achievement', False), ('is_published', True)), fields=['-date'], name='article_published_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('is_achievement', False), ('is_published', True)), fields=['category', '-date'], name='article_category_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('is_achievement', True), ('is_published', True)), fields=['-achievement_date', '-date'], name='article_achievement_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='articlelike',
+            index=models.Index(fields=['article', 'is_like'], name='articlelike_article_vote_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('is_approved', True)), fields=['article', 'created_at'], name='comment_article_tree_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commentlike',
+            index=models.Index(fields=['comment', 'is_like'], name='commentlike_comment_vote_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('is_visible', True), ('show_on_homepage', True)), fields=['homepage_order', 'order', '-date'], name='project_homepage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('is_visible', True)), fields=['order', '-date'], name='project_visible_order_idx'),
+        ),
+    ]
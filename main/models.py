@@ -1,12 +1,17 @@
-from django.db import models
+from django.db import models, transaction
+from django.conf import settings
+from django.core.cache import caches
 from django.contrib.auth.models import AbstractUser
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.text import slugify
 from unidecode import unidecode
-import requests
-from bs4 import BeautifulSoup
+import uuid
 from urllib.parse import urlparse
 
+from . import link_preview
+from .article_render import render_article
+
 
 class CustomUser(AbstractUser):
     """Расширенная модель пользователя с упрощённой регистрацией."""
@@ -55,6 +60,10 @@ class Category(models.Model):
         return self.articles.filter(is_published=True).count()
 
 
+# Поля Article, которые заполняет render()
+RENDERED_FIELDS = ('post_html', 'toc', 'word_count', 'reading_time')
+
+
 class Article(models.Model):
     """Модель статей блога и достижений."""
 
@@ -98,10 +107,40 @@ class Article(models.Model):
     )
     achievement_date = models.DateField(blank=True, null=True, verbose_name='Дата достижения')
 
+    # Денормализованные счётчики, поддерживаются сигналами и main.counters
+    likes_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='Лайки')
+    dislikes_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='Дизлайки')
+    comments_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='Комментарии')
+
+    # Результат main.article_render, пересчитывается при сохранении текста
+    post_html = models.TextField(blank=True, editable=False, verbose_name='Обработанный текст')
+    toc = models.JSONField(default=list, blank=True, editable=False, verbose_name='Оглавление')
+    word_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='Число слов')
+    reading_time = models.PositiveIntegerField(default=1, editable=False, verbose_name='Время чтения, мин')
+
     class Meta:
         verbose_name = 'Статья'
         verbose_name_plural = 'Статьи'
         ordering = ['-date']
+        # Частичные индексы: фильтры по флагам SQLite сравнивает не как
+        # column = 1, а как само поле, и обычный индекс по ним не работает
+        indexes = [
+            # Блог, главная, ленты
+            models.Index(
+                fields=['-date'], condition=models.Q(is_published=True, is_achievement=False),
+                name='article_published_date_idx'
+            ),
+            # Категория блога и связанные статьи
+            models.Index(
+                fields=['category', '-date'], condition=models.Q(is_published=True, is_achievement=False),
+                name='article_category_date_idx'
+            ),
+            # Страница достижений
+            models.Index(
+                fields=['-achievement_date', '-date'], condition=models.Q(is_published=True, is_achievement=True),
+                name='article_achievement_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -117,23 +156,21 @@ class Article(models.Model):
             self.slug = slug
         if not self.excerpt and self.post:
             self.excerpt = self.post[:300] + '...' if len(self.post) > 300 else self.post
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'post' in update_fields:
+            self.render()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *RENDERED_FIELDS}
         super().save(*args, **kwargs)
 
+    def render(self, use_cache=True):
+        """Пересчёт обработанного HTML, оглавления и времени чтения."""
+        for field, value in render_article(self.post, use_cache).items():
+            setattr(self, field, value)
+
     def get_absolute_url(self):
         return reverse('article_detail', kwargs={'slug': self.slug})
 
-    @property
-    def likes_count(self):
-        return self.likes.filter(is_like=True).count()
-
-    @property
-    def dislikes_count(self):
-        return self.likes.filter(is_like=False).count()
-
-    @property
-    def comments_count(self):
-        return self.comments.filter(is_approved=True).count()
-
 
 class ArticleImage(models.Model):
     """Изображения для статьи (галерея)."""
@@ -234,41 +271,16 @@ class ArticleLink(models.Model):
         return parsed.netloc
 
     def fetch_preview(self):
-        """Автоматическое получение метаданных ссылки."""
-        try:
-            headers = {'User-Agent': 'Mozilla/5.0 (compatible; ArticleBot/1.0)'}
-            response = requests.get(self.url, headers=headers, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            # Получаем заголовок
-            og_title = soup.find('meta', property='og:title')
-            if og_title:
-                self.title = og_title.get('content', '')[:255]
-            elif soup.title:
-                self.title = soup.title.string[:255] if soup.title.string else ''
-
-            # Получаем описание
-            og_desc = soup.find('meta', property='og:description')
-            if og_desc:
-                self.description = og_desc.get('content', '')
-            else:
-                meta_desc = soup.find('meta', attrs={'name': 'description'})
-                if meta_desc:
-                    self.description = meta_desc.get('content', '')
-
-            # Получаем изображение
-            og_image = soup.find('meta', property='og:image')
-            if og_image:
-                self.preview_image = og_image.get('content', '')
-
-        except Exception:
-            pass
+        """Получение метаданных ссылки (через кеш превью)."""
+        preview = link_preview.get_preview(self.url)
+        if preview:
+            link_preview.apply_preview(self, preview)
 
     def save(self, *args, **kwargs):
-        if not self.title:
-            self.fetch_preview()
         super().save(*args, **kwargs)
+        if not self.title and self.url:
+            # Превью загружается в фоне, сохранение в админке не ждёт сеть
+            link_preview.schedule_update(self.pk)
 
 
 class ProjectStatus(models.Model):
@@ -297,6 +309,59 @@ class ProjectStatus(models.Model):
         super().save(*args, **kwargs)
 
 
+class ProjectTag(models.Model):
+    """Базовая модель тега проекта (язык или технология)."""
+    name = models.CharField(max_length=100, verbose_name='Название')
+    key = models.CharField(max_length=100, unique=True, verbose_name='Ключ для фильтрации')
+
+    class Meta:
+        abstract = True
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+    @staticmethod
+    def make_key(name):
+        return name.strip().lower()
+
+    def save(self, *args, **kwargs):
+        self.key = self.make_key(self.name)
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def resolve(cls, names):
+        """Теги по списку названий, недостающие создаются одним запросом."""
+        by_key = {}
+        for name in names:
+            by_key.setdefault(cls.make_key(name), name.strip())
+        if not by_key:
+            return []
+
+        existing = {tag.key: tag for tag in cls.objects.filter(key__in=by_key)}
+        missing = [cls(name=name, key=key) for key, name in by_key.items() if key not in existing]
+        if missing:
+            cls.objects.bulk_create(missing, ignore_conflicts=True)
+            existing = {tag.key: tag for tag in cls.objects.filter(key__in=by_key)}
+        return [existing[key] for key in by_key if key in existing]
+
+
+class Language(ProjectTag):
+    """Язык программирования проекта."""
+
+    class Meta(ProjectTag.Meta):
+        verbose_name = 'Язык программирования'
+        verbose_name_plural = 'Языки программирования'
+
+
+class Technology(ProjectTag):
+    """Технология проекта."""
+
+    class Meta(ProjectTag.Meta):
+        verbose_name = 'Технология'
+        verbose_name_plural = 'Технологии'
+
+
 class Project(models.Model):
     """Модель проектов портфолио."""
     SIZE_CHOICES = [
@@ -326,6 +391,14 @@ class Project(models.Model):
         help_text='Например: Django, React, PostgreSQL'
     )
 
+    # Нормализованные теги, синхронизируются из полей выше при сохранении
+    language_tags = models.ManyToManyField(
+        Language, blank=True, related_name='projects', verbose_name='Теги языков'
+    )
+    technology_tags = models.ManyToManyField(
+        Technology, blank=True, related_name='projects', verbose_name='Теги технологий'
+    )
+
     github_url = models.URLField(blank=True, verbose_name='GitHub')
     demo_url = models.URLField(blank=True, verbose_name='Демо/Ссылка')
 
@@ -340,6 +413,7 @@ class Project(models.Model):
     users_count = models.CharField(max_length=50, blank=True, verbose_name='Количество пользователей')
     author = models.CharField(max_length=100, default='Егор Деев', verbose_name='Автор')
     date = models.DateTimeField(auto_now_add=True, verbose_name='Дата добавления')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата обновления')
     order = models.PositiveIntegerField(default=0, verbose_name='Порядок отображения')
     is_visible = models.BooleanField(default=True, verbose_name='Отображать')
 
@@ -351,6 +425,17 @@ class Project(models.Model):
         verbose_name = 'Проект'
         verbose_name_plural = 'Проекты'
         ordering = ['order', '-date']
+        indexes = [
+            # Проекты на главной
+            models.Index(
+                fields=['homepage_order', 'order', '-date'],
+                condition=models.Q(is_visible=True, show_on_homepage=True), name='project_homepage_idx'
+            ),
+            # Страница проектов
+            models.Index(
+                fields=['order', '-date'], condition=models.Q(is_visible=True), name='project_visible_order_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -359,6 +444,14 @@ class Project(models.Model):
         if not self.slug:
             self.slug = slugify(unidecode(self.title))
         super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'programming_languages', 'technologies'} & set(update_fields):
+            self.sync_tags()
+
+    def sync_tags(self):
+        """Синхронизация тегов с полями языков и технологий."""
+        self.language_tags.set(Language.resolve(self.get_languages_list()))
+        self.technology_tags.set(Technology.resolve(self.get_technologies_list()))
 
     def get_technologies_list(self):
         return [tech.strip() for tech in self.technologies.split(',') if tech.strip()]
@@ -503,22 +596,29 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата обновления')
     is_approved = models.BooleanField(default=True, verbose_name='Одобрен')
+    likes_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='Лайки')
+    dislikes_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='Дизлайки')
 
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ['created_at']
+        indexes = [
+            # Ветка комментариев статьи (main.comment_tree) и пересчёт счётчика
+            models.Index(
+                fields=['article', 'created_at'], condition=models.Q(is_approved=True), name='comment_article_tree_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.user.username}: {self.content[:50]}...'
 
-    @property
-    def likes_count(self):
-        return self.comment_likes.filter(is_like=True).count()
-
-    @property
-    def dislikes_count(self):
-        return self.comment_likes.filter(is_like=False).count()
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Исходное состояние нужно сигналам для корректировки счётчиков
+        instance._loaded_is_approved = instance.is_approved if 'is_approved' in field_names else None
+        return instance
 
     @property
     def nesting_level(self):
@@ -545,6 +645,16 @@ class ArticleLike(models.Model):
         verbose_name = 'Оценка статьи'
         verbose_name_plural = 'Оценки статей'
         unique_together = ['article', 'user']
+        indexes = [
+            # Пересчёт лайков и дизлайков (main.counters.rebuild_counters)
+            models.Index(fields=['article', 'is_like'], name='articlelike_article_vote_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_is_like = instance.is_like if 'is_like' in field_names else None
+        return instance
 
 
 class CommentLike(models.Model):
@@ -562,10 +672,30 @@ class CommentLike(models.Model):
         verbose_name = 'Оценка комментария'
         verbose_name_plural = 'Оценки комментариев'
         unique_together = ['comment', 'user']
+        indexes = [
+            models.Index(fields=['comment', 'is_like'], name='commentlike_comment_vote_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_is_like = instance.is_like if 'is_like' in field_names else None
+        return instance
 
 
 class ContactMessage(models.Model):
     """Модель сообщений обратной связи."""
+    MAIL_PENDING = 'pending'
+    MAIL_SENDING = 'sending'
+    MAIL_SENT = 'sent'
+    MAIL_FAILED = 'failed'
+    MAIL_STATUS_CHOICES = [
+        (MAIL_PENDING, 'Ожидает'),
+        (MAIL_SENDING, 'Отправляется'),
+        (MAIL_SENT, 'Отправлено'),
+        (MAIL_FAILED, 'Не доставлено'),
+    ]
+
     name = models.CharField(max_length=100, verbose_name='Имя')
     email = models.EmailField(verbose_name='Email')
     subject = models.CharField(max_length=200, verbose_name='Тема')
@@ -575,15 +705,99 @@ class ContactMessage(models.Model):
     is_replied = models.BooleanField(default=False, verbose_name='Отвечено')
     admin_notes = models.TextField(blank=True, verbose_name='Заметки администратора')
 
+    # Уведомление на CONTACT_EMAIL, отправляемое воркером send_contact_mail (main.mail_queue)
+    mail_status = models.CharField(
+        max_length=20, choices=MAIL_STATUS_CHOICES, default=MAIL_PENDING, verbose_name='Уведомление'
+    )
+    mail_attempts = models.PositiveIntegerField(default=0, verbose_name='Попыток отправки')
+    mail_next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name='Следующая попытка')
+    mail_error = models.TextField(blank=True, verbose_name='Ошибка отправки')
+    mail_sent_at = models.DateTimeField(null=True, blank=True, verbose_name='Уведомление отправлено')
+
     class Meta:
         verbose_name = 'Сообщение'
         verbose_name_plural = 'Сообщения'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['mail_status', 'mail_next_attempt_at'], name='contact_mail_due_idx'),
+        ]
 
     def __str__(self):
         return f'{self.name}: {self.subject}'
 
 
+class OutboxMessage(models.Model):
+    """Исходящая публикация в соцсеть, отправляемая фоновым воркером."""
+    CHANNEL_TELEGRAM = 'telegram'
+    CHANNEL_VK = 'vk'
+    CHANNEL_CHOICES = [
+        (CHANNEL_TELEGRAM, 'Telegram'),
+        (CHANNEL_VK, 'VK'),
+    ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_UNKNOWN = 'unknown'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Ожидает'),
+        (STATUS_SENDING, 'Отправляется'),
+        (STATUS_SENT, 'Отправлено'),
+        (STATUS_FAILED, 'Ошибка'),
+        (STATUS_UNKNOWN, 'Неизвестно (проверьте канал)'),
+    ]
+
+    channel = models.CharField(max_length=20, choices=CHANNEL_CHOICES, verbose_name='Канал')
+    article = models.ForeignKey(
+        Article, on_delete=models.CASCADE, related_name='outbox_messages', verbose_name='Статья'
+    )
+    idempotency_key = models.CharField(max_length=100, unique=True, verbose_name='Ключ идемпотентности')
+    payload = models.JSONField(verbose_name='Данные запроса')
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING, verbose_name='Статус'
+    )
+    attempts = models.PositiveIntegerField(default=0, verbose_name='Попыток')
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name='Следующая попытка')
+    last_error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Создано')
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name='Отправлено')
+
+    class Meta:
+        verbose_name = 'Публикация в соцсети'
+        verbose_name_plural = 'Публикации в соцсети'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.get_channel_display()}: {self.article}'
+
+
+class ImageVariants(models.Model):
+    """Уменьшенные копии загруженного изображения (см. main.images)."""
+    source = models.CharField(max_length=255, unique=True, verbose_name='Исходный файл')
+    width = models.PositiveIntegerField(verbose_name='Ширина')
+    height = models.PositiveIntegerField(verbose_name='Высота')
+    placeholder = models.TextField(blank=True, verbose_name='Заглушка (data URI)')
+    variants = models.JSONField(default=list, verbose_name='Копии')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата обновления')
+
+    class Meta:
+        verbose_name = 'Копии изображения'
+        verbose_name_plural = 'Копии изображений'
+
+    def __str__(self):
+        return self.source
+
+
+SITE_SETTINGS_VERSION_KEY = 'site_settings:version'
+
+# Кеш настроек в памяти процесса: [версия, объект]
+_site_settings_cache = [None, None]
+
+
 class SiteSettings(models.Model):
     """Настройки сайта (Singleton)."""
     site_name = models.CharField(max_length=100, default='deev.space', verbose_name='Название сайта')
@@ -613,8 +827,30 @@ class SiteSettings(models.Model):
     def save(self, *args, **kwargs):
         self.pk = 1
         super().save(*args, **kwargs)
+        # Новая версия публикуется после коммита, чтобы воркеры не закешировали старые данные
+        transaction.on_commit(self.bump_cache_version)
 
     @classmethod
     def load(cls):
         obj, created = cls.objects.get_or_create(pk=1)
-        return obj
\ No newline at end of file
+        return obj
+
+    @classmethod
+    def bump_cache_version(cls):
+        caches[settings.STATE_CACHE_ALIAS].set(SITE_SETTINGS_VERSION_KEY, uuid.uuid4().hex, None)
+
+    @classmethod
+    def get_cached(cls):
+        """Настройки из кеша процесса, сверенные с общей версией."""
+        state_cache = caches[settings.STATE_CACHE_ALIAS]
+        version = state_cache.get(SITE_SETTINGS_VERSION_KEY)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not state_cache.add(SITE_SETTINGS_VERSION_KEY, version, None):
+                version = state_cache.get(SITE_SETTINGS_VERSION_KEY)
+
+        cached_version, obj = _site_settings_cache
+        if obj is None or cached_version != version:
+            obj = cls.load()
+            _site_settings_cache[:] = [version, obj]
+        return obj
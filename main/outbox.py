@@ -0,0 +1,304 @@
+"""
+Outbox публикаций статей в Telegram и VK.
+
+Сообщение записывается в таблицу OutboxMessage в той же транзакции, что и
+статья, поэтому сохранение в админке не ждёт внешних API, а публикация не
+теряется при сбое. Очередь разбирает команда drain_outbox: запросы идут
+через общую сессию с пулом соединений, неудачные попытки повторяются с
+экспоненциальной задержкой.
+
+Telegram не поддерживает ключи идемпотентности, поэтому пост туда
+повторяется, только если запрос точно не принят: соединение не
+установлено или API ответил 429/5xx. Если ответ не получен (таймаут
+чтения, обрыв соединения) или воркер пропал посреди отправки и аренда
+истекла, сообщение получает статус «Неизвестно» и ждёт проверки канала и
+ручного повтора из админки.
+"""
+import logging
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError
+
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+SITE_URL = settings.SITE_URL
+
+# Коды ошибок VK, после которых имеет смысл повторить запрос
+VK_TRANSIENT_ERRORS = {1, 6, 9, 10}
+
+
+class PermanentError(Exception):
+    """Ошибка, которую повтор запроса не исправит."""
+
+
+class TransientError(Exception):
+    """Временная ошибка; retry_after — рекомендованная пауза в секундах."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class DeliveryUnknown(Exception):
+    """Запрос мог дойти до API, но ответ не получен; повтор может продублировать пост."""
+
+
+# ===== Формирование сообщений =====
+
+def escape_markdown(text):
+    """Экранирование специальных символов Markdown."""
+    escape_chars = ['_', '*', '[', ']', '(', ')', '~', '`', '>', '#', '+', '-', '=', '|', '{', '}', '.', '!']
+    for char in escape_chars:
+        text = text.replace(char, f'\\{char}')
+    return text
+
+
+def build_telegram_payload(article):
+    """Метод Bot API и параметры поста в Telegram-канал."""
+    article_url = f"{SITE_URL}{article.get_absolute_url()}"
+
+    text = f"📝 *{escape_markdown(article.title)}*\n\n"
+    if article.excerpt:
+        excerpt = article.excerpt[:200] + '...' if len(article.excerpt) > 200 else article.excerpt
+        text += f"{escape_markdown(excerpt)}\n\n"
+    text += f"[Читать полностью]({article_url})"
+
+    if article.img:
+        return {'method': 'sendPhoto', 'data': {
+            'photo': f"{SITE_URL}{article.img.url}",
+            'caption': text,
+            'parse_mode': 'Markdown',
+        }}
+    return {'method': 'sendMessage', 'data': {
+        'text': text,
+        'parse_mode': 'Markdown',
+        'disable_web_page_preview': False,
+    }}
+
+
+def build_vk_payload(article):
+    """Параметры wall.post для группы VK (без токена доступа)."""
+    article_url = f"{SITE_URL}{article.get_absolute_url()}"
+
+    message = f"📝 {article.title}\n\n"
+    if article.excerpt:
+        excerpt = article.excerpt[:300] + '...' if len(article.excerpt) > 300 else article.excerpt
+        message += f"{excerpt}\n\n"
+    message += f"🔗 Читать: {article_url}"
+
+    params = {'message': message, 'from_group': 1, 'v': '5.131'}
+    if article.img:
+        params['attachments'] = f"{SITE_URL}{article.img.url}"
+    return {'method': 'wall.post', 'params': params}
+
+
+def _channels():
+    channels = []
+    if settings.TELEGRAM_BOT_TOKEN and settings.TELEGRAM_CHANNEL_ID:
+        channels.append((OutboxMessage.CHANNEL_TELEGRAM, build_telegram_payload))
+    if settings.VK_ACCESS_TOKEN and settings.VK_GROUP_ID:
+        channels.append((OutboxMessage.CHANNEL_VK, build_vk_payload))
+    return channels
+
+
+def enqueue_article(article):
+    """Постановка публикации статьи в очередь для всех настроенных каналов."""
+    messages = []
+    for channel, build_payload in _channels():
+        message, created = OutboxMessage.objects.get_or_create(
+            idempotency_key=f'{channel}:article:{article.pk}',
+            defaults={'channel': channel, 'article': article, 'payload': build_payload(article)},
+        )
+        if created:
+            messages.append(message)
+    return messages
+
+
+# ===== Отправка =====
+
+def create_session():
+    """HTTP-сессия с пулом соединений; повторы выполняет сам воркер."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4, max_retries=0)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def _retry_after(response):
+    try:
+        return int(response.headers.get('Retry-After', ''))
+    except ValueError:
+        return None
+
+
+def _check_response(response):
+    if response.status_code == 429 or response.status_code >= 500:
+        raise TransientError(f'HTTP {response.status_code}', _retry_after(response))
+    if response.status_code >= 400:
+        raise PermanentError(f'HTTP {response.status_code}: {response.text[:500]}')
+
+
+def _connection_not_established(error):
+    """
+    Запрос не ушёл: соединение не установлено. Адаптер работает без повторов,
+    поэтому ошибки подключения приходят от urllib3 как MaxRetryError, а обрыв
+    после отправки запроса — как ProtocolError.
+    """
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    return isinstance(error, requests.ConnectionError) and bool(error.args) and isinstance(error.args[0], MaxRetryError)
+
+
+def send_telegram(session, message):
+    if not (settings.TELEGRAM_BOT_TOKEN and settings.TELEGRAM_CHANNEL_ID):
+        raise PermanentError('Telegram не настроен')
+
+    payload = message.payload
+    url = f"{settings.TELEGRAM_API_URL.rstrip('/')}/bot{settings.TELEGRAM_BOT_TOKEN}/{payload['method']}"
+    data = {'chat_id': settings.TELEGRAM_CHANNEL_ID, **payload['data']}
+    try:
+        response = session.post(url, data=data, timeout=settings.OUTBOX_REQUEST_TIMEOUT)
+    except requests.RequestException as e:
+        if _connection_not_established(e):
+            raise TransientError(str(e))
+        raise DeliveryUnknown(str(e))
+    _check_response(response)
+
+
+def send_vk(session, message):
+    if not (settings.VK_ACCESS_TOKEN and settings.VK_GROUP_ID):
+        raise PermanentError('VK не настроен')
+
+    payload = message.payload
+    url = f"{settings.VK_API_URL.rstrip('/')}/{payload['method']}"
+    params = {
+        **payload['params'],
+        'owner_id': f'-{settings.VK_GROUP_ID}',
+        'access_token': settings.VK_ACCESS_TOKEN,
+        # VK не создаёт повторную запись с тем же guid
+        'guid': message.idempotency_key,
+    }
+    response = session.post(url, params=params, timeout=settings.OUTBOX_REQUEST_TIMEOUT)
+    _check_response(response)
+
+    # Ошибки VK API приходят со статусом 200
+    error = response.json().get('error')
+    if error:
+        text = f"VK {error.get('error_code')}: {error.get('error_msg')}"
+        if error.get('error_code') in VK_TRANSIENT_ERRORS:
+            raise TransientError(text)
+        raise PermanentError(text)
+
+
+SENDERS = {
+    OutboxMessage.CHANNEL_TELEGRAM: send_telegram,
+    OutboxMessage.CHANNEL_VK: send_vk,
+}
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка перед следующей попыткой."""
+    delay = settings.OUTBOX_RETRY_BASE_DELAY * 2 ** max(attempts - 1, 0)
+    return min(delay, settings.OUTBOX_RETRY_MAX_DELAY)
+
+
+def expire_stale_telegram():
+    """
+    Зависшие в «Отправляется» посты Telegram переводятся в «Неизвестно»:
+    воркер мог успеть отправить пост, а повтор его продублирует.
+    """
+    return OutboxMessage.objects.filter(
+        channel=OutboxMessage.CHANNEL_TELEGRAM, status=OutboxMessage.STATUS_SENDING,
+        next_attempt_at__lte=timezone.now(),
+    ).update(status=OutboxMessage.STATUS_UNKNOWN, last_error='Аренда истекла во время отправки')
+
+
+def claim_next(batch_size):
+    """
+    Захват одного готового к отправке сообщения.
+
+    Сообщение переводится в «Отправляется» условным UPDATE, поэтому два
+    воркера не возьмут одно и то же; занятые другим воркером кандидаты
+    пропускаются (просматривается до batch_size). Аренда выдаётся на одно
+    сообщение непосредственно перед отправкой, поэтому не истекает, пока
+    воркер занят предыдущими. Зависшие после падения воркера сообщения VK
+    снова становятся доступны, когда истекает аренда (guid защищает от
+    дубля), а сообщения Telegram уходят в «Неизвестно».
+    """
+    expire_stale_telegram()
+    now = timezone.now()
+    lease_until = now + timedelta(seconds=settings.OUTBOX_REQUEST_TIMEOUT * 3)
+    due = Q(next_attempt_at__lte=now) & (
+        Q(status=OutboxMessage.STATUS_PENDING)
+        | Q(status=OutboxMessage.STATUS_SENDING, channel=OutboxMessage.CHANNEL_VK)
+    )
+
+    candidates = OutboxMessage.objects.filter(due).order_by('next_attempt_at')[:batch_size]
+    for message in candidates:
+        updated = OutboxMessage.objects.filter(due, pk=message.pk, next_attempt_at=message.next_attempt_at).update(
+            status=OutboxMessage.STATUS_SENDING, next_attempt_at=lease_until, attempts=message.attempts + 1
+        )
+        if updated:
+            message.attempts += 1
+            return message
+    return None
+
+
+def deliver(session, message):
+    """Отправка одного сообщения и запись результата. Возвращает новый статус."""
+    try:
+        SENDERS[message.channel](session, message)
+    except (TransientError, requests.RequestException, ValueError) as e:
+        retry_after = getattr(e, 'retry_after', None)
+        if message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            status, next_attempt_at = OutboxMessage.STATUS_FAILED, timezone.now()
+        else:
+            status = OutboxMessage.STATUS_PENDING
+            next_attempt_at = timezone.now() + timedelta(seconds=retry_after or retry_delay(message.attempts))
+        logger.warning(f'Ошибка публикации {message.idempotency_key} (попытка {message.attempts}): {e}')
+        OutboxMessage.objects.filter(pk=message.pk).update(
+            status=status, next_attempt_at=next_attempt_at, last_error=str(e)
+        )
+        return status
+    except PermanentError as e:
+        logger.error(f'Публикация {message.idempotency_key} отклонена: {e}')
+        OutboxMessage.objects.filter(pk=message.pk).update(status=OutboxMessage.STATUS_FAILED, last_error=str(e))
+        return OutboxMessage.STATUS_FAILED
+    except DeliveryUnknown as e:
+        logger.error(f'Результат публикации {message.idempotency_key} неизвестен, повтор не выполняется: {e}')
+        OutboxMessage.objects.filter(pk=message.pk).update(status=OutboxMessage.STATUS_UNKNOWN, last_error=str(e))
+        return OutboxMessage.STATUS_UNKNOWN
+
+    OutboxMessage.objects.filter(pk=message.pk).update(
+        status=OutboxMessage.STATUS_SENT, sent_at=timezone.now(), last_error=''
+    )
+    logger.info(f'Статья #{message.article_id} опубликована: {message.get_channel_display()}')
+    return OutboxMessage.STATUS_SENT
+
+
+def drain(session=None, batch_size=None):
+    """Отправка всех готовых сообщений. Возвращает счётчики по статусам."""
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    own_session = session is None
+    session = session or create_session()
+    stats = {
+        OutboxMessage.STATUS_SENT: 0, OutboxMessage.STATUS_PENDING: 0,
+        OutboxMessage.STATUS_FAILED: 0, OutboxMessage.STATUS_UNKNOWN: 0,
+    }
+    try:
+        while True:
+            message = claim_next(batch_size)
+            if message is None:
+                return stats
+            stats[deliver(session, message)] += 1
+    finally:
+        if own_session:
+            session.close()
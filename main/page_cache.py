@@ -0,0 +1,173 @@
+"""
+Кеш готовых страниц для анонимных посетителей.
+
+Запись хранится в общем кеше по пути и строке запроса вместе с версиями
+моделей, от которых зависит страница. Сохранение или удаление объекта
+модели меняет её версию, и устаревшими становятся только те страницы,
+которые от неё зависят. Версии лежат в отдельном кеше состояния, чтобы
+вытеснение страниц их не задевало.
+
+Счётчики попаданий и промахов копятся в памяти процесса и добавляются в кеш
+состояния раз в PAGE_CACHE_STATS_FLUSH_EVERY запросов и при выходе.
+"""
+import atexit
+import hashlib
+import threading
+import uuid
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+
+VERSION_KEY = 'page_cache:version:{}'
+ENTRY_KEY = 'page_cache:page:{}'
+HITS_KEY = 'page_cache:hits'
+MISSES_KEY = 'page_cache:misses'
+
+_stats_lock = threading.Lock()
+_pending_stats = {HITS_KEY: 0, MISSES_KEY: 0}
+
+
+def _cache():
+    return caches[settings.SHARED_CACHE_ALIAS]
+
+
+def _state_cache():
+    return caches[settings.STATE_CACHE_ALIAS]
+
+
+def is_enabled():
+    return getattr(settings, 'PAGE_CACHE_ENABLED', True)
+
+
+def _label(model):
+    return model._meta.label_lower
+
+
+def _entry_key(request):
+    digest = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return ENTRY_KEY.format(digest)
+
+
+def get_versions(models):
+    """Текущие версии моделей; отсутствующие создаются."""
+    cache = _state_cache()
+    keys = {VERSION_KEY.format(_label(model)): model for model in models}
+    versions = cache.get_many(keys)
+    for key in keys.keys() - versions.keys():
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, None):
+            version = cache.get(key)
+        versions[key] = version
+    return versions
+
+
+def _count(key):
+    with _stats_lock:
+        _pending_stats[key] += 1
+        if sum(_pending_stats.values()) < getattr(settings, 'PAGE_CACHE_STATS_FLUSH_EVERY', 100):
+            return
+    flush_stats()
+
+
+def flush_stats():
+    """Запись накопленных в процессе счётчиков в кеш состояния."""
+    with _stats_lock:
+        pending = dict(_pending_stats)
+        _pending_stats.update(dict.fromkeys(_pending_stats, 0))
+
+    cache = _state_cache()
+    for key, value in pending.items():
+        if not value:
+            continue
+        try:
+            cache.incr(key, value)
+        except ValueError:
+            cache.add(key, 0, None)
+            cache.incr(key, value)
+
+
+def is_cacheable_request(request):
+    """Страницу можно отдать из кеша: анонимный GET без отложенных сообщений."""
+    if not is_enabled() or request.method not in ('GET', 'HEAD'):
+        return False
+    if request.user.is_authenticated:
+        return False
+    # Флеш-сообщения (например, после выхода) должны попасть в ответ
+    return not len(get_messages(request))
+
+
+def get_cached_response(request, models):
+    """Ответ из кеша, если ни одна из зависимостей не изменилась."""
+    entry = _cache().get(_entry_key(request))
+    if entry is None or entry['versions'] != get_versions(models):
+        _count(MISSES_KEY)
+        return None
+
+    _count(HITS_KEY)
+    response = HttpResponse(entry['content'], content_type=entry['content_type'], status=entry['status'])
+    response['X-Page-Cache'] = 'HIT'
+    return response
+
+
+def store_response(request, response, models, versions):
+    """Сохранение отрендеренного ответа с версиями зависимостей."""
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return
+    _cache().set(_entry_key(request), {
+        'versions': versions,
+        'content': response.content,
+        'content_type': response['Content-Type'],
+        'status': response.status_code,
+    }, getattr(settings, 'PAGE_CACHE_TIMEOUT', 60 * 60 * 24))
+
+
+def invalidate(*models):
+    """Сброс страниц, зависящих от моделей (после коммита транзакции)."""
+    def bump():
+        _state_cache().set_many({VERSION_KEY.format(_label(model)): uuid.uuid4().hex for model in models}, None)
+    transaction.on_commit(bump)
+
+
+def get_stats():
+    """Счётчики попаданий и промахов кеша страниц (других процессов — на момент их сброса)."""
+    flush_stats()
+    values = _state_cache().get_many([HITS_KEY, MISSES_KEY])
+    hits, misses = values.get(HITS_KEY, 0), values.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'ratio': hits / total if total else 0.0}
+
+
+def reset_stats():
+    with _stats_lock:
+        _pending_stats.update(dict.fromkeys(_pending_stats, 0))
+    _state_cache().delete_many([HITS_KEY, MISSES_KEY])
+
+
+atexit.register(flush_stats)
+
+
+class PageCacheMixin:
+    """Кеширование страницы представления для анонимных посетителей."""
+    cache_dependencies = ()
+
+    def dispatch(self, request, *args, **kwargs):
+        if not is_cacheable_request(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        models = self.cache_dependencies
+        cached = get_cached_response(request, models)
+        if cached is not None:
+            return cached
+
+        # Версии берутся до рендера: изменение во время рендера сбросит запись
+        versions = get_versions(models)
+        response = super().dispatch(request, *args, **kwargs)
+        response['X-Page-Cache'] = 'MISS'
+        if hasattr(response, 'add_post_render_callback'):
+            response.add_post_render_callback(lambda r: store_response(request, r, models, versions))
+        else:
+            store_response(request, response, models, versions)
+        return response
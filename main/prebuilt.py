@@ -0,0 +1,41 @@
+"""
+Файлы, построенные заранее и отдаваемые с диска (карта сайта, RSS/Atom).
+
+ETag и Last-Modified берутся из самого файла, поэтому повторный запрос
+неизменившегося файла получает 304 без обращений к базе данных.
+"""
+import os
+from datetime import datetime, timezone as dt_timezone
+
+from django.http import FileResponse
+
+
+def write_atomic(path, content):
+    """Атомарная запись: читатель видит либо старый, либо новый файл."""
+    tmp = os.path.join(os.path.dirname(path), f'.{os.path.basename(path)}.{os.getpid()}.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+def remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def file_etag(path):
+    stat = os.stat(path)
+    return f'{stat.st_mtime_ns:x}-{stat.st_size:x}'
+
+
+def file_last_modified(path):
+    return datetime.fromtimestamp(os.stat(path).st_mtime, tz=dt_timezone.utc)
+
+
+def file_response(path, content_type):
+    response = FileResponse(open(path, 'rb'), content_type=content_type)
+    # Имя файла на диске клиенту не нужно
+    response.headers.pop('Content-Disposition', None)
+    return response
@@ -0,0 +1,159 @@
+"""
+Ограничение частоты запросов к API и формам входа/регистрации.
+
+Для каждой области (scope) из settings.RATE_LIMITS ведутся корзины токенов
+по IP и по пользователю. Состояние корзин хранится в общем кеше throttle, поэтому
+лимит един для всех воркеров gunicorn; чтение и запись корзины
+выполняются под межпроцессной блокировкой (lockf на RATE_LIMIT_LOCK_FILE).
+
+Корзина пользователя привязана к id аккаунта, а не к сессии: повторный
+вход не даёт новой корзины. Анонимные запросы ограничиваются только по
+IP, поэтому сброс cookie тоже ничего не даёт. Декоратор ставится перед
+login_required, а корзина IP проверяется до загрузки пользователя:
+запрос, отклонённый по IP, не обращается к базе данных.
+"""
+import functools
+import hashlib
+import math
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, JsonResponse
+
+try:
+    import fcntl
+except ImportError:  # Windows: только блокировка внутри процесса
+    fcntl = None
+
+BUCKET_KEY = 'ratelimit:{scope}:{kind}:{ident}'
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+LOCK_SHARDS = 64
+MESSAGE = 'Слишком много запросов, попробуйте позже'
+
+_thread_locks = [threading.Lock() for _ in range(LOCK_SHARDS)]
+_lock_file = None
+_lock_file_guard = threading.Lock()
+
+
+def parse_rate(rate):
+    """'30/m' -> (ёмкость корзины, токенов в секунду)."""
+    count, period = rate.split('/')
+    count = int(count)
+    return count, count / PERIODS[period]
+
+
+def _get_lock_file():
+    global _lock_file
+    with _lock_file_guard:
+        if _lock_file is None:
+            path = settings.RATE_LIMIT_LOCK_FILE
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _lock_file = open(path, 'a+b')
+        return _lock_file
+
+
+class _BucketLock:
+    """Блокировка корзины: потоки процесса и процессы делят LOCK_SHARDS байт файла."""
+
+    def __init__(self, key):
+        self.shard = int(hashlib.md5(key.encode()).hexdigest(), 16) % LOCK_SHARDS
+
+    def __enter__(self):
+        _thread_locks[self.shard].acquire()
+        if fcntl is not None:
+            try:
+                fcntl.lockf(_get_lock_file(), fcntl.LOCK_EX, 1, self.shard)
+            except BaseException:
+                _thread_locks[self.shard].release()
+                raise
+
+    def __exit__(self, *exc):
+        try:
+            if fcntl is not None:
+                fcntl.lockf(_get_lock_file(), fcntl.LOCK_UN, 1, self.shard)
+        finally:
+            _thread_locks[self.shard].release()
+
+
+def take(key, rate):
+    """
+    Взять токен из корзины. Возвращает 0, если запрос разрешён, иначе
+    число секунд до появления следующего токена.
+    """
+    capacity, per_second = parse_rate(rate)
+    cache = caches[settings.THROTTLE_CACHE_ALIAS]
+    with _BucketLock(key):
+        now = time.time()
+        tokens, updated = cache.get(key) or (capacity, now)
+        tokens = min(capacity, tokens + (now - updated) * per_second)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        # Запись исчезает, когда корзина успела бы наполниться заново
+        cache.set(key, (tokens, now), math.ceil((capacity - tokens) / per_second) + 1)
+    return 0 if allowed else (1 - tokens) / per_second
+
+
+def client_ip(request):
+    return request.META.get(settings.RATE_LIMIT_IP_HEADER) or request.META.get('REMOTE_ADDR', '')
+
+
+def _take(scope, kind, ident, limits):
+    return take(BUCKET_KEY.format(scope=scope, kind=kind, ident=ident), limits[kind])
+
+
+def check(request, scope):
+    """
+    Списание токенов для области; 0 или время ожидания в секундах.
+
+    Сначала корзина IP — без обращения к request.user, затем корзина
+    пользователя: загрузка сессии и пользователя стоит запросов к базе.
+    """
+    limits = settings.RATE_LIMITS[scope]
+    if 'ip' in limits:
+        retry_after = _take(scope, 'ip', client_ip(request), limits)
+        if retry_after:
+            return retry_after
+    if 'user' in limits:
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return _take(scope, 'user', user.pk, limits)
+    return 0
+
+
+def wants_json(request):
+    return (
+        request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+        or request.content_type == 'application/json'
+        or 'application/json' in request.headers.get('Accept', '')
+    )
+
+
+def too_many_requests(request, retry_after):
+    if wants_json(request):
+        response = JsonResponse({'success': False, 'error': MESSAGE}, status=429)
+    else:
+        response = HttpResponse(MESSAGE, status=429, content_type='text/plain; charset=utf-8')
+    response['Retry-After'] = str(math.ceil(retry_after))
+    return response
+
+
+def rate_limit(scope, methods=('POST',)):
+    """
+    Декоратор представления: лимиты области scope из settings.RATE_LIMITS,
+    например {'user': '30/m', 'ip': '60/m'}. Ставится первым, до
+    login_required и остальных декораторов.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if settings.RATE_LIMIT_ENABLED and request.method in methods:
+                retry_after = check(request, scope)
+                if retry_after:
+                    return too_many_requests(request, retry_after)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,316 @@
+"""
+Полнотекстовый поиск по статьям блога на SQLite FTS5.
+
+Тексты статей лежат в виртуальной таблице main_article_fts (rowid = id статьи).
+Слова запроса приводятся к основе русским стеммером и ищутся как префиксы,
+поэтому «программирование» находит «программированию» и «программирования».
+Однобуквенные слова и стоп-слова («и», «на», «the») отбрасываются: как префиксы
+они совпадают почти с каждой статьёй.
+Результаты сортируются по bm25, для карточек строится сниппет с подсветкой.
+
+На PostgreSQL используется встроенный полнотекстовый поиск с русской
+конфигурацией (to_tsvector/websearch_to_tsquery, ts_rank, ts_headline).
+"""
+import logging
+import re
+
+from django.db import connection, connections
+from django.db.models import F, Func, Q, TextField, Value
+from django.utils.html import escape, strip_tags
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'main_article_fts'
+
+CREATE_TABLE_SQL = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+    "title, excerpt, body, tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')"
+)
+DROP_TABLE_SQL = f'DROP TABLE IF EXISTS {FTS_TABLE}'
+
+# Веса колонок для bm25: заголовок, описание, текст
+BM25_WEIGHTS = (10.0, 4.0, 1.0)
+
+SNIPPET_START = '\x02'
+SNIPPET_END = '\x03'
+SNIPPET_TOKENS = 24
+
+# Конфигурация текстового поиска PostgreSQL
+PG_SEARCH_CONFIG = 'russian'
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+CYRILLIC_RE = re.compile(r'[а-яё]', re.IGNORECASE)
+
+MIN_TERM_LENGTH = 2
+STOPWORDS = frozenset('''
+    без более бы был была были было быть вам вас весь во вот все всего всех вы где да даже для до его ее если
+    есть еще же за здесь из или им их как ко когда кто ли либо мне может мы на над нам нас не него нее нет ни
+    них но ну об однако он она они оно от по под при про так также такой там те тем то того тоже той только
+    том ты уже хотя чего чей чем что чтобы чье эта эти это этот
+    an and are as at be by for from in is it of on or that the this to was with
+'''.split())
+
+
+# ===== Русский стеммер (Snowball/Портер) =====
+
+_RV_RE = re.compile(r'^(.*?[аеиоуыэюя])(.*)$')
+_PERFECTIVE_GERUND_RE = re.compile(r'((ив|ивши|ившись|ыв|ывши|ывшись)|((?<=[ая])(в|вши|вшись)))$')
+_REFLEXIVE_RE = re.compile(r'(с[яь])$')
+_ADJECTIVE_RE = re.compile(
+    r'(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых|ую|юю|ая|яя|ою|ею)$'
+)
+_PARTICIPLE_RE = re.compile(r'((ивш|ывш|ующ)|((?<=[ая])(ем|нн|вш|ющ|щ)))$')
+_VERB_RE = re.compile(
+    r'((ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло|ено|ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю)'
+    r'|((?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)))$'
+)
+_NOUN_RE = re.compile(
+    r'(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем|ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$'
+)
+_DERIVATIONAL_RE = re.compile(r'.*[^аеиоуыэюя]+[аеиоуыэюя].*ость?$')
+_DER_RE = re.compile(r'ость?$')
+_SUPERLATIVE_RE = re.compile(r'(ейше|ейш)$')
+
+
+def normalize(text):
+    """Приведение текста к виду, в котором он хранится в индексе."""
+    return text.replace('ё', 'е').replace('Ё', 'Е')
+
+
+def stem_russian(word):
+    """Основа русского слова по алгоритму Портера."""
+    word = normalize(word.lower())
+    match = _RV_RE.match(word)
+    if not match:
+        return word
+
+    prefix, rv = match.groups()
+    temp = _PERFECTIVE_GERUND_RE.sub('', rv, 1)
+    if temp == rv:
+        rv = _REFLEXIVE_RE.sub('', rv, 1)
+        temp = _ADJECTIVE_RE.sub('', rv, 1)
+        if temp != rv:
+            rv = _PARTICIPLE_RE.sub('', temp, 1)
+        else:
+            temp = _VERB_RE.sub('', rv, 1)
+            rv = _NOUN_RE.sub('', rv, 1) if temp == rv else temp
+    else:
+        rv = temp
+
+    rv = re.sub(r'и$', '', rv, 1)
+    if _DERIVATIONAL_RE.match(rv):
+        rv = _DER_RE.sub('', rv, 1)
+    temp = re.sub(r'ь$', '', rv, 1)
+    if temp == rv:
+        rv = _SUPERLATIVE_RE.sub('', rv, 1)
+        rv = re.sub(r'нн$', 'н', rv, 1)
+    else:
+        rv = temp
+    return prefix + rv
+
+
+def build_match_query(query):
+    """Перевод пользовательского запроса в безопасное выражение MATCH."""
+    terms = []
+    for word in WORD_RE.findall(normalize(query.lower())):
+        if len(word) < MIN_TERM_LENGTH or word in STOPWORDS:
+            continue
+        term = stem_russian(word) if CYRILLIC_RE.search(word) else word
+        if len(term) < 2:
+            term = normalize(word)
+        terms.append(f'"{term}"*')
+    return ' '.join(terms)
+
+
+# ===== Индекс =====
+
+def is_available():
+    """Поддерживает ли текущая база поиск через FTS5."""
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+def _document(article):
+    return (
+        article.pk,
+        normalize(article.title),
+        normalize(article.excerpt or ''),
+        normalize(strip_tags(article.post or '')),
+    )
+
+
+def index_article(article):
+    """Добавление или обновление статьи в индексе."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [article.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, excerpt, body) VALUES (%s, %s, %s, %s)',
+            _document(article)
+        )
+
+
+def remove_article(article_id):
+    """Удаление статьи из индекса."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [article_id])
+
+
+def rebuild_index(batch_size=500):
+    """Полное пересоздание поискового индекса."""
+    from .models import Article
+
+    total = 0
+    with connection.cursor() as cursor:
+        cursor.execute(DROP_TABLE_SQL)
+        cursor.execute(CREATE_TABLE_SQL)
+        articles = Article.objects.only('pk', 'title', 'excerpt', 'post').order_by('pk')
+        batch = []
+        for article in articles.iterator(chunk_size=batch_size):
+            batch.append(_document(article))
+            if len(batch) >= batch_size:
+                cursor.executemany(
+                    f'INSERT INTO {FTS_TABLE} (rowid, title, excerpt, body) VALUES (%s, %s, %s, %s)', batch
+                )
+                total += len(batch)
+                batch = []
+        if batch:
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, excerpt, body) VALUES (%s, %s, %s, %s)', batch
+            )
+            total += len(batch)
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+    return total
+
+
+# ===== Поиск =====
+
+def highlight(snippet):
+    """Безопасный HTML сниппета с подсветкой совпадений."""
+    return escape(snippet).replace(SNIPPET_START, '<mark>').replace(SNIPPET_END, '</mark>')
+
+
+class SearchResults:
+    """
+    Ленивая выдача поиска, совместимая с Paginator.
+
+    Из FTS-индекса читается только текущая страница, поэтому время ответа
+    не зависит от общего числа статей.
+    """
+
+    def __init__(self, queryset, match_query):
+        self.queryset = queryset
+        self.match_query = match_query
+        self._count = None
+
+    def _filter_sql(self):
+        sql, params = self.queryset.order_by().values('pk').query.sql_with_params()
+        return f'{FTS_TABLE} MATCH %s AND rowid IN ({sql})', [self.match_query, *params]
+
+    def count(self):
+        if self._count is None:
+            where, params = self._filter_sql()
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT COUNT(*) FROM {FTS_TABLE} WHERE {where}', params)
+                self._count = cursor.fetchone()[0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self[key:key + 1][0]
+
+        start = key.start or 0
+        stop = key.stop if key.stop is not None else self.count()
+        if stop <= start:
+            return []
+
+        where, params = self._filter_sql()
+        weights = ', '.join(str(w) for w in BM25_WEIGHTS)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid, snippet({FTS_TABLE}, -1, %s, %s, %s, %s) FROM {FTS_TABLE} '
+                f'WHERE {where} ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT %s OFFSET %s',
+                [SNIPPET_START, SNIPPET_END, '…', SNIPPET_TOKENS, *params, stop - start, start]
+            )
+            hits = cursor.fetchall()
+
+        articles = self.queryset.in_bulk([pk for pk, _ in hits])
+        results = []
+        for pk, snippet in hits:
+            article = articles.get(pk)
+            if article is not None:
+                article.search_snippet = highlight(snippet)
+                results.append(article)
+        return results
+
+
+class PostgresSearchResults:
+    """Выдача полнотекстового поиска PostgreSQL, совместимая с Paginator."""
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+
+    def count(self):
+        return self.queryset.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self[key:key + 1][0]
+        results = list(self.queryset[key])
+        for article in results:
+            article.search_snippet = highlight(article.search_headline)
+        return results
+
+
+def _strip_html(field):
+    """Текст статьи без HTML-тегов средствами PostgreSQL."""
+    return Func(
+        F(field), Value('<[^>]+>'), Value(' '), Value('g'), function='regexp_replace', output_field=TextField()
+    )
+
+
+def search_postgres(queryset, query):
+    """Поиск на PostgreSQL: веса A/B/C для заголовка, описания и текста."""
+    # Модуль требует драйвер PostgreSQL, поэтому импортируется здесь
+    from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+
+    vector = (
+        SearchVector('title', weight='A', config=PG_SEARCH_CONFIG)
+        + SearchVector('excerpt', weight='B', config=PG_SEARCH_CONFIG)
+        + SearchVector(_strip_html('post'), weight='C', config=PG_SEARCH_CONFIG)
+    )
+    search_query = SearchQuery(normalize(query), search_type='websearch', config=PG_SEARCH_CONFIG)
+    queryset = queryset.annotate(search_document=vector).filter(search_document=search_query).annotate(
+        search_rank=SearchRank(vector, search_query),
+        search_headline=SearchHeadline(
+            _strip_html('post'), search_query, config=PG_SEARCH_CONFIG,
+            start_sel=SNIPPET_START, stop_sel=SNIPPET_END, max_words=SNIPPET_TOKENS, min_words=SNIPPET_TOKENS // 2,
+        ),
+    ).order_by('-search_rank', '-date')
+    return PostgresSearchResults(queryset)
+
+
+def search_articles(queryset, query):
+    """Поиск статей из queryset, отсортированных по релевантности."""
+    match_query = build_match_query(query)
+    if not match_query:
+        return queryset.none()
+
+    if connections[queryset.db].vendor == 'postgresql':
+        return search_postgres(queryset, query)
+
+    if not is_available():
+        # Запасной вариант для баз без FTS5
+        return queryset.filter(
+            Q(title__icontains=query) | Q(excerpt__icontains=query) | Q(post__icontains=query)
+        ).order_by('-date')
+
+    return SearchResults(queryset, match_query)
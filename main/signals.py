@@ -1,17 +1,197 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_init, post_save, post_delete, m2m_changed
 from django.dispatch import receiver
-from django.conf import settings
-import requests
 import logging
 
-from .models import Article
+from .models import (
+    Article, ArticleImage, ArticleLike, Comment, CommentLike, CustomUser, ImageVariants, Project,
+    ProjectStatus, Language, Technology, Category, Skill, Experience, Education, SiteSettings
+)
+from .counters import adjust_vote_counters, adjust_comments_count, removing_votes, vote_target
+from .facets import invalidate_project_facets
+from .outbox import enqueue_article
+from . import feeds, images, page_cache, search, sitemaps, sqlite
 
 logger = logging.getLogger(__name__)
 
 
+@receiver(connection_created)
+def configure_database_connection(sender, connection, **kwargs):
+    """PRAGMA профиля SQLite для нового соединения."""
+    sqlite.configure_connection(connection)
+
+
+@receiver(post_save, sender=Article)
+def update_search_index(sender, instance, **kwargs):
+    """Обновление статьи в поисковом индексе."""
+    try:
+        if search.is_available():
+            search.index_article(instance)
+    except Exception as e:
+        logger.error(f'Ошибка обновления поискового индекса: {e}')
+
+
+@receiver(post_delete, sender=Article)
+def remove_from_search_index(sender, instance, **kwargs):
+    """Удаление статьи из поискового индекса."""
+    try:
+        if search.is_available():
+            search.remove_article(instance.pk)
+    except Exception as e:
+        logger.error(f'Ошибка обновления поискового индекса: {e}')
+
+
+# Модели, от которых зависят закешированные страницы и ETag
+PAGE_CACHE_MODELS = [
+    Article, ArticleLike, Comment, CommentLike, Category, Project, ProjectStatus, Language, Technology,
+    Skill, Experience, Education, SiteSettings,
+]
+
+
+def invalidate_cached_pages(sender, **kwargs):
+    """Сброс закешированных страниц, зависящих от изменённой модели."""
+    page_cache.invalidate(sender)
+
+
+def invalidate_cached_project_pages(sender, **kwargs):
+    """Сброс страниц проектов при изменении тегов."""
+    page_cache.invalidate(Project)
+
+
+for _model in PAGE_CACHE_MODELS:
+    post_save.connect(invalidate_cached_pages, sender=_model, dispatch_uid=f'page_cache_save_{_model.__name__}')
+    post_delete.connect(invalidate_cached_pages, sender=_model, dispatch_uid=f'page_cache_delete_{_model.__name__}')
+
+m2m_changed.connect(invalidate_cached_project_pages, sender=Project.language_tags.through)
+m2m_changed.connect(invalidate_cached_project_pages, sender=Project.technology_tags.through)
+
+
+# Поля с загружаемыми изображениями, для которых строятся адаптивные копии
+IMAGE_FIELDS = [
+    (CustomUser, 'avatar'),
+    (Article, 'img'),
+    (ArticleImage, 'image'),
+    (Project, 'img_main'),
+    (SiteSettings, 'owner_photo'),
+]
+
+
+def _file_name(value):
+    return getattr(value, 'name', value) or None
+
+
+def remember_loaded_images(sender, instance, **kwargs):
+    """Имена загруженных изображений, чтобы после замены удалить копии старого файла."""
+    # Через __dict__, чтобы не загружать отложенные поля
+    instance._loaded_images = {
+        field: _file_name(instance.__dict__.get(field)) for model, field in IMAGE_FIELDS if model is sender
+    }
+
+
+def build_image_variants(sender, instance, **kwargs):
+    """Постановка новых изображений в обработку и удаление копий заменённых."""
+    loaded = getattr(instance, '_loaded_images', {})
+    for model, field in IMAGE_FIELDS:
+        if model is not sender:
+            continue
+        current = getattr(instance, field)
+        previous = loaded.get(field)
+        if previous and previous != current.name:
+            transaction.on_commit(lambda source=previous: images.delete_variants(source))
+        loaded[field] = current.name or None
+        images.ensure_variants(current)
+    instance._loaded_images = loaded
+
+
+def remove_image_variants(sender, instance, **kwargs):
+    """Удаление копий вместе с объектом."""
+    for model, field in IMAGE_FIELDS:
+        if model is sender and getattr(instance, field):
+            images.delete_variants(getattr(instance, field).name)
+
+
+for _model, _field in IMAGE_FIELDS:
+    post_init.connect(remember_loaded_images, sender=_model, dispatch_uid=f'image_variants_init_{_model.__name__}')
+    post_save.connect(build_image_variants, sender=_model, dispatch_uid=f'image_variants_save_{_model.__name__}')
+    post_delete.connect(remove_image_variants, sender=_model, dispatch_uid=f'image_variants_delete_{_model.__name__}')
+
+
+@receiver(post_save, sender=ImageVariants)
+def invalidate_pages_with_images(sender, **kwargs):
+    """Страницы с картинками перестраиваются, когда появились копии."""
+    page_cache.invalidate(*{model for model, _ in IMAGE_FIELDS})
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(post_save, sender=Language)
+@receiver(post_delete, sender=Language)
+@receiver(post_save, sender=Technology)
+@receiver(post_delete, sender=Technology)
+@receiver(m2m_changed, sender=Project.language_tags.through)
+@receiver(m2m_changed, sender=Project.technology_tags.through)
+def reset_project_facets(sender, **kwargs):
+    """Сброс кеша фильтров страницы проектов."""
+    invalidate_project_facets()
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def regenerate_sitemap_section(sender, **kwargs):
+    """Перестроение раздела карты сайта после сохранения транзакции."""
+    transaction.on_commit(lambda: sitemaps.regenerate_for(sender))
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def regenerate_feeds(sender, **kwargs):
+    """Перестроение RSS/Atom лент после сохранения транзакции."""
+    transaction.on_commit(feeds.regenerate_if_built)
+
+
+@receiver(post_save, sender=ArticleLike)
+@receiver(post_save, sender=CommentLike)
+def update_vote_counters_on_save(sender, instance, created, **kwargs):
+    """Обновление счётчиков оценок при создании или изменении голоса."""
+    target_model, target_id = vote_target(instance)
+    old_vote = None if created else getattr(instance, '_loaded_is_like', None)
+    adjust_vote_counters(target_model, target_id, old_vote, instance.is_like)
+    instance._loaded_is_like = instance.is_like
+
+
+@receiver(post_delete, sender=ArticleLike)
+@receiver(post_delete, sender=CommentLike)
+def update_vote_counters_on_delete(sender, instance, **kwargs):
+    """Обновление счётчиков оценок при удалении голоса (админка, удаление пользователя)."""
+    if removing_votes():
+        return
+    target_model, target_id = vote_target(instance)
+    adjust_vote_counters(target_model, target_id, instance.is_like, None)
+
+
+@receiver(post_save, sender=Comment)
+def update_comments_count_on_save(sender, instance, created, **kwargs):
+    """Обновление счётчика комментариев при добавлении или модерации."""
+    was_approved = False if created else bool(getattr(instance, '_loaded_is_approved', instance.is_approved))
+    adjust_comments_count(instance.article_id, int(instance.is_approved) - int(was_approved))
+    instance._loaded_is_approved = instance.is_approved
+
+
+@receiver(post_delete, sender=Comment)
+def update_comments_count_on_delete(sender, instance, **kwargs):
+    """Обновление счётчика комментариев при удалении."""
+    if instance.is_approved:
+        adjust_comments_count(instance.article_id, -1)
+
+
 @receiver(post_save, sender=Article)
 def publish_to_social_media(sender, instance, created, **kwargs):
-    """Автоматическая публикация новой статьи в социальные сети."""
+    """Постановка новой статьи в очередь публикации в социальные сети."""
     if not created:
         return
 
@@ -21,89 +201,5 @@ def publish_to_social_media(sender, instance, created, **kwargs):
     if instance.is_achievement:
         return
 
-    # Telegram
-    if settings.TELEGRAM_BOT_TOKEN and settings.TELEGRAM_CHANNEL_ID:
-        try:
-            publish_to_telegram(instance)
-            logger.info(f'Статья "{instance.title}" опубликована в Telegram')
-        except Exception as e:
-            logger.error(f'Ошибка публикации в Telegram: {e}')
-
-    # VK
-    if settings.VK_ACCESS_TOKEN and settings.VK_GROUP_ID:
-        try:
-            publish_to_vk(instance)
-            logger.info(f'Статья "{instance.title}" опубликована в VK')
-        except Exception as e:
-            logger.error(f'Ошибка публикации в VK: {e}')
-
-
-def publish_to_telegram(article):
-    """Публикация статьи в Telegram-канал."""
-    bot_token = settings.TELEGRAM_BOT_TOKEN
-    channel_id = settings.TELEGRAM_CHANNEL_ID
-
-    article_url = f"https://deev.space{article.get_absolute_url()}"
-
-    text = f"📝 *{escape_markdown(article.title)}*\n\n"
-    if article.excerpt:
-        excerpt = article.excerpt[:200] + '...' if len(article.excerpt) > 200 else article.excerpt
-        text += f"{escape_markdown(excerpt)}\n\n"
-    text += f"[Читать полностью]({article_url})"
-
-    if article.img:
-        url = f"https://api.telegram.org/bot{bot_token}/sendPhoto"
-        data = {
-            'chat_id': channel_id,
-            'photo': f"https://deev.space{article.img.url}",
-            'caption': text,
-            'parse_mode': 'Markdown'
-        }
-    else:
-        url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-        data = {
-            'chat_id': channel_id,
-            'text': text,
-            'parse_mode': 'Markdown',
-            'disable_web_page_preview': False
-        }
-
-    response = requests.post(url, data=data, timeout=10)
-    response.raise_for_status()
-
-
-def publish_to_vk(article):
-    """Публикация статьи в группу VKontakte."""
-    access_token = settings.VK_ACCESS_TOKEN
-    group_id = settings.VK_GROUP_ID
-
-    article_url = f"https://deev.space{article.get_absolute_url()}"
-
-    message = f"📝 {article.title}\n\n"
-    if article.excerpt:
-        excerpt = article.excerpt[:300] + '...' if len(article.excerpt) > 300 else article.excerpt
-        message += f"{excerpt}\n\n"
-    message += f"🔗 Читать: {article_url}"
-
-    url = "https://api.vk.com/method/wall.post"
-    params = {
-        'owner_id': f'-{group_id}',
-        'message': message,
-        'from_group': 1,
-        'access_token': access_token,
-        'v': '5.131'
-    }
-
-    if article.img:
-        params['attachments'] = f"https://deev.space{article.img.url}"
-
-    response = requests.post(url, params=params, timeout=10)
-    response.raise_for_status()
-
-
-def escape_markdown(text):
-    """Экранирование специальных символов Markdown."""
-    escape_chars = ['_', '*', '[', ']', '(', ')', '~', '`', '>', '#', '+', '-', '=', '|', '{', '}', '.', '!']
-    for char in escape_chars:
-        text = text.replace(char, f'\\{char}')
-    return text
\ No newline at end of file
+    # Запись в outbox идёт в транзакции сохранения статьи, отправку выполняет drain_outbox
+    enqueue_article(instance)
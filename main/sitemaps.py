@@ -1,6 +1,31 @@
+"""
+Карта сайта, заранее записанная в файлы (settings.SITEMAP_ROOT).
+
+Каждый раздел (SECTIONS) пишется в файлы sitemap-<раздел>-<N>.xml не больше
+SITEMAP_LIMIT ссылок в каждом. Пока ссылок в сумме не больше лимита,
+sitemap.xml содержит их все, иначе становится индексом файлов разделов.
+При сохранении статьи или проекта перестраивается только его раздел,
+sitemap.xml собирается из уже записанных файлов остальных разделов.
+"""
+import json
+import os
+from datetime import timezone as dt_timezone
+from xml.sax.saxutils import escape
+
+from django.conf import settings
 from django.contrib.sitemaps import Sitemap
+from django.http import Http404
 from django.urls import reverse
 from .models import Article, Project
+from .prebuilt import file_etag, file_last_modified, remove, write_atomic
+
+INDEX_NAME = 'sitemap.xml'
+PAGE_NAME = 'sitemap-{section}-{page}.xml'
+STATE_NAME = 'sections.json'
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+URLSET_OPEN = XML_HEADER + '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+URLSET_CLOSE = '</urlset>\n'
 
 
 class ArticleSitemap(Sitemap):
@@ -8,7 +33,7 @@ class ArticleSitemap(Sitemap):
     priority = 0.8
 
     def items(self):
-        return Article.objects.filter(is_published=True)
+        return Article.objects.filter(is_published=True).only('slug', 'updated_at').order_by('-date')
 
     def lastmod(self, obj):
         return obj.updated_at
@@ -22,7 +47,10 @@ class ProjectSitemap(Sitemap):
     priority = 0.7
 
     def items(self):
-        return Project.objects.filter(is_visible=True)
+        return Project.objects.filter(is_visible=True).only('slug', 'updated_at')
+
+    def lastmod(self, obj):
+        return obj.updated_at
 
     def location(self, obj):
         return f'/projects/#{obj.slug}'
@@ -36,4 +64,125 @@ class StaticViewSitemap(Sitemap):
         return ['index', 'about', 'projects', 'blog', 'achievements', 'contacts']
 
     def location(self, item):
-        return reverse(item)
\ No newline at end of file
+        return reverse(item)
+
+
+SECTIONS = {
+    'static': StaticViewSitemap,
+    'articles': ArticleSitemap,
+    'projects': ProjectSitemap,
+}
+SECTION_MODELS = {Article: 'articles', Project: 'projects'}
+
+
+def format_lastmod(value):
+    return value.astimezone(dt_timezone.utc).isoformat(timespec='seconds').replace('+00:00', 'Z')
+
+
+def url_entry(sitemap, item):
+    """Элемент <url> и дата изменения ссылки."""
+    lastmod = sitemap.lastmod(item) if hasattr(sitemap, 'lastmod') else None
+    parts = [f'<loc>{escape(settings.SITE_URL + sitemap.location(item))}</loc>']
+    if lastmod:
+        parts.append(f'<lastmod>{format_lastmod(lastmod)}</lastmod>')
+    parts.append(f'<changefreq>{sitemap.changefreq}</changefreq>')
+    parts.append(f'<priority>{sitemap.priority}</priority>')
+    return f"<url>{''.join(parts)}</url>\n", lastmod
+
+
+def _path(name):
+    return os.path.join(settings.SITEMAP_ROOT, name)
+
+
+def _write(name, content):
+    write_atomic(_path(name), content)
+
+
+def _read_urls(name):
+    with open(_path(name), encoding='utf-8') as f:
+        return f.read()[len(URLSET_OPEN):-len(URLSET_CLOSE)]
+
+
+def load_state():
+    try:
+        with open(_path(STATE_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_section(section):
+    """Запись файлов раздела; возвращает их описание для индекса."""
+    sitemap = SECTIONS[section]()
+    entries = [url_entry(sitemap, item) for item in sitemap.items()]
+    limit = settings.SITEMAP_LIMIT
+    pages = []
+    for start in range(0, len(entries), limit):
+        chunk = entries[start:start + limit]
+        name = PAGE_NAME.format(section=section, page=len(pages) + 1)
+        _write(name, URLSET_OPEN + ''.join(xml for xml, _ in chunk) + URLSET_CLOSE)
+        lastmods = [lastmod for _, lastmod in chunk if lastmod]
+        pages.append({
+            'name': name,
+            'count': len(chunk),
+            'lastmod': format_lastmod(max(lastmods)) if lastmods else None,
+        })
+    return pages
+
+
+def write_index(state):
+    pages = [page for section in SECTIONS for page in state.get(section, [])]
+    if sum(page['count'] for page in pages) <= settings.SITEMAP_LIMIT:
+        content = URLSET_OPEN + ''.join(_read_urls(page['name']) for page in pages) + URLSET_CLOSE
+    else:
+        items = []
+        for page in pages:
+            lastmod = f"<lastmod>{page['lastmod']}</lastmod>" if page['lastmod'] else ''
+            items.append(f"<sitemap><loc>{escape(settings.SITE_URL)}/{page['name']}</loc>{lastmod}</sitemap>\n")
+        content = (
+            XML_HEADER + '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+            + ''.join(items) + '</sitemapindex>\n'
+        )
+    _write(INDEX_NAME, content)
+
+
+def regenerate(*sections):
+    """Перестроение указанных разделов (по умолчанию всех) и sitemap.xml."""
+    os.makedirs(settings.SITEMAP_ROOT, exist_ok=True)
+    state = load_state()
+    for section in sections or SECTIONS:
+        old_pages = {page['name'] for page in state.get(section, [])}
+        state[section] = write_section(section)
+        for name in old_pages - {page['name'] for page in state[section]}:
+            remove(_path(name))
+
+    # Разделы, которых нет в состоянии (первый запуск), строятся целиком
+    for section in SECTIONS:
+        if section not in state:
+            state[section] = write_section(section)
+    write_index(state)
+    _write(STATE_NAME, json.dumps(state, ensure_ascii=False))
+
+
+def regenerate_for(model):
+    """Обновление раздела модели, если карта сайта уже была построена."""
+    if os.path.exists(_path(INDEX_NAME)):
+        regenerate(SECTION_MODELS[model])
+
+
+def sitemap_path(name):
+    """Путь к файлу карты сайта; sitemap.xml строится при первом запросе."""
+    path = _path(name)
+    if not os.path.exists(path):
+        if name != INDEX_NAME:
+            raise Http404
+        regenerate()
+    return path
+
+
+def sitemap_etag(request, name=INDEX_NAME):
+    return file_etag(sitemap_path(name))
+
+
+def sitemap_last_modified(request, name=INDEX_NAME):
+    return file_last_modified(sitemap_path(name))
@@ -0,0 +1,73 @@
+"""
+Профиль SQLite для production.
+
+Каждое новое соединение получает PRAGMA из settings.SQLITE_PRAGMAS: WAL,
+чтобы запись (счётчики, голоса, сессии) не блокировала чтение,
+synchronous=NORMAL, mmap, увеличенный кеш страниц и busy_timeout.
+Соединения переиспользуются между запросами (CONN_MAX_AGE).
+
+Обслуживание базы (PRAGMA optimize, ANALYZE, incremental vacuum, checkpoint
+WAL) выполняет команда sqlite_maintenance, например из cron.
+"""
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def apply_pragmas(cursor, pragmas=None):
+    """Установка PRAGMA для соединения (курсор Django или sqlite3)."""
+    pragmas = settings.SQLITE_PRAGMAS if pragmas is None else pragmas
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def configure_connection(connection):
+    """Обработчик connection_created: только для соединений с SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor)
+
+
+def get_pragma(cursor, name):
+    cursor.execute(f'PRAGMA {name}')
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def maintain(connection, vacuum_pages=None, full_vacuum=False):
+    """
+    Обслуживание базы. Возвращает словарь с выполненными шагами.
+
+    incremental_vacuum работает только при auto_vacuum=INCREMENTAL; режим
+    включается на существующей базе полным VACUUM (full_vacuum=True),
+    который блокирует базу на время перестройки файла.
+    """
+    report = {}
+    with connection.cursor() as cursor:
+        if full_vacuum and get_pragma(cursor, 'auto_vacuum') != AUTO_VACUUM_INCREMENTAL:
+            cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            cursor.execute('VACUUM')
+            report['vacuum'] = True
+
+        cursor.execute('ANALYZE')
+        cursor.execute('PRAGMA optimize')
+        report['analyze'] = True
+
+        if get_pragma(cursor, 'auto_vacuum') == AUTO_VACUUM_INCREMENTAL:
+            free_pages = get_pragma(cursor, 'freelist_count')
+            pages = free_pages if vacuum_pages is None else min(vacuum_pages, free_pages)
+            if pages:
+                cursor.execute(f'PRAGMA incremental_vacuum({int(pages)})')
+            report['freed_pages'] = pages
+        else:
+            report['freed_pages'] = None
+
+        if get_pragma(cursor, 'journal_mode') == 'wal':
+            cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            report['checkpoint'] = cursor.fetchone()
+    return report
@@ -0,0 +1,86 @@
+import gzip
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import brotli
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+from . import bundles
+
+# Расширения сжатых копий в порядке предпочтения при отдаче
+ENCODINGS = {'br': '.br', 'gzip': '.gz'}
+
+
+def compress_file(path):
+    """
+    Запись сжатых копий файла рядом с ним (.br и .gz).
+
+    Копия не создаётся, если она не меньше исходного файла. Возвращает
+    список записанных путей; функция выполняется в отдельном процессе.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    written = []
+    for suffix, content in (
+        (ENCODINGS['br'], brotli.compress(data, quality=11)),
+        (ENCODINGS['gzip'], gzip.compress(data, compresslevel=9, mtime=0)),
+    ):
+        if len(content) < len(data):
+            with open(path + suffix, 'wb') as f:
+                f.write(content)
+            written.append(path + suffix)
+    return written
+
+
+class BundledManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage, который перед хешированием собирает бандлы
+    страниц из уже скопированных файлов (settings.STATIC_BUNDLES).
+
+    Бандлы хешируются и попадают в манифест как обычные файлы, поэтому
+    {% static 'css/core.bundle.css' %} возвращает имя с хешем содержимого.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            for name, content in bundles.build_bundles(self.open):
+                if self.exists(name):
+                    self.delete(name)
+                self.save(name, ContentFile(content.encode('utf-8')))
+                paths[name] = (self, name)
+        yield from super().post_process(paths, dry_run, **options)
+
+
+class CompressedManifestStaticFilesStorage(BundledManifestStaticFilesStorage):
+    """
+    Дополнительно создаёт .br и .gz копии хешированных файлов, которые
+    отдаёт main.middleware.StaticFilesMiddleware.
+
+    Сжатие выполняется пулом процессов после хеширования всех файлов.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed = {}
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed[name] = hashed_name
+            yield name, hashed_name, processed
+
+        if dry_run:
+            return
+        targets = [
+            self.path(hashed_name) for hashed_name in hashed.values()
+            if self.should_compress(hashed_name)
+        ]
+        with ProcessPoolExecutor(max_workers=settings.STATIC_COMPRESS_WORKERS) as pool:
+            for _ in pool.map(compress_file, targets, chunksize=8):
+                pass
+
+    def should_compress(self, name):
+        return (
+            os.path.splitext(name)[1].lower() in settings.STATIC_COMPRESS_EXTENSIONS
+            and self.size(name) >= settings.STATIC_COMPRESS_MIN_SIZE
+        )
@@ -1,7 +1,15 @@
 from django import template
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.templatetags.static import static
+from django.forms.utils import flatatt
+from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 import re, math
 
+from main.bundles import bundle_path, get_sources
+from main.images import MIME_TYPES, get_metadata as get_image_metadata
+
 register = template.Library()
 
 
@@ -138,4 +146,58 @@ def reading_time(text, words_per_minute=200):
 
     # Расчет минут с округлением вверх
     minutes = math.ceil(word_count / words_per_minute)
-    return max(1, minutes)  # минимум 1 минута
\ No newline at end of file
+    return max(1, minutes)  # минимум 1 минута
+
+
+@register.simple_tag
+def responsive_image(image, sizes='100vw', alt='', css_class='', loading='lazy'):
+    """
+    <picture> с AVIF/WebP-копиями, srcset/sizes и размерами оригинала.
+
+    Пока копии не созданы, выводится обычный <img> с исходным файлом.
+    """
+    if not image:
+        return ''
+
+    attrs = {'src': image.url, 'alt': alt, 'class': css_class, 'loading': loading, 'decoding': 'async'}
+    metadata = get_image_metadata(image.name)
+    if not metadata:
+        return format_html('<img{}>', flatatt({k: v for k, v in attrs.items() if v}))
+
+    sources = []
+    for fmt in settings.IMAGE_VARIANT_FORMATS:
+        srcset = ', '.join(
+            f"{default_storage.url(v['name'])} {v['width']}w" for v in metadata['variants'] if v['format'] == fmt
+        )
+        if srcset:
+            sources.append(format_html(
+                '<source type="{}" srcset="{}" sizes="{}">', MIME_TYPES[fmt], srcset, sizes
+            ))
+
+    # Запасной src — самая крупная копия в последнем формате (WebP), а не оригинал
+    fallback = [v for v in metadata['variants'] if v['format'] == settings.IMAGE_VARIANT_FORMATS[-1]]
+    if fallback:
+        attrs['src'] = default_storage.url(max(fallback, key=lambda v: v['width'])['name'])
+    attrs.update(width=metadata['width'], height=metadata['height'])
+    if metadata['placeholder'] and loading == 'lazy':
+        attrs['style'] = f"background: url({metadata['placeholder']}) center / cover no-repeat"
+    img = format_html('<img{}>', flatatt({k: v for k, v in attrs.items() if v}))
+    return format_html('<picture>{}{}</picture>', mark_safe(''.join(sources)), img)
+
+
+BUNDLE_TAGS = {
+    'css': '<link rel="stylesheet" href="{}">',
+    'js': '<script src="{}"></script>',
+}
+
+
+@register.simple_tag
+def bundle(name, kind):
+    """
+    Подключение бандла страницы из settings.STATIC_BUNDLES.
+
+    В режиме DEBUG подключаются исходные файлы, иначе — собранный при
+    collectstatic бандл с хешем в имени.
+    """
+    paths = get_sources(name, kind) if settings.DEBUG else [bundle_path(name, kind)]
+    return mark_safe('\n'.join(format_html(BUNDLE_TAGS[kind], static(path)) for path in paths))
@@ -1,3 +1,1592 @@
-from django.test import TestCase
+import hashlib
+import importlib
+import io
+import json
+import os
+import shutil
+import socketserver
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock, skipUnless
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+import brotli
+from django.core.paginator import Paginator
+from django.core.cache import caches
+from django.db.models import Count, Q, QuerySet
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import Context, Template
+from PIL import Image
+from django.apps import apps
+from django.contrib import admin
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.views import View
+
+from .admin import ContactMessageAdmin, OutboxMessageAdmin
+from .comment_tree import load_comment_tree
+from .counters import remove_vote, toggle_vote
+from .db_router import PIN_COOKIE, ReplicaReadMixin, ReplicaRouter, read_from_replica
+from .middleware import ReplicaPinMiddleware
+from .view_counter import ViewCounterBuffer, count_view, view_buffer
+from .views import AchievementsView, BlogView, ProjectsView
+from . import (
+    bundles, captcha, highlight, link_preview, mail_queue, outbox, page_cache, ratelimit, search, sqlite
+)
+from .models import (
+    Article, ArticleLike, ArticleLink, Category, Comment, CommentLike, ContactMessage, CustomUser, Education,
+    ImageVariants, Language, OutboxMessage, Project, ProjectStatus, SiteSettings, Technology
+)
+
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-default'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-shared'},
+    'state': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-state'},
+    'throttle': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-throttle'},
+}
+
+
+def isolated_caches(test, *aliases):
+    """TEST_CACHES с отдельным хранилищем для указанных алиасов на время теста."""
+    return {**TEST_CACHES, **{
+        alias: {**TEST_CACHES[alias], 'LOCATION': f'{alias}-{test.id()}'} for alias in aliases
+    }}
+
+BROWSER_UA = 'Mozilla/5.0 (X11; Linux x86_64) Firefox/128.0'
+
+
+@override_settings(CACHES=TEST_CACHES, VIEW_COUNTER_FLUSH_THRESHOLD=3, VIEW_COUNTER_FLUSH_INTERVAL=3600)
+class ViewCounterTests(TestCase):
+    def setUp(self):
+        self.article = Article.objects.create(title='Просмотры', post='<p>Текст</p>')
+        self.buffer = ViewCounterBuffer()
+        self.addCleanup(self.buffer.flush)
+
+    def views(self):
+        self.article.refresh_from_db(fields=['views'])
+        return self.article.views
+
+    def request(self, session_key=None, user_agent=BROWSER_UA):
+        request = RequestFactory().get('/', HTTP_USER_AGENT=user_agent)
+        if session_key:
+            request.COOKIES[settings.SESSION_COOKIE_NAME] = session_key
+        return request
+
+    def test_flush_on_threshold(self):
+        self.buffer.add(self.article.pk)
+        self.buffer.add(self.article.pk)
+        self.assertEqual(self.views(), 0)
+        self.assertEqual(self.buffer.pending(self.article.pk), 2)
+
+        self.buffer.add(self.article.pk)
+        self.assertEqual(self.views(), 3)
+        self.assertEqual(self.buffer.pending(self.article.pk), 0)
+
+    def test_flush_on_interval(self):
+        with override_settings(VIEW_COUNTER_FLUSH_INTERVAL=0):
+            self.buffer.add(self.article.pk)
+        self.assertEqual(self.views(), 1)
+
+    def test_failed_update_is_requeued(self):
+        self.buffer.add(self.article.pk, 2)
+        with mock.patch('django.db.models.QuerySet.update', side_effect=DatabaseError('database is locked')), \
+                self.assertLogs('main.view_counter', 'ERROR'):
+            self.assertEqual(self.buffer.flush(), 0)
+        self.assertEqual(self.buffer.pending(self.article.pk), 2)
+
+        self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(self.views(), 2)
+
+    def test_crawlers_and_repeat_views_not_counted(self):
+        self.addCleanup(view_buffer.flush)
+        self.assertFalse(count_view(self.request('bot', 'Mozilla/5.0 (compatible; Googlebot/2.1)'), self.article))
+        self.assertFalse(count_view(self.request('script', 'python-requests/2.32'), self.article))
+        self.assertEqual(view_buffer.pending(self.article.pk), 0)
+
+        self.assertTrue(count_view(self.request('first'), self.article))
+        self.assertFalse(count_view(self.request('first'), self.article))
+        self.assertTrue(count_view(self.request('second'), self.article))
+        self.assertEqual(view_buffer.pending(self.article.pk), 2)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CounterTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create(username='voter')
+        self.other = CustomUser.objects.create(username='other')
+        self.article = Article.objects.create(title='Счётчики', post='<p>Текст</p>')
+        self.comment = Comment.objects.create(article=self.article, user=self.user, content='Комментарий')
+
+    def counts(self, obj):
+        obj.refresh_from_db()
+        counts = [obj.likes_count, obj.dislikes_count]
+        if isinstance(obj, Article):
+            counts.append(obj.comments_count)
+        return counts
+
+    def test_votes_update_counters(self):
+        ArticleLike.objects.create(article=self.article, user=self.user, is_like=True)
+        ArticleLike.objects.create(article=self.article, user=self.other, is_like=False)
+        CommentLike.objects.create(comment=self.comment, user=self.user, is_like=True)
+        self.assertEqual(self.counts(self.article), [1, 1, 1])
+        self.assertEqual(self.counts(self.comment), [1, 0])
+
+        # Загруженный голос помнит прежнее значение и переносится между счётчиками
+        vote = ArticleLike.objects.get(user=self.user)
+        vote.is_like = False
+        vote.save()
+        self.assertEqual(self.counts(self.article), [0, 2, 1])
+
+        vote.delete()
+        self.assertEqual(self.counts(self.article), [0, 1, 1])
+
+    def test_toggle_vote(self):
+        self.assertEqual(toggle_vote(ArticleLike, self.article, self.user, True), (True, 1, 0))
+        self.assertEqual(toggle_vote(ArticleLike, self.article, self.user, False), (False, 0, 1))
+        self.assertEqual(toggle_vote(ArticleLike, self.article, self.user, False), (None, 0, 0))
+        self.assertEqual(toggle_vote(CommentLike, self.comment, self.user, True), (True, 1, 0))
+
+    def test_concurrent_removal_counted_once(self):
+        ArticleLike.objects.create(article=self.article, user=self.user, is_like=True)
+        # Два запроса успели прочитать один и тот же голос
+        first = ArticleLike.objects.get(user=self.user)
+        second = ArticleLike.objects.get(user=self.user)
+        self.assertTrue(remove_vote(first))
+        self.assertFalse(remove_vote(second))
+        self.assertEqual(self.counts(self.article), [0, 0, 1])
+
+    def test_comment_moderation(self):
+        hidden = Comment.objects.create(article=self.article, user=self.user, content='Спам', is_approved=False)
+        self.assertEqual(self.counts(self.article)[2], 1)
+
+        hidden.is_approved = True
+        hidden.save()
+        self.assertEqual(self.counts(self.article)[2], 2)
+
+        hidden = Comment.objects.get(pk=hidden.pk)
+        hidden.is_approved = False
+        hidden.save()
+        self.assertEqual(self.counts(self.article)[2], 1)
+
+        self.comment.delete()
+        self.assertEqual(self.counts(self.article)[2], 0)
+
+    def test_rebuild_counters(self):
+        ArticleLike.objects.create(article=self.article, user=self.user, is_like=True)
+        CommentLike.objects.create(comment=self.comment, user=self.other, is_like=False)
+        Article.objects.update(likes_count=7, dislikes_count=3, comments_count=0)
+        Comment.objects.update(likes_count=5, dislikes_count=0)
+
+        call_command('rebuild_counters', stdout=io.StringIO())
+        self.assertEqual(self.counts(self.article), [1, 0, 1])
+        self.assertEqual(self.counts(self.comment), [0, 1])
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Индекс FTS5 только для SQLite')
+@override_settings(CACHES=TEST_CACHES)
+class SearchTests(TestCase):
+    def search(self, query):
+        return search.search_articles(Article.objects.filter(is_published=True, is_achievement=False), query)
+
+    def indexed(self, article_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT title FROM {search.FTS_TABLE} WHERE rowid = %s', [article_id])
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    def test_stemmed_prefix_matching(self):
+        self.assertEqual(search.stem_russian('программирование'), search.stem_russian('программированию'))
+        self.assertEqual(search.build_match_query('Программирование, и Ёлка'), '"программирован"* "елк"*')
+        self.assertEqual(search.build_match_query('о Python и C'), '"python"*')
+        self.assertEqual(search.build_match_query('и на в'), '')
+
+        article = Article.objects.create(title='Заметки', post='<p>Советы по программированию на Python</p>')
+        for query in ('программирование', 'программирования', 'ПРОГРАММИРОВАНИЕ'):
+            self.assertEqual([a.pk for a in self.search(query)[:10]], [article.pk], query)
+        self.assertEqual(len(self.search('кулинария')), 0)
+        # Запрос из одних стоп-слов ничего не находит, а не выдаёт все статьи подряд
+        self.assertEqual(len(self.search('и на')), 0)
+
+    def test_title_hits_ranked_above_body_hits(self):
+        body = Article.objects.create(title='Заметки', post='<p>Немного про Django и про Django ORM</p>')
+        title = Article.objects.create(title='Django в продакшене', post='<p>Настройка сервера</p>')
+        self.assertEqual([a.pk for a in self.search('django')[:10]], [title.pk, body.pk])
+
+    def test_snippet_is_escaped(self):
+        Article.objects.create(title='<script>alert(1)</script> Django', post='')
+        snippet = self.search('django')[0].search_snippet
+        self.assertNotIn('<script>', snippet)
+        self.assertIn('&lt;script&gt;', snippet)
+        self.assertIn('<mark>Django</mark>', snippet)
+
+    def test_pagination(self):
+        for number in range(12):
+            Article.objects.create(title=f'Статья {number}', post='<p>Про кеширование</p>')
+        Article.objects.create(title='Черновик', post='<p>Про кеширование</p>', is_published=False)
+
+        page = Paginator(self.search('кеширование'), 5).page(3)
+        self.assertEqual(page.paginator.count, 12)
+        self.assertEqual(page.paginator.num_pages, 3)
+        self.assertEqual(len(page.object_list), 2)
+
+    def test_index_follows_saves_and_deletes(self):
+        article = Article.objects.create(title='Первый заголовок', post='')
+        self.assertEqual(self.indexed(article.pk), 'Первый заголовок')
+
+        article.title = 'Второй заголовок'
+        article.save()
+        self.assertEqual(self.indexed(article.pk), 'Второй заголовок')
+        self.assertEqual(len(self.search('первый')), 0)
+
+        pk = article.pk
+        article.delete()
+        self.assertIsNone(self.indexed(pk))
+
+    def test_rebuild_command(self):
+        article = Article.objects.create(title='Старое', post='')
+        # update() не вызывает сигналы, и индекс отстаёт от базы
+        Article.objects.filter(pk=article.pk).update(title='Новое')
+        self.assertEqual(len(self.search('новое')), 0)
+
+        out = io.StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('1', out.getvalue())
+        self.assertEqual(len(self.search('новое')), 1)
+
+    def test_fallback_without_fts(self):
+        Article.objects.create(title='Кеширование страниц', post='')
+        with connection.cursor() as cursor:
+            cursor.execute(search.DROP_TABLE_SQL)
+        self.assertFalse(search.is_available())
+
+        # Сигналы не падают без индекса, поиск идёт по подстроке
+        Article.objects.create(title='Кеширование запросов', post='')
+        results = self.search('Кеширование')
+        self.assertIsInstance(results, QuerySet)
+        self.assertEqual(results.count(), 2)
+
+    def test_search_uses_fts_index(self):
+        for number in range(5):
+            Article.objects.create(title=f'Статья {number}', post='<p>Про индексы</p>')
+        results = self.search('индексы')
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(len(results), 5)
+            self.assertEqual(len(results[:3]), 3)
+        # COUNT по индексу, страница из индекса и статьи по первичному ключу
+        self.assertEqual(len(ctx), 3)
+        self.assertFalse(any('LIKE' in query['sql'] for query in ctx.captured_queries))
+
+        where, params = results._filter_sql()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN SELECT rowid FROM {search.FTS_TABLE} WHERE {where}', params)
+            plan = [row[-1] for row in cursor.fetchall()]
+        self.assertTrue(any(step.startswith(f'SCAN {search.FTS_TABLE} VIRTUAL TABLE INDEX') for step in plan), plan)
+        self.assertEqual([step for step in plan if step.startswith('SCAN ') and 'INDEX' not in step], [], plan)
+
+
+@override_settings(
+    CACHES=TEST_CACHES,
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+)
+class CommentTreeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create(username='reader')
+        cls.article = Article.objects.create(title='Дерево комментариев', post='<p>Текст</p>')
+        SiteSettings.load()
+
+    def _add_thread(self, size):
+        for _ in range(size):
+            root = Comment.objects.create(article=self.article, user=self.user, content='Корень')
+            reply = Comment.objects.create(article=self.article, user=self.user, content='Ответ', parent=root)
+            Comment.objects.create(article=self.article, user=self.user, content='Ответ 2', parent=reply)
+
+    def _page_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.article.get_absolute_url(), secure=True)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx)
+
+    def test_tree_order_and_depth(self):
+        first = Comment.objects.create(article=self.article, user=self.user, content='Первый')
+        second = Comment.objects.create(article=self.article, user=self.user, content='Второй')
+        reply = Comment.objects.create(article=self.article, user=self.user, content='Ответ', parent=first)
+        nested = Comment.objects.create(article=self.article, user=self.user, content='Ещё', parent=reply)
+        Comment.objects.create(article=self.article, user=self.user, content='Скрыт', is_approved=False)
+
+        with self.assertNumQueries(1):
+            comments = load_comment_tree(self.article)
+
+        self.assertEqual([c.pk for c in comments], [second.pk, first.pk, reply.pk, nested.pk])
+        self.assertEqual([c.depth for c in comments], [0, 0, 1, 2])
+        self.assertEqual([len(c.tree_closes) for c in comments], [0, 0, 0, 2])
+
+    def test_page_queries_do_not_grow_with_thread(self):
+        self._add_thread(2)
+        self._page_queries()
+        small = self._page_queries()
+        self._add_thread(30)
+        self.assertEqual(self._page_queries(), small)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class VoteStateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create(username='reader')
+        cls.article = Article.objects.create(title='Оценки', post='<p>Текст</p>')
+        cls.comments = [
+            Comment.objects.create(article=cls.article, user=cls.user, content=f'Комментарий {n}') for n in range(3)
+        ]
+        cls.url = f'/api/article/{cls.article.pk}/votes/'
+
+    def _post(self, data):
+        return self.client.post(self.url, json.dumps(data), content_type='application/json', secure=True)
+
+    def test_state_is_read_with_one_query(self):
+        self.assertEqual(self.client.get(self.url, secure=True).json()['comments'], {})
+
+        self.client.force_login(self.user)
+        first, second, _ = self.comments
+        ArticleLike.objects.create(article=self.article, user=self.user, is_like=False)
+        CommentLike.objects.create(comment=first, user=self.user, is_like=True)
+        CommentLike.objects.create(comment=second, user=self.user, is_like=False)
+        self.client.get(self.url, secure=True)
+
+        with self.assertNumQueries(3):  # сессия, пользователь, голоса
+            data = self.client.get(self.url, secure=True).json()
+        self.assertIs(data['article'], False)
+        self.assertEqual(data['comments'], {str(first.pk): True, str(second.pk): False})
+
+    def test_batch_write_sets_votes_and_counters(self):
+        self.client.force_login(self.user)
+        first, second, third = self.comments
+        CommentLike.objects.create(comment=third, user=self.user, is_like=True)
+
+        response = self._post({
+            'article': True,
+            'comments': {str(first.pk): True, str(second.pk): False, str(third.pk): None},
+        })
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertIs(data['article'], True)
+        self.assertEqual(data['comments'], {str(first.pk): True, str(second.pk): False})
+        self.assertEqual(data['counts']['article'], {'likes': 1, 'dislikes': 0})
+        self.assertEqual(data['counts']['comments'][str(third.pk)], {'likes': 0, 'dislikes': 0})
+
+        # Повтор той же оценки её не снимает, в отличие от переключателей
+        self.assertIs(self._post({'article': True}).json()['article'], True)
+
+    def test_batch_with_foreign_comment_is_rejected_entirely(self):
+        self.client.force_login(self.user)
+        other = Article.objects.create(title='Другая', post='<p>Текст</p>')
+        foreign = Comment.objects.create(article=other, user=self.user, content='Чужой')
+        response = self._post({'article': True, 'comments': {str(foreign.pk): True}})
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(ArticleLike.objects.exists())
+        self.assertEqual(self._post({'comments': {str(self.comments[0].pk): 1}}).status_code, 400)
+
+
+@override_settings(
+    CACHES=TEST_CACHES,
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    RATE_LIMITS={'vote': {'user': '3/m', 'ip': '5/m'}, 'login': {'ip': '2/h'}, 'contact': {'ip': '2/h'}},
+)
+class RateLimitTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create(username='reader')
+        cls.article = Article.objects.create(title='Лимиты', post='<p>Текст</p>')
+
+    def setUp(self):
+        lock_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, lock_dir)
+        # Корзины привязаны к id пользователя, а id повторяются в разных тестах
+        overrides = override_settings(
+            RATE_LIMIT_LOCK_FILE=f'{lock_dir}/ratelimit.lock', CACHES=isolated_caches(self, 'throttle')
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def _vote(self, ip):
+        return self.client.post(
+            f'/api/article/{self.article.pk}/like/', '{"is_like": true}',
+            content_type='application/json', secure=True, REMOTE_ADDR=ip,
+        )
+
+    def test_user_bucket_follows_account(self):
+        self.client.force_login(self.user)
+        for _ in range(3):
+            self.assertEqual(self._vote('10.0.0.1').status_code, 200)
+
+        response = self._vote('10.0.0.2')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+        self.assertFalse(response.json()['success'])
+
+        # Повторный вход не даёт новой корзины
+        self.client = self.client_class()
+        self.client.force_login(self.user)
+        self.assertEqual(self._vote('10.0.0.3').status_code, 429)
+
+        # Другой пользователь с того же адреса расходует свою корзину
+        self.client = self.client_class()
+        self.client.force_login(CustomUser.objects.create(username='writer'))
+        self.assertEqual(self._vote('10.0.0.2').status_code, 200)
+
+    def test_ip_rejection_without_database_access(self):
+        for username, votes in (('first', 3), ('second', 2)):
+            self.client = self.client_class()
+            self.client.force_login(CustomUser.objects.create(username=username))
+            for _ in range(votes):
+                self.assertEqual(self._vote('10.0.2.1').status_code, 200)
+
+        with self.assertNumQueries(0):
+            response = self._vote('10.0.2.1')
+        self.assertEqual(response.status_code, 429)
+
+    def test_ip_bucket_covers_requests_without_session(self):
+        for _ in range(2):
+            self.client.post('/login/', {'username': 'reader', 'password': 'x'}, secure=True, REMOTE_ADDR='10.0.1.1')
+        response = self.client.post('/login/', {'username': 'reader'}, secure=True, REMOTE_ADDR='10.0.1.1')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Content-Type'], 'text/plain; charset=utf-8')
+        # Без cookie сессии лимит по IP тот же
+        response = self.client_class().post('/login/', {'username': 'reader'}, secure=True, REMOTE_ADDR='10.0.1.1')
+        self.assertEqual(response.status_code, 429)
+        # Страница входа по GET не ограничивается
+        self.assertEqual(self.client.get('/login/', secure=True, REMOTE_ADDR='10.0.1.1').status_code, 200)
+
+    def test_contact_form_is_limited_before_captcha(self):
+        def post():
+            return self.client.post(
+                '/contacts/', {'name': 'Гость', 'captcha': 'token'}, secure=True,
+                REMOTE_ADDR='10.0.3.1', HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+            )
+
+        with mock.patch('main.captcha.verify', return_value=False) as verify:
+            for _ in range(2):
+                self.assertEqual(post().status_code, 400)
+            self.assertEqual(post().status_code, 429)
+        self.assertEqual(verify.call_count, 2)
+
+    def test_bucket_is_consistent_under_concurrency(self):
+        results = []
+
+        def worker():
+            results.append(ratelimit.take('ratelimit:test:concurrent', '5/h'))
+
+        threads = [threading.Thread(target=worker) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count(0), 5)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Профиль только для SQLite')
+@override_settings(CACHES=TEST_CACHES)
+class SQLiteProfileTests(TestCase):
+    def test_connection_pragmas(self):
+        with connection.cursor() as cursor:
+            self.assertEqual(sqlite.get_pragma(cursor, 'synchronous'), 1)  # NORMAL
+            self.assertEqual(sqlite.get_pragma(cursor, 'busy_timeout'), settings.SQLITE_PRAGMAS['busy_timeout'])
+            self.assertEqual(sqlite.get_pragma(cursor, 'cache_size'), settings.SQLITE_PRAGMAS['cache_size'])
+
+    def test_maintenance_command(self):
+        out = io.StringIO()
+        call_command('sqlite_maintenance', stdout=out)
+        self.assertIn('Обслуживание', out.getvalue())
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN есть только в SQLite')
+@override_settings(CACHES=TEST_CACHES)
+class QueryPlanTests(TestCase):
+    """Горячие запросы страниц не должны читать таблицы целиком."""
+
+    def explain(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertUsesIndex(self, queryset, index_name=None):
+        plan = self.explain(queryset)
+        # «SCAN main_article» без USING INDEX — полный проход по таблице;
+        # SCAN по частичному индексу читает только подходящие строки в нужном порядке
+        scans = [step for step in plan if step.startswith('SCAN ') and 'USING' not in step]
+        self.assertEqual(scans, [], plan)
+        if index_name:
+            self.assertTrue(any(f'INDEX {index_name}' in step for step in plan), plan)
+
+    def view(self, view_class, **kwargs):
+        view = view_class()
+        view.setup(RequestFactory().get('/'), **kwargs)
+        return view
+
+    def test_article_lists(self):
+        self.assertUsesIndex(self.view(BlogView).get_queryset(), 'article_published_date_idx')
+        self.assertUsesIndex(
+            Article.objects.filter(is_published=True, is_achievement=False).select_related('category')[:3],
+            'article_published_date_idx'
+        )
+        self.assertUsesIndex(self.view(AchievementsView).get_queryset(), 'article_achievement_date_idx')
+        self.assertUsesIndex(
+            self.view(BlogView, category_slug='python').get_queryset(), 'article_category_date_idx'
+        )
+        self.assertUsesIndex(
+            Article.objects.filter(is_published=True, is_achievement=False, category_id=1).exclude(pk=1)[:3],
+            'article_category_date_idx'
+        )
+        self.assertUsesIndex(
+            Category.objects.annotate(
+                count=Count('articles', filter=Q(articles__is_published=True, articles__is_achievement=False))
+            ).filter(count__gt=0)
+        )
+
+    def test_projects(self):
+        self.assertUsesIndex(
+            Project.objects.filter(is_visible=True, show_on_homepage=True).order_by(
+                'homepage_order', 'order', '-date'
+            )[:6],
+            'project_homepage_idx'
+        )
+        self.assertUsesIndex(self.view(ProjectsView).get_queryset(), 'project_visible_order_idx')
+
+    def test_comments_and_votes(self):
+        self.assertUsesIndex(
+            Comment.objects.filter(article_id=1, is_approved=True).select_related('user').order_by('created_at'),
+            'comment_article_tree_idx'
+        )
+        # Подзапросы rebuild_counters для одной статьи/комментария
+        self.assertUsesIndex(
+            ArticleLike.objects.filter(article_id=1, is_like=True).order_by().values('article').annotate(
+                total=Count('pk')
+            ).values('total'),
+            'articlelike_article_vote_idx'
+        )
+        self.assertUsesIndex(
+            CommentLike.objects.filter(comment_id=1, is_like=False).order_by().values('comment').annotate(
+                total=Count('pk')
+            ).values('total'),
+            'commentlike_comment_vote_idx'
+        )
+
+
+class ReplicaProbeView(ReplicaReadMixin, View):
+    def get(self, request):
+        return HttpResponse(ReplicaRouter().db_for_read(Article) or 'default')
+
+    post = get
+
+
+@override_settings(CACHES=TEST_CACHES, REPLICA_DB_ALIAS='replica')
+class ReplicaRouterTests(TestCase):
+    def test_routing(self):
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Article))
+        with read_from_replica():
+            self.assertEqual(router.db_for_read(Article), 'replica')
+            # Пользователи и сессии не зависят от отставания реплики
+            self.assertIsNone(router.db_for_read(CustomUser))
+            self.assertEqual(router.db_for_write(Article), 'default')
+        self.assertIs(router.allow_migrate('replica', 'main'), False)
+
+        with override_settings(REPLICA_DB_ALIAS=None), read_from_replica():
+            self.assertIsNone(router.db_for_read(Article))
+
+    def test_views_read_from_primary_after_writes(self):
+        factory = RequestFactory()
+        view = ReplicaProbeView.as_view()
+        self.assertEqual(view(factory.get('/')).content, b'replica')
+        self.assertEqual(view(factory.post('/')).content, b'default')
+
+        request = factory.get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        self.assertEqual(view(request).content, b'default')
+
+        response = ReplicaPinMiddleware(lambda request: HttpResponse())(factory.post('/'))
+        self.assertIn(PIN_COOKIE, response.cookies)
+        response = ReplicaPinMiddleware(lambda request: HttpResponse())(factory.get('/'))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SiteSettingsCacheTests(TestCase):
+    def test_cached_settings_cost_no_queries(self):
+        SiteSettings.get_cached()
+        with self.assertNumQueries(0):
+            SiteSettings.get_cached()
+
+    def test_save_invalidates_cached_settings(self):
+        SiteSettings.get_cached()
+        settings_obj = SiteSettings.load()
+        settings_obj.owner_name = 'Новое имя'
+        with self.captureOnCommitCallbacks(execute=True):
+            settings_obj.save()
+        self.assertEqual(SiteSettings.get_cached().owner_name, 'Новое имя')
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ProjectTagTests(TestCase):
+    def create(self, title, languages='', technologies=''):
+        return Project.objects.create(
+            title=title, short_description='Кратко', description='Описание',
+            programming_languages=languages, technologies=technologies
+        )
+
+    def test_tags_follow_text_fields(self):
+        project = self.create('Сайт', 'Python, JavaScript', 'Django, MongoDB')
+        self.create('Бот', 'python', 'Go')
+        self.assertEqual(Language.objects.get(key='python').projects.count(), 2)
+        self.assertEqual(sorted(project.technology_tags.values_list('key', flat=True)), ['django', 'mongodb'])
+
+        project.technologies = 'Django'
+        project.save()
+        self.assertEqual(list(project.technology_tags.values_list('key', flat=True)), ['django'])
+
+    def test_filter_by_tag_key_is_exact(self):
+        self.create('Сайт', 'Python', 'Django, MongoDB')
+        self.create('Бот', 'Go', 'Go')
+        projects = Project.objects.filter(technology_tags__key=Technology.make_key(' GO '))
+        self.assertEqual([p.title for p in projects], ['Бот'])
+
+    def test_data_migration_backfills_tags(self):
+        first = self.create('Сайт', 'Python', 'Django')
+        second = self.create('Бот', 'python, Go', '')
+        Project.language_tags.through.objects.all().delete()
+        Project.technology_tags.through.objects.all().delete()
+        Language.objects.all().delete()
+
+        migration = importlib.import_module('main.migrations.0007_project_tags')
+        migration.backfill_tags(apps, None)
+
+        self.assertEqual(list(first.language_tags.values_list('key', flat=True)), ['python'])
+        self.assertEqual(sorted(second.language_tags.values_list('key', flat=True)), ['go', 'python'])
+        self.assertEqual(Language.objects.filter(key='python').count(), 1)
+        self.assertEqual(list(first.technology_tags.values_list('key', flat=True)), ['django'])
+
+
+@override_settings(
+    CACHES=TEST_CACHES,
+    PAGE_CACHE_ENABLED=False,
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+)
+class ProjectsViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.release = ProjectStatus.objects.create(name='Релиз', is_release=True)
+        cls.beta = ProjectStatus.objects.create(name='Бета')
+        SiteSettings.load()
+
+    def _add_projects(self, count):
+        for i in range(count):
+            Project.objects.create(
+                title=f'Проект {Project.objects.count()}', short_description='Кратко', description='Описание',
+                programming_languages='Python, Go', technologies='Django, MongoDB',
+                status=(self.release, self.beta, None)[i % 3]
+            )
+
+    def test_projects_are_split_by_release_status(self):
+        self._add_projects(3)
+        response = self.client.get('/projects/', secure=True)
+        self.assertEqual([p.status for p in response.context['completed_projects']], [self.release])
+        self.assertEqual(len(response.context['dev_projects']), 2)
+
+    def test_project_queries_are_constant(self):
+        self._add_projects(3)
+        self.client.get('/projects/', secure=True)
+        with self.assertNumQueries(1):
+            self.client.get('/projects/', secure=True)
+
+        self._add_projects(30)
+        self.client.get('/projects/', secure=True)
+        with self.assertNumQueries(1):
+            self.client.get('/projects/?tech=go&status=completed', secure=True)
+
+    def test_technology_filter_is_exact(self):
+        self._add_projects(1)
+        Project.objects.create(
+            title='Бот', short_description='Кратко', description='Описание', technologies='Go'
+        )
+        response = self.client.get('/projects/?tech=go', secure=True)
+        self.assertEqual([p.title for p in response.context['projects']], ['Бот'])
+
+
+@override_settings(
+    CACHES=TEST_CACHES,
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+)
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Article.objects.create(title='Статья', post='<p>Текст</p>')
+        SiteSettings.load()
+
+    def setUp(self):
+        caches['shared'].clear()
+        page_cache.reset_stats()
+
+    def _get(self, url):
+        return self.client.get(url, secure=True)
+
+    def test_anonymous_page_is_served_from_cache(self):
+        self.assertEqual(self._get('/blog/')['X-Page-Cache'], 'MISS')
+        # Остаётся только запрос валидаторов ETag/Last-Modified
+        with self.assertNumQueries(1):
+            response = self._get('/blog/')
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+        self.assertEqual(page_cache.get_stats()['hits'], 1)
+
+    @override_settings(PAGE_CACHE_STATS_FLUSH_EVERY=3)
+    def test_stats_are_flushed_in_batches(self):
+        self._get('/blog/')
+        self._get('/blog/')
+        self.assertIsNone(caches['state'].get(page_cache.HITS_KEY))
+        self._get('/blog/')
+        self.assertEqual(caches['state'].get_many([page_cache.HITS_KEY, page_cache.MISSES_KEY]), {
+            page_cache.HITS_KEY: 2, page_cache.MISSES_KEY: 1,
+        })
+
+    def test_only_dependent_pages_are_invalidated(self):
+        self._get('/blog/')
+        self._get('/about/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Article.objects.create(title='Новая статья', post='<p>Текст</p>')
+        self.assertEqual(self._get('/blog/')['X-Page-Cache'], 'MISS')
+        self.assertEqual(self._get('/about/')['X-Page-Cache'], 'HIT')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Education.objects.create(institution='МГУ', degree='Информатика', start_year=2020)
+        self.assertEqual(self._get('/about/')['X-Page-Cache'], 'MISS')
+
+    def test_authenticated_users_bypass_cache(self):
+        self.client.force_login(CustomUser.objects.create(username='reader'))
+        self._get('/blog/')
+        self.assertNotIn('X-Page-Cache', self._get('/blog/'))
+
+
+@override_settings(
+    CACHES=TEST_CACHES,
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+)
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create(username='reader')
+        cls.article = Article.objects.create(title='Условный запрос', post='<p>Текст</p>')
+        SiteSettings.load()
+
+    def setUp(self):
+        caches['shared'].clear()
+        sitemap_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, sitemap_root)
+        overrides = override_settings(SITEMAP_ROOT=sitemap_root)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def _revalidate(self, url):
+        etag = self.client.get(url, secure=True)['ETag']
+        return self.client.get(url, secure=True, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_pages_return_not_modified(self):
+        for url in (self.article.get_absolute_url(), '/blog/', '/sitemap.xml'):
+            with self.subTest(url=url):
+                response = self._revalidate(url)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+
+    def test_not_modified_article_counts_view(self):
+        url = self.article.get_absolute_url()
+        with override_settings(CACHES=isolated_caches(self, 'throttle'), VIEW_COUNTER_BUFFERED=False):
+            etag = self.client.get(url, secure=True, HTTP_USER_AGENT=BROWSER_UA)['ETag']
+            # Другой посетитель с той же версией страницы в кеше браузера
+            response = self.client_class().get(
+                url, secure=True, HTTP_USER_AGENT=BROWSER_UA, HTTP_IF_NONE_MATCH=etag, REMOTE_ADDR='10.0.4.1'
+            )
+            self.assertEqual(response.status_code, 304)
+            # Повтор того же посетителя не учитывается
+            self.client.get(url, secure=True, HTTP_USER_AGENT=BROWSER_UA, HTTP_IF_NONE_MATCH=etag)
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.views, 2)
+
+    def test_new_comment_changes_article_etag(self):
+        url = self.article.get_absolute_url()
+        etag = self.client.get(url, secure=True)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(article=self.article, user=self.user, content='Комментарий')
+        response = self.client.get(url, secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_depends_on_user(self):
+        url = self.article.get_absolute_url()
+        etag = self.client.get(url, secure=True)['ETag']
+        self.client.force_login(self.user)
+        response = self.client.get(url, secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(
+    CACHES=TEST_CACHES, SITEMAP_LIMIT=3,
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+)
+class SitemapTests(TestCase):
+    def setUp(self):
+        sitemap_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, sitemap_root)
+        overrides = override_settings(SITEMAP_ROOT=sitemap_root)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def _read(self, name):
+        with open(f'{settings.SITEMAP_ROOT}/{name}', encoding='utf-8') as f:
+            return f.read()
+
+    def test_sections_split_into_index_and_update_incrementally(self):
+        Project.objects.create(title='Проект', slug='project', short_description='-', description='-', technologies='Django')
+        response = self.client.get('/sitemap.xml', secure=True)
+        self.assertEqual(response['Content-Type'], 'application/xml')
+        index = b''.join(response.streaming_content).decode()
+        # 6 статических страниц и проект не помещаются в лимит из 3 ссылок
+        self.assertIn('<sitemapindex', index)
+        self.assertIn('<loc>https://deev.space/sitemap-static-2.xml</loc>', index)
+        self.assertIn('<loc>https://deev.space/sitemap-projects-1.xml</loc><lastmod>', index)
+        self.assertIn('/projects/#project</loc><lastmod>', self._read('sitemap-projects-1.xml'))
+
+        static_page = self._read('sitemap-static-1.xml')
+        with open(f'{settings.SITEMAP_ROOT}/sitemap-static-1.xml', 'w', encoding='utf-8') as f:
+            f.write(static_page.replace('/about/', '/changed/'))
+        with self.captureOnCommitCallbacks(execute=True):
+            article = Article.objects.create(title='Карта сайта', slug='sitemap-article', post='<p>Текст</p>')
+        # Перестроен только раздел статей
+        self.assertIn('/changed/', self._read('sitemap-static-1.xml'))
+        self.assertIn(article.get_absolute_url(), self._read('sitemap-articles-1.xml'))
+        self.assertEqual(self.client.get('/sitemap-articles-1.xml', secure=True).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            article.delete()
+        self.assertEqual(self.client.get('/sitemap-articles-1.xml', secure=True).status_code, 404)
+        self.assertNotIn('sitemap-articles-1.xml', self._read('sitemap.xml'))
+
+
+@override_settings(
+    CACHES=TEST_CACHES,
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+)
+class FeedTests(TestCase):
+    def setUp(self):
+        feeds_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, feeds_root)
+        overrides = override_settings(FEEDS_ROOT=feeds_root)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.python = Category.objects.create(name='Python', slug='python')
+        self.django = Category.objects.create(name='Django', slug='django')
+        self.article = Article.objects.create(
+            title='Лента новостей', post='<p>Текст</p>', excerpt='<b>Кратко</b>', category=self.python
+        )
+
+    def _get(self, url, **headers):
+        response = self.client.get(url, secure=True, **headers)
+        if response.status_code == 200:
+            response.body = b''.join(response.streaming_content).decode()
+        return response
+
+    def test_feeds_are_served_from_files_with_validators(self):
+        rss = self._get('/feeds/rss.xml')
+        self.assertEqual(rss['Content-Type'], 'application/rss+xml; charset=utf-8')
+        self.assertIn('<title>Лента новостей</title>', rss.body)
+        self.assertIn('<description>Кратко</description>', rss.body)
+        atom = self._get('/feeds/python/atom.xml')
+        self.assertIn('<title>deev.space — Python</title>', atom.body)
+        self.assertIn('Лента новостей', atom.body)
+
+        # Повторный опрос агрегатора не обращается к базе
+        with self.assertNumQueries(0):
+            response = self._get('/feeds/rss.xml', HTTP_IF_NONE_MATCH=rss['ETag'])
+            self.assertEqual(response.status_code, 304)
+            response = self._get('/feeds/rss.xml', HTTP_IF_MODIFIED_SINCE=rss['Last-Modified'])
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(self._get('/feeds/missing/rss.xml').status_code, 404)
+
+    def test_saving_article_regenerates_category_feeds(self):
+        self._get('/feeds/rss.xml')
+        self.article.category = self.django
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.save()
+        self.assertNotIn('Лента новостей', self._get('/feeds/python/rss.xml').body)
+        self.assertIn('Лента новостей', self._get('/feeds/django/rss.xml').body)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.python.delete()
+        self.assertEqual(self._get('/feeds/python/rss.xml').status_code, 404)
+
+
+class FakeSocialAPI:
+    """Локальный сервер, изображающий Telegram Bot API и VK API."""
+
+    def __init__(self):
+        self.requests = []
+        self.status = 200
+        self.delay = 0
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode()
+                url = urlparse(self.path)
+                api.requests.append((url.path, {**parse_qs(url.query), **parse_qs(body)}))
+                time.sleep(api.delay)
+                self.send_response(api.status)
+                self.send_header('Content-Type', 'application/json')
+                self.end_headers()
+                self.wfile.write(json.dumps({'ok': True, 'response': {'post_id': 1}}).encode())
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        # Клиент, не дождавшийся ответа, закрывает соединение
+        self.server.handle_error = lambda request, client_address: None
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@override_settings(
+    CACHES=TEST_CACHES,
+    TELEGRAM_BOT_TOKEN='token', TELEGRAM_CHANNEL_ID='@channel',
+    VK_ACCESS_TOKEN='vk-token', VK_GROUP_ID='42',
+)
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.api = FakeSocialAPI()
+        self.addCleanup(self.api.close)
+        overrides = override_settings(TELEGRAM_API_URL=self.api.url, VK_API_URL=f'{self.api.url}/method')
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def test_new_article_is_published_by_worker(self):
+        article = Article.objects.create(title='Новая статья', post='<p>Текст</p>')
+        self.assertEqual(OutboxMessage.objects.filter(status=OutboxMessage.STATUS_PENDING).count(), 2)
+        self.assertEqual(self.api.requests, [])
+
+        stats = outbox.drain()
+        self.assertEqual(stats['sent'], 2)
+        paths = {path: params for path, params in self.api.requests}
+        self.assertEqual(paths['/bottoken/sendMessage']['chat_id'], ['@channel'])
+        self.assertEqual(paths['/method/wall.post']['guid'], [f'vk:article:{article.pk}'])
+
+        # Повторное сохранение и повторный разбор очереди ничего не отправляют
+        article.save()
+        self.assertEqual(outbox.drain()['sent'], 0)
+        self.assertEqual(len(self.api.requests), 2)
+
+    def test_failed_delivery_is_retried_with_backoff(self):
+        self.api.status = 503
+        Article.objects.create(title='Новая статья', post='<p>Текст</p>')
+        self.assertEqual(outbox.drain()['pending'], 2)
+
+        message = OutboxMessage.objects.get(channel=OutboxMessage.CHANNEL_TELEGRAM)
+        self.assertEqual(message.attempts, 1)
+        self.assertGreater(message.next_attempt_at, message.created_at)
+        self.assertEqual(outbox.drain()['sent'], 0)
+
+        self.api.status = 200
+        OutboxMessage.objects.update(next_attempt_at=message.created_at)
+        self.assertEqual(outbox.drain()['sent'], 2)
+
+    @override_settings(VK_ACCESS_TOKEN='', OUTBOX_REQUEST_TIMEOUT=0.2)
+    def test_telegram_read_timeout_is_not_resent(self):
+        # Telegram принял запрос, но ответ не дошёл: повтор продублировал бы пост
+        self.api.delay = 0.5
+        Article.objects.create(title='Новая статья', post='<p>Текст</p>')
+        with self.assertLogs('main.outbox', 'ERROR'):
+            self.assertEqual(outbox.drain()['unknown'], 1)
+        self.assertEqual(OutboxMessage.objects.get().status, OutboxMessage.STATUS_UNKNOWN)
+
+        OutboxMessage.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(outbox.drain()['unknown'], 0)
+        self.assertEqual(len(self.api.requests), 1)
+
+    @override_settings(VK_ACCESS_TOKEN='')
+    def test_telegram_connect_error_is_retried(self):
+        self.api.close()
+        Article.objects.create(title='Новая статья', post='<p>Текст</p>')
+        with self.assertLogs('main.outbox', 'WARNING'):
+            self.assertEqual(outbox.drain()['pending'], 1)
+        self.assertEqual(OutboxMessage.objects.get().status, OutboxMessage.STATUS_PENDING)
+
+    def test_lease_is_taken_per_message(self):
+        Article.objects.create(title='Новая статья', post='<p>Текст</p>')
+        seen = []
+
+        def record(session, message):
+            seen.append(dict(OutboxMessage.objects.values_list('channel', 'status')))
+
+        with mock.patch.dict(outbox.SENDERS, {channel: record for channel in outbox.SENDERS}):
+            self.assertEqual(outbox.drain()['sent'], 2)
+        # Пока отправляется первое сообщение, второе остаётся в очереди без аренды
+        self.assertEqual([sorted(statuses.values()) for statuses in seen], [
+            [OutboxMessage.STATUS_PENDING, OutboxMessage.STATUS_SENDING],
+            [OutboxMessage.STATUS_SENDING, OutboxMessage.STATUS_SENT],
+        ])
+
+    def test_stale_telegram_lease_is_not_resent(self):
+        article = Article.objects.create(title='Новая статья', post='<p>Текст</p>')
+        # Воркер пропал посреди отправки, аренда истекла
+        OutboxMessage.objects.update(
+            status=OutboxMessage.STATUS_SENDING, next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(outbox.drain()['sent'], 1)
+        self.assertEqual([path for path, params in self.api.requests], ['/method/wall.post'])
+        self.assertEqual(
+            OutboxMessage.objects.get(channel=OutboxMessage.CHANNEL_TELEGRAM).status, OutboxMessage.STATUS_UNKNOWN
+        )
+        self.assertEqual(OutboxMessage.objects.get(channel=OutboxMessage.CHANNEL_VK).status, OutboxMessage.STATUS_SENT)
+        self.assertEqual(self.api.requests[0][1]['guid'], [f'vk:article:{article.pk}'])
+
+    def test_admin_retry_skips_claimed_messages(self):
+        Article.objects.create(title='Новая статья', post='<p>Текст</p>')
+        messages = OutboxMessage.objects.all()
+        messages.filter(channel=OutboxMessage.CHANNEL_TELEGRAM).update(status=OutboxMessage.STATUS_SENDING)
+        messages.filter(channel=OutboxMessage.CHANNEL_VK).update(status=OutboxMessage.STATUS_UNKNOWN)
+
+        model_admin = OutboxMessageAdmin(OutboxMessage, admin.site)
+        with mock.patch.object(model_admin, 'message_user'):
+            model_admin.retry_messages(None, OutboxMessage.objects.all())
+        self.assertEqual(dict(OutboxMessage.objects.values_list('channel', 'status')), {
+            OutboxMessage.CHANNEL_TELEGRAM: OutboxMessage.STATUS_SENDING,
+            OutboxMessage.CHANNEL_VK: OutboxMessage.STATUS_PENDING,
+        })
+
+
+class FakeCaptchaAPI:
+    """Локальный сервер, изображающий API проверки SmartCaptcha."""
+
+    def __init__(self):
+        self.tokens = []
+        self.connections = set()
+        self.delay = 0
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = parse_qs(self.rfile.read(int(self.headers.get('Content-Length', 0))).decode())
+                api.tokens.append(body['token'][0])
+                api.connections.add(self.client_address)
+                time.sleep(api.delay)
+                payload = json.dumps({'status': 'ok' if body['token'][0].startswith('good') else 'failed'}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                try:
+                    self.wfile.write(payload)
+                except BrokenPipeError:
+                    # Клиент уже ушёл по таймауту
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/validate'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@override_settings(CACHES=TEST_CACHES, SMARTCAPTCHA_BREAKER_THRESHOLD=2, SMARTCAPTCHA_TIMEOUT=0.2)
+class CaptchaTests(TestCase):
+    def setUp(self):
+        self.api = FakeCaptchaAPI()
+        self.addCleanup(self.api.close)
+        overrides = override_settings(
+            SMARTCAPTCHA_VERIFY_URL=self.api.url, CACHES=isolated_caches(self, 'state', 'throttle')
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def test_only_rejected_tokens_are_cached(self):
+        self.assertTrue(captcha.verify('good-token'))
+        self.assertFalse(captcha.verify('bad-token'))
+        self.assertFalse(captcha.verify('bad-token'))
+        # Пройденный токен одноразовый: повтор снова проверяется в API
+        self.assertTrue(captcha.verify('good-token'))
+        self.assertEqual(self.api.tokens, ['good-token', 'bad-token', 'good-token'])
+        # Все запросы прошли через одно постоянное соединение
+        self.assertEqual(len(self.api.connections), 1)
+
+        stats = captcha.get_stats()
+        self.assertEqual((stats['requests'], stats['ok'], stats['rejected'], stats['cached']), (3, 2, 1, 1))
+
+    def test_breaker_fails_open_after_repeated_timeouts(self):
+        self.api.delay = 0.5
+        self.assertTrue(captcha.verify('bad-1'))
+        self.assertTrue(captcha.verify('bad-2'))
+        self.assertTrue(captcha.is_open())
+
+        # Пока цепь разомкнута, API не вызывается и таймаут не ждём
+        started = time.monotonic()
+        self.assertTrue(captcha.verify('bad-3'))
+        self.assertLess(time.monotonic() - started, 0.1)
+        self.assertEqual(len(self.api.tokens), 2)
+
+        stats = captcha.get_stats()
+        self.assertEqual((stats['timeouts'], stats['short_circuited']), (2, 1))
+
+        # После паузы предохранителя сервис снова проверяет токены
+        self.api.delay = 0
+        caches['state'].delete(captcha.OPEN_KEY)
+        self.assertFalse(captcha.verify('bad-4'))
+        self.assertFalse(caches['state'].get(captcha.HALF_OPEN_KEY))
+
+    def test_half_open_breaker_sends_single_probe(self):
+        self.api.delay = 0.5
+        captcha.verify('bad-1')
+        captcha.verify('bad-2')
+        caches['state'].delete(captcha.OPEN_KEY)
+
+        # Пробный запрос уже выполняет другой процесс: остальные его не ждут
+        self.assertTrue(captcha._acquire_probe())
+        self.assertTrue(captcha.verify('bad-3'))
+        self.assertEqual(len(self.api.tokens), 2)
+
+        # Неудачная проба сразу размыкает цепь, без накопления ошибок
+        caches['state'].delete(captcha.PROBE_KEY)
+        self.assertTrue(captcha.verify('bad-4'))
+        self.assertEqual(len(self.api.tokens), 3)
+        self.assertTrue(captcha.is_open())
+
+
+class FakeSMTPServer:
+    """Локальный отладочный SMTP-сервер: принимает письма и считает соединения."""
+
+    def __init__(self):
+        self.messages = []
+        self.connections = 0
+        # Ответ на DATA; например, '451 Try again later' для проверки повторов
+        self.data_reply = '250 OK'
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line):
+                self.wfile.write(f'{line}\r\n'.encode())
+
+            def handle(self):
+                server.connections += 1
+                self.reply('220 localhost ESMTP')
+                while True:
+                    line = self.rfile.readline().decode().strip()
+                    if not line:
+                        return
+                    command = line.split(' ', 1)[0].upper()
+                    if command == 'EHLO':
+                        self.reply('250 localhost')
+                    elif command == 'DATA':
+                        self.reply('354 End data with <CR><LF>.<CR><LF>')
+                        lines = []
+                        while (data := self.rfile.readline()) not in (b'.\r\n', b''):
+                            lines.append(data)
+                        if server.data_reply.startswith('250'):
+                            server.messages.append(b''.join(lines).decode())
+                        self.reply(server.data_reply)
+                    elif command == 'QUIT':
+                        self.reply('221 Bye')
+                        return
+                    else:
+                        self.reply('250 OK')
+
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@override_settings(
+    CACHES=TEST_CACHES,
+    EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+    EMAIL_USE_SSL=False,
+    EMAIL_HOST='127.0.0.1',
+    EMAIL_HOST_USER='',
+    EMAIL_HOST_PASSWORD='',
+)
+class ContactMailQueueTests(TestCase):
+    def setUp(self):
+        self.smtp = FakeSMTPServer()
+        self.addCleanup(self.smtp.close)
+        overrides = override_settings(EMAIL_PORT=self.smtp.port)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def create_message(self, n=1):
+        return ContactMessage.objects.create(
+            name=f'Гость {n}', email=f'guest{n}@example.com', subject=f'Вопрос {n}', message='Текст'
+        )
+
+    def test_contact_post_only_enqueues(self):
+        api = FakeCaptchaAPI()
+        self.addCleanup(api.close)
+        with override_settings(SMARTCAPTCHA_VERIFY_URL=api.url):
+            response = self.client.post('/contacts/', {
+                'name': 'Гость', 'email': 'guest@example.com', 'subject': 'Вопрос',
+                'message': 'Текст сообщения', 'captcha': 'good-token',
+            }, secure=True, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.smtp.connections, 0)
+        self.assertEqual(ContactMessage.objects.get().mail_status, ContactMessage.MAIL_PENDING)
+
+    def test_batch_is_sent_over_one_connection(self):
+        for n in range(3):
+            self.create_message(n)
+        stats = mail_queue.drain()
+        self.assertEqual(stats['sent'], 3)
+        self.assertEqual(len(self.smtp.messages), 3)
+        self.assertEqual(self.smtp.connections, 1)
+        self.assertIn('Reply-To: guest0@example.com', self.smtp.messages[0])
+        self.assertFalse(ContactMessage.objects.exclude(mail_status=ContactMessage.MAIL_SENT).exists())
+        # Повторный запуск ничего не отправляет и не соединяется с сервером
+        mail_queue.drain()
+        self.assertEqual(self.smtp.connections, 1)
+
+    @override_settings(MAIL_QUEUE_MAX_ATTEMPTS=2)
+    def test_temporary_rejection_is_retried_then_dead_lettered(self):
+        message = self.create_message()
+        self.smtp.data_reply = '451 Try again later'
+        self.assertEqual(mail_queue.drain()['pending'], 1)
+        message.refresh_from_db()
+        self.assertEqual((message.mail_status, message.mail_attempts), (ContactMessage.MAIL_PENDING, 1))
+        self.assertGreater(message.mail_next_attempt_at, timezone.now())
+        self.assertIn('451', message.mail_error)
+
+        ContactMessage.objects.filter(pk=message.pk).update(mail_next_attempt_at=timezone.now())
+        self.assertEqual(mail_queue.drain()['failed'], 1)
+        message.refresh_from_db()
+        self.assertEqual(message.mail_status, ContactMessage.MAIL_FAILED)
+
+    def test_permanent_rejection_is_not_retried(self):
+        message = self.create_message()
+        self.smtp.data_reply = '554 Message rejected'
+        self.assertEqual(mail_queue.drain()['failed'], 1)
+        message.refresh_from_db()
+        self.assertEqual((message.mail_status, message.mail_attempts), (ContactMessage.MAIL_FAILED, 1))
+
+    def test_lease_is_taken_per_message(self):
+        for n in range(2):
+            self.create_message(n)
+        seen = []
+
+        def record(connection, message):
+            seen.append(sorted(ContactMessage.objects.values_list('mail_status', flat=True)))
+
+        with mock.patch.object(mail_queue, 'send', record):
+            self.assertEqual(mail_queue.drain()['sent'], 2)
+        self.assertEqual(seen, [
+            [ContactMessage.MAIL_PENDING, ContactMessage.MAIL_SENDING],
+            [ContactMessage.MAIL_SENDING, ContactMessage.MAIL_SENT],
+        ])
+
+    def test_admin_retry_skips_claimed_messages(self):
+        sending, failed = self.create_message(1), self.create_message(2)
+        ContactMessage.objects.filter(pk=sending.pk).update(mail_status=ContactMessage.MAIL_SENDING)
+        ContactMessage.objects.filter(pk=failed.pk).update(mail_status=ContactMessage.MAIL_FAILED)
+
+        model_admin = ContactMessageAdmin(ContactMessage, admin.site)
+        with mock.patch.object(model_admin, 'message_user'):
+            model_admin.retry_mail(None, ContactMessage.objects.all())
+        self.assertEqual(
+            dict(ContactMessage.objects.values_list('pk', 'mail_status')),
+            {sending.pk: ContactMessage.MAIL_SENDING, failed.pk: ContactMessage.MAIL_PENDING},
+        )
+
+
+class FakeLinkSite:
+    """Локальный сайт со страницей, поддерживающей ETag."""
+    ETAG = '"v1"'
+    PAGE = (
+        '<html><head><title>Страница</title>'
+        '<meta property="og:description" content="Описание страницы"></head>'
+        '<body>' + 'x' * 200000 + '</body></html>'
+    ).encode()
+
+    def __init__(self):
+        self.requests = []
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                site.requests.append(dict(self.headers))
+                if self.headers.get('If-None-Match') == site.ETAG:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(site.PAGE)))
+                self.send_header('ETag', site.ETAG)
+                self.end_headers()
+                try:
+                    self.wfile.write(site.PAGE)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/page#top'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@override_settings(CACHES=TEST_CACHES, LINK_PREVIEW_ASYNC=False)
+class LinkPreviewTests(TestCase):
+    def setUp(self):
+        caches['shared'].clear()
+        self.site = FakeLinkSite()
+        self.addCleanup(self.site.close)
+
+    def test_save_fills_preview_after_commit(self):
+        article = Article.objects.create(title='Статья', post='<p>Текст</p>')
+        with self.captureOnCommitCallbacks(execute=True):
+            link = ArticleLink.objects.create(article=article, url=self.site.url)
+        link.refresh_from_db()
+        self.assertEqual(link.title, 'Страница')
+        self.assertEqual(link.description, 'Описание страницы')
+
+    def test_cached_preview_is_revalidated(self):
+        self.assertEqual(link_preview.get_preview(self.site.url)['title'], 'Страница')
+        self.assertEqual(link_preview.get_preview(self.site.url)['title'], 'Страница')
+        self.assertEqual(len(self.site.requests), 1)
+
+        with override_settings(LINK_PREVIEW_FRESH_FOR=0):
+            self.assertEqual(link_preview.get_preview(self.site.url)['title'], 'Страница')
+        self.assertEqual(self.site.requests[-1].get('If-None-Match'), FakeLinkSite.ETAG)
+
+
+@override_settings(CACHES=TEST_CACHES, IMAGE_VARIANTS_ASYNC=False, IMAGE_VARIANT_WIDTHS=(320, 640))
+class ImageVariantsTests(TestCase):
+    def setUp(self):
+        caches['shared'].clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        overrides = override_settings(MEDIA_ROOT=media_root)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def _upload(self, name='cover.jpg'):
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera'
+        buffer = io.BytesIO()
+        Image.new('RGB', (1000, 500), 'red').save(buffer, 'JPEG', exif=exif)
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+    def test_upload_builds_variants_and_srcset(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            article = Article.objects.create(title='Статья', post='<p>Текст</p>', img=self._upload())
+
+        record = ImageVariants.objects.get(source=article.img.name)
+        self.assertEqual((record.width, record.height), (1000, 500))
+        self.assertTrue(record.placeholder.startswith('data:image/webp;base64,'))
+        self.assertEqual(
+            sorted((v['width'], v['format']) for v in record.variants),
+            [(320, 'avif'), (320, 'webp'), (640, 'avif'), (640, 'webp')]
+        )
+        with Image.open(f"{settings.MEDIA_ROOT}/{record.variants[0]['name']}") as variant:
+            self.assertEqual(len(variant.getexif()), 0)
+
+        html = Template('{% load custom_filters %}{% responsive_image img sizes="50vw" alt="Обложка" %}').render(
+            Context({'img': article.img})
+        )
+        self.assertIn('type="image/avif"', html)
+        self.assertIn('-640.webp 640w', html)
+        self.assertIn('src="/media/variants/articles/cover.jpg-640.webp"', html)
+        self.assertIn('width="1000"', html)
+        self.assertIn('height="500"', html)
+
+    def test_webp_without_avif_support(self):
+        with mock.patch.dict(Image.SAVE):
+            del Image.SAVE['AVIF']
+            with self.captureOnCommitCallbacks(execute=True):
+                article = Article.objects.create(title='Статья', post='<p>Текст</p>', img=self._upload())
+
+        record = ImageVariants.objects.get(source=article.img.name)
+        self.assertEqual(sorted((v['width'], v['format']) for v in record.variants), [(320, 'webp'), (640, 'webp')])
+
+    def test_sources_with_same_stem_get_separate_variants(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            jpg = Article.objects.create(title='Первая', post='<p>Текст</p>', img=self._upload('photo.jpg'))
+            png = Article.objects.create(title='Вторая', post='<p>Текст</p>', img=self._upload('photo.png'))
+
+        names = [
+            {variant['name'] for variant in ImageVariants.objects.get(source=article.img.name).variants}
+            for article in (jpg, png)
+        ]
+        self.assertFalse(names[0] & names[1])
+        self.assertTrue(all(os.path.exists(f'{settings.MEDIA_ROOT}/{name}') for name in names[0] | names[1]))
+
+    def test_replaced_image_variants_are_removed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            article = Article.objects.create(title='Статья', post='<p>Текст</p>', img=self._upload())
+        old = ImageVariants.objects.get(source=article.img.name)
+        old_files = [f"{settings.MEDIA_ROOT}/{variant['name']}" for variant in old.variants]
+
+        article = Article.objects.get(pk=article.pk)
+        article.img = self._upload('new-cover.jpg')
+        with self.captureOnCommitCallbacks(execute=True):
+            article.save()
+
+        self.assertFalse(ImageVariants.objects.filter(pk=old.pk).exists())
+        self.assertFalse(any(os.path.exists(path) for path in old_files))
+        self.assertTrue(ImageVariants.objects.filter(source=article.img.name).exists())
+
+        # Сохранение без замены картинки копии не трогает
+        with self.captureOnCommitCallbacks(execute=True):
+            article.save()
+        self.assertTrue(ImageVariants.objects.filter(source=article.img.name).exists())
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ArticleRenderTests(TestCase):
+    def setUp(self):
+        caches['shared'].clear()
+
+    def test_save_stores_anchors_toc_and_reading_time(self):
+        article = Article.objects.create(title='Оглавление', post=(
+            '<h2>Введение</h2><p>' + 'слово ' * 450 + '</p>'
+            '<h3>Шаг 1</h3><pre><code>print(1)</code></pre><h2>Введение</h2>'
+        ))
+        self.assertEqual([item['id'] for item in article.toc], ['введение', 'шаг-1', 'введение-2'])
+        self.assertEqual(article.word_count, 455)
+        self.assertEqual(article.reading_time, 3)
+        self.assertIn('<h2 id="введение">Введение<a', article.post_html)
+        self.assertIn('href="#введение-2"', article.post_html)
+        self.assertIn('class="code-copy-btn"', article.post_html)
+
+        article.post = '<p>Коротко</p>'
+        article.save(update_fields=['post'])
+        article.refresh_from_db()
+        self.assertEqual((article.toc, article.reading_time), ([], 1))
+
+    def test_code_is_highlighted_once_per_block(self):
+        post = '<pre><code class="language-python">def f():\n    return 1</code></pre><pre><code>plain</code></pre>'
+        article = Article.objects.create(title='Код', post=post)
+        self.assertIn('<pre class="highlight"><code class="language-python"><span class="k">def</span>', article.post_html)
+        self.assertIn('<pre><code>plain</code>', article.post_html)
+
+        # Неизменившийся блок берётся из кеша по хешу содержимого
+        key = highlight.CACHE_KEY.format(hashlib.sha256(
+            f'{highlight.CACHE_VERSION}\0python\0def f():\n    return 1'.encode()
+        ).hexdigest())
+        caches['shared'].set(key, '<span class="cached">def f()</span>', None)
+        article.post = post + '<p>Дополнение</p>'
+        article.save()
+        self.assertIn('<span class="cached">', article.post_html)
+
+    def test_migration_uses_frozen_renderer(self):
+        migration = importlib.import_module('main.migrations.0010_article_render')
+        self.assertFalse(hasattr(migration, 'highlight_blocks'))
+
+        post = '<h2>Введение</h2><p>Текст</p><h2>Введение</h2><pre><code class="language-python">x = 1</code></pre>'
+        rendered = migration.render_article(post)
+        self.assertEqual([item['id'] for item in rendered['toc']], ['введение', 'введение-2'])
+        self.assertEqual((rendered['word_count'], rendered['reading_time']), (6, 1))
+        # Подсветку добавляет rehighlight_articles, а не миграция
+        self.assertIn('<pre><code class="language-python">x = 1</code><button', rendered['post_html'])
+
+
+@override_settings(CACHES=TEST_CACHES)
+class StaticAssetsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, cls.static_root)
+        overrides = override_settings(
+            STATIC_ROOT=cls.static_root, STATIC_SERVE=True,
+            STATICFILES_STORAGE='main.storage.CompressedManifestStaticFilesStorage',
+        )
+        overrides.enable()
+        cls.addClassCleanup(overrides.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(f'{cls.static_root}/staticfiles.json', encoding='utf-8') as f:
+            cls.manifest = json.load(f)['paths']
+
+    def test_minifiers_keep_strings(self):
+        css = (
+            '/* тема */\n.a > .b ,\n.c {\n    content: "/* не комментарий */";\n    color : red;\n}\n'
+            '.d :hover { content : " : " ; margin : 0 }\n'
+        )
+        self.assertEqual(
+            bundles.minify_css(css),
+            '.a>.b,.c{content:"/* не комментарий */";color:red}.d :hover{content:" : ";margin:0}'
+        )
+        js = "// комментарий\nconst url = 'https://deev.space';\n    const html = `\n    <b>//</b>`;\n"
+        self.assertEqual(bundles.minify_js(js), "const url = 'https://deev.space';\nconst html = `\n    <b>//</b>`;")
+
+    def test_collectstatic_builds_hashed_bundles(self):
+        html = Template("{% load custom_filters %}{% bundle 'blog' 'css' %}{% bundle 'blog' 'js' %}").render(Context())
+        self.assertRegex(self.manifest['css/blog.bundle.css'], r'^css/blog\.bundle\.[0-9a-f]{12}\.css$')
+        self.assertIn(f'href="/static/{self.manifest["css/blog.bundle.css"]}"', html)
+        self.assertIn(f'src="/static/{self.manifest["js/blog.bundle.js"]}"', html)
+        self.assertEqual(html.count('<link'), 1)
+
+        with open(f'{self.static_root}/css/core.bundle.css', encoding='utf-8') as f:
+            core = f.read()
+        self.assertTrue(core.startswith(':root{'))
+        self.assertNotIn('.share-btn', core)
+
+    def test_serves_precompressed_immutable_files(self):
+        name = self.manifest['css/blog.bundle.css']
+        url = f'/static/{name}'
+        with open(f'{self.static_root}/{name}', 'rb') as f:
+            original = f.read()
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, br;q=0.9', secure=True)
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(brotli.decompress(b''.join(response.streaming_content)), original)
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, br;q=0', secure=True)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'], HTTP_ACCEPT_ENCODING='gzip', secure=True).status_code,
+            304
+        )
+
+        response = self.client.get(url, HTTP_RANGE='bytes=10-19', HTTP_ACCEPT_ENCODING='br', secure=True)
+        self.assertEqual(response.status_code, 206)
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(original)}')
+        self.assertEqual(b''.join(response.streaming_content), original[10:20])
+        self.assertEqual(self.client.get(url, HTTP_RANGE=f'bytes={len(original)}-', secure=True).status_code, 416)
+
+        response = self.client.get('/static/css/blog.bundle.css', secure=True)
+        self.assertEqual(response['Cache-Control'], f'public, max-age={settings.STATIC_MAX_AGE}')
+        self.assertNotIn('Content-Encoding', response)
@@ -1,4 +1,4 @@
-from django.urls import path
+from django.urls import path, re_path
 from . import views
 
 urlpatterns = [
@@ -14,6 +14,10 @@ urlpatterns = [
     path('blog/category/<slug:category_slug>/', views.BlogView.as_view(), name='blog_category'),
     path('blog/<slug:slug>/', views.ArticleDetailView.as_view(), name='article_detail'),
 
+    # RSS/Atom
+    re_path(r'^feeds/(?P<kind>rss|atom)\.xml$', views.feed_file, name='feed'),
+    re_path(r'^feeds/(?P<category_slug>[-\w]+)/(?P<kind>rss|atom)\.xml$', views.feed_file, name='category_feed'),
+
     # Аутентификация
     path('register/', views.register_view, name='register'),
     path('login/', views.login_view, name='login'),
@@ -22,5 +26,6 @@ urlpatterns = [
     # API
     path('api/article/<int:article_id>/comment/', views.add_comment, name='add_comment'),
     path('api/article/<int:article_id>/like/', views.toggle_article_like, name='toggle_article_like'),
+    path('api/article/<int:article_id>/votes/', views.article_votes, name='article_votes'),
     path('api/comment/<int:comment_id>/like/', views.toggle_comment_like, name='toggle_comment_like'),
 ]
\ No newline at end of file
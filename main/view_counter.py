@@ -0,0 +1,166 @@
+"""
+Буферизованный счётчик просмотров статей.
+
+Просмотры копятся в памяти процесса, сливаются по статьям и записываются
+в Article.views одним UPDATE по таймеру или при достижении порога.
+Повторный просмотр статьи из той же сессии (или с того же IP и браузера,
+если сессии нет) в течение VIEW_COUNTER_DEDUP_TIMEOUT не учитывается;
+отметки хранятся в общем кеше throttle, чтобы просмотр не писал сессию в базу.
+"""
+import atexit
+import hashlib
+import logging
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.db.models import Case, F, PositiveIntegerField, When
+
+logger = logging.getLogger(__name__)
+
+BOT_USER_AGENT_RE = re.compile(
+    r'bot|crawl|spider|slurp|archiver|facebookexternalhit|embedly|preview|'
+    r'curl|wget|python-requests|httpclient|go-http-client|headless|lighthouse',
+    re.IGNORECASE
+)
+
+
+def is_crawler(request):
+    """Проверка, что запрос пришёл от поискового робота или скрипта."""
+    user_agent = request.META.get('HTTP_USER_AGENT', '')
+    if not user_agent:
+        return True
+    return bool(BOT_USER_AGENT_RE.search(user_agent))
+
+
+def viewer_key(request):
+    """Идентификатор посетителя для отсева повторных просмотров."""
+    ident = request.COOKIES.get(settings.SESSION_COOKIE_NAME) or '{}|{}'.format(
+        request.META.get('REMOTE_ADDR', ''), request.META.get('HTTP_USER_AGENT', '')
+    )
+    return hashlib.sha256(ident.encode()).hexdigest()[:32]
+
+
+def is_repeat_view(request, article):
+    """Отметка просмотра; True, если посетитель уже видел статью недавно."""
+    key = f'views:seen:{article.pk}:{viewer_key(request)}'
+    return not caches[settings.THROTTLE_CACHE_ALIAS].add(key, 1, settings.VIEW_COUNTER_DEDUP_TIMEOUT)
+
+
+class ViewCounterBuffer:
+    """Потокобезопасный буфер просмотров с пакетной записью в базу."""
+
+    def __init__(self, flush_interval=None, flush_threshold=None):
+        self._flush_interval = flush_interval
+        self._flush_threshold = flush_threshold
+        self._pending = {}
+        self._total = 0
+        self._lock = threading.Lock()
+        self._timer = None
+        self._last_flush = time.monotonic()
+
+    @property
+    def flush_interval(self):
+        if self._flush_interval is not None:
+            return self._flush_interval
+        return getattr(settings, 'VIEW_COUNTER_FLUSH_INTERVAL', 10)
+
+    @property
+    def flush_threshold(self):
+        if self._flush_threshold is not None:
+            return self._flush_threshold
+        return getattr(settings, 'VIEW_COUNTER_FLUSH_THRESHOLD', 100)
+
+    def add(self, article_id, count=1):
+        """Учёт просмотра статьи."""
+        with self._lock:
+            self._pending[article_id] = self._pending.get(article_id, 0) + count
+            self._total += count
+            should_flush = (
+                self._total >= self.flush_threshold
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+            if not should_flush:
+                self._schedule_timer()
+
+        if should_flush:
+            self.flush()
+
+    def pending(self, article_id):
+        """Количество ещё не записанных просмотров статьи."""
+        with self._lock:
+            return self._pending.get(article_id, 0)
+
+    def flush(self):
+        """Запись накопленных просмотров одним UPDATE."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._total = 0
+            self._last_flush = time.monotonic()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        if not pending:
+            return 0
+
+        from .models import Article
+
+        try:
+            Article.objects.filter(pk__in=pending.keys()).update(
+                views=Case(
+                    *[When(pk=pk, then=F('views') + count) for pk, count in pending.items()],
+                    default=F('views'),
+                    output_field=PositiveIntegerField()
+                )
+            )
+        except Exception as e:
+            logger.error(f'Ошибка записи просмотров: {e}')
+            # Возвращаем просмотры в буфер, чтобы не потерять их
+            with self._lock:
+                for pk, count in pending.items():
+                    self._pending[pk] = self._pending.get(pk, 0) + count
+                    self._total += count
+            return 0
+
+        return sum(pending.values())
+
+    def _schedule_timer(self):
+        if self._timer is not None:
+            return
+        self._timer = threading.Timer(self.flush_interval, self._flush_from_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            # Соединение потока таймера больше не понадобится
+            connections.close_all()
+
+
+view_buffer = ViewCounterBuffer()
+atexit.register(view_buffer.flush)
+
+
+def count_view(request, article):
+    """Учёт просмотра статьи с фильтрацией роботов и повторов."""
+    if is_crawler(request) or is_repeat_view(request, article):
+        return False
+
+    if not getattr(settings, 'VIEW_COUNTER_BUFFERED', True):
+        type(article).objects.filter(pk=article.pk).update(views=F('views') + 1)
+        article.views += 1
+        return True
+
+    view_buffer.add(article.pk)
+    return True
+
+
+def get_views(article):
+    """Число просмотров статьи с учётом буфера."""
+    return article.views + view_buffer.pending(article.pk)
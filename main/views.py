@@ -5,31 +5,50 @@ from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.paginator import Paginator
-from django.core.mail import send_mail
 from django.conf import settings
-from django.db.models import Q, Count
-from django.views.decorators.http import require_POST, require_GET
+from django.db.models import Q, Count, Max
+from django.views.decorators.http import condition, require_POST, require_GET, require_http_methods
 from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.utils.html import strip_tags
 import json
 import logging
 
 from .models import (
-    Article, Project, ProjectStatus, Skill, Comment, ArticleLike, CommentLike,
-    ContactMessage, Experience, Education, Category, SiteSettings
+    Article, ArticleLink, Project, ProjectStatus, Skill, Comment, ArticleLike, CommentLike,
+    ContactMessage, Experience, Education, Category, SiteSettings, Language, Technology
 )
 from .forms import RegisterForm, LoginForm, CommentForm, ContactForm
+from .comment_tree import load_comment_tree
+from .conditional import ConditionalGetMixin, make_etag, model_versions, user_key
+from .counters import apply_votes, get_user_votes, toggle_vote
+from .db_router import ReplicaReadMixin
+from .facets import get_project_facets
+from .feeds import FEED_TYPES, feed_etag, feed_last_modified, get_feed_path
+from .page_cache import PageCacheMixin
+from .prebuilt import file_response
+from .ratelimit import rate_limit
+from .search import search_articles
+from .sitemaps import INDEX_NAME, sitemap_etag, sitemap_last_modified, sitemap_path
+from .view_counter import count_view, get_views
 
 logger = logging.getLogger(__name__)
 
+# Тексты статей не нужны в карточках и списках
+ARTICLE_BODY_FIELDS = ('post', 'post_html', 'toc')
+
 
 def get_site_settings():
     """Получение настроек сайта."""
-    return SiteSettings.load()
+    return SiteSettings.get_cached()
 
 
-class IndexView(TemplateView):
+class IndexView(ReplicaReadMixin, PageCacheMixin, TemplateView):
     """Главная страница."""
     template_name = 'index.html'
+    cache_dependencies = (
+        Article, Category, Comment, ArticleLike, Project, ProjectStatus, Skill, Experience, SiteSettings
+    )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -40,7 +59,7 @@ class IndexView(TemplateView):
         context['skills_by_category'] = self._get_skills_by_category()
         context['recent_articles'] = Article.objects.filter(
             is_published=True, is_achievement=False
-        ).select_related('category')[:3]
+        ).select_related('category').defer(*ARTICLE_BODY_FIELDS)[:3]
 
         # Только проекты с галочкой "Показывать на главной", сортировка по homepage_order
         context['featured_projects'] = Project.objects.filter(
@@ -67,9 +86,10 @@ class IndexView(TemplateView):
         return categories
 
 
-class AboutView(TemplateView):
+class AboutView(PageCacheMixin, TemplateView):
     """Страница 'Обо мне'."""
     template_name = 'about.html'
+    cache_dependencies = (Experience, Education, Skill, SiteSettings)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -98,11 +118,12 @@ class AboutView(TemplateView):
         return categories
 
 
-class ProjectsView(ListView):
+class ProjectsView(ReplicaReadMixin, PageCacheMixin, ListView):
     """Страница проектов."""
     model = Project
     template_name = 'projects.html'
     context_object_name = 'projects'
+    cache_dependencies = (Project, ProjectStatus, Language, Technology, SiteSettings)
 
     def get_queryset(self):
         queryset = Project.objects.filter(is_visible=True).select_related('status')
@@ -112,10 +133,10 @@ class ProjectsView(ListView):
         status_filter = self.request.GET.get('status')
 
         if lang_filter:
-            queryset = queryset.filter(programming_languages__icontains=lang_filter)
+            queryset = queryset.filter(language_tags__key=Language.make_key(lang_filter))
 
         if tech_filter:
-            queryset = queryset.filter(technologies__icontains=tech_filter)
+            queryset = queryset.filter(technology_tags__key=Technology.make_key(tech_filter))
 
         if status_filter:
             if status_filter == 'completed':
@@ -133,41 +154,16 @@ class ProjectsView(ListView):
         context = super().get_context_data(**kwargs)
         site_settings = get_site_settings()
 
-        base_queryset = Project.objects.filter(is_visible=True).select_related('status')
-
-        lang_filter = self.request.GET.get('lang')
-        tech_filter = self.request.GET.get('tech')
-        status_filter = self.request.GET.get('status')
-
-        if lang_filter:
-            base_queryset = base_queryset.filter(programming_languages__icontains=lang_filter)
-        if tech_filter:
-            base_queryset = base_queryset.filter(technologies__icontains=tech_filter)
-
-        # Разделение по статусам
-        if status_filter == 'completed':
-            context['completed_projects'] = base_queryset.filter(status__is_release=True).order_by('order', '-date')
-            context['dev_projects'] = Project.objects.none()
-        elif status_filter == 'in_development':
-            context['completed_projects'] = Project.objects.none()
-            context['dev_projects'] = base_queryset.filter(
-                Q(status__is_release=False) | Q(status__isnull=True)
-            ).order_by('order', '-date')
-        else:
-            context['completed_projects'] = base_queryset.filter(status__is_release=True).order_by('order', '-date')
-            context['dev_projects'] = base_queryset.filter(
-                Q(status__is_release=False) | Q(status__isnull=True)
-            ).order_by('order', '-date')
-
-        # Собираем все языки программирования для фильтра
-        all_languages = set()
-        all_techs = set()
-        for project in Project.objects.filter(is_visible=True):
-            all_languages.update(project.get_languages_list())
-            all_techs.update(project.get_technologies_list())
+        # Один запрос за проектами, разделение по статусам — в памяти
+        projects = list(self.object_list)
+        context['projects'] = projects
+        context['completed_projects'] = [p for p in projects if p.is_completed]
+        context['dev_projects'] = [p for p in projects if not p.is_completed]
 
-        context['all_languages'] = sorted(all_languages)
-        context['all_technologies'] = sorted(all_techs)
+        # Языки и технологии для фильтров (с количеством проектов)
+        facets = get_project_facets()
+        context['all_languages'] = facets['languages']
+        context['all_technologies'] = facets['technologies']
 
         context['current_lang'] = self.request.GET.get('lang', '')
         context['current_tech'] = self.request.GET.get('tech', '')
@@ -180,29 +176,38 @@ class ProjectsView(ListView):
         return context
 
 
-class BlogView(ListView):
+class BlogView(ReplicaReadMixin, ConditionalGetMixin, PageCacheMixin, ListView):
     """Страница блога."""
     model = Article
     template_name = 'blog/blog.html'
     context_object_name = 'articles'
     paginate_by = 9
+    cache_dependencies = (Article, Category, Comment, ArticleLike, SiteSettings)
 
-    def get_queryset(self):
-        queryset = Article.objects.filter(
-            is_published=True, is_achievement=False
-        ).select_related('category')
-
+    def get_base_queryset(self):
+        queryset = Article.objects.filter(is_published=True, is_achievement=False)
         category_slug = self.kwargs.get('category_slug')
         if category_slug:
             queryset = queryset.filter(category__slug=category_slug)
+        return queryset
+
+    def get_validators(self):
+        state = self.get_base_queryset().aggregate(
+            last_modified=Max('updated_at'), total=Count('pk')
+        )
+        etag = make_etag(
+            self.request.get_full_path(), state['last_modified'], state['total'],
+            user_key(self.request), *model_versions(self.cache_dependencies)
+        )
+        return etag, state['last_modified']
+
+    def get_queryset(self):
+        queryset = self.get_base_queryset().select_related('category').defer(*ARTICLE_BODY_FIELDS)
 
         search_query = self.request.GET.get('q')
         if search_query:
-            queryset = queryset.filter(
-                Q(title__icontains=search_query) |
-                Q(excerpt__icontains=search_query) |
-                Q(post__icontains=search_query)
-            )
+            # Выдача по релевантности (bm25) со сниппетами
+            return search_articles(queryset, search_query)
 
         return queryset.order_by('-date')
 
@@ -228,20 +233,33 @@ class BlogView(ListView):
         return context
 
 
-class ArticleDetailView(DetailView):
+class ArticleDetailView(ReplicaReadMixin, ConditionalGetMixin, DetailView):
     """Страница отдельной статьи."""
     model = Article
     template_name = 'blog/article.html'
     context_object_name = 'article'
     slug_url_kwarg = 'slug'
+    # Связанные статьи, ветка комментариев и их оценки, превью ссылок, шапка сайта
+    etag_dependencies = (Article, ArticleLink, Category, Comment, CommentLike, SiteSettings)
 
     def get_queryset(self):
-        return Article.objects.filter(is_published=True).select_related('category')
+        # Исходный текст не выводится: страница строится из post_html
+        return Article.objects.filter(is_published=True).select_related('category').defer('post')
+
+    def get_validators(self):
+        state = Article.objects.filter(
+            is_published=True, slug=self.kwargs.get(self.slug_url_kwarg)
+        ).values_list('pk', 'updated_at', 'likes_count', 'dislikes_count', 'comments_count').first()
+        if state is None:
+            return None
+        # Просмотр учитывается до сверки валидаторов: ответ 304 тоже просмотр
+        count_view(self.request, Article(pk=state[0]))
+        etag = make_etag(*state, user_key(self.request), *model_versions(self.etag_dependencies))
+        return etag, state[1]
 
     def get_object(self, queryset=None):
         obj = super().get_object(queryset)
-        obj.views += 1
-        obj.save(update_fields=['views'])
+        obj.views = get_views(obj)
         return obj
 
     def get_context_data(self, **kwargs):
@@ -250,26 +268,15 @@ class ArticleDetailView(DetailView):
 
         # Комментарии только если включены
         if article.comments_enabled:
-            context['comments'] = article.comments.filter(
-                is_approved=True, parent=None
-            ).select_related('user').prefetch_related(
-                'replies__user', 'replies__replies__user'
-            ).order_by('-created_at')
+            context['comments'] = load_comment_tree(article)
         else:
             context['comments'] = []
 
         context['comment_form'] = CommentForm()
 
-        context['user_like'] = None
-        if self.request.user.is_authenticated:
-            like = ArticleLike.objects.filter(
-                article=article, user=self.request.user
-            ).first()
-            context['user_like'] = like
-
         context['related_articles'] = Article.objects.filter(
             is_published=True, is_achievement=False, category=article.category
-        ).exclude(pk=article.pk)[:3] if article.category else Article.objects.none()
+        ).exclude(pk=article.pk).defer(*ARTICLE_BODY_FIELDS)[:3] if article.category else Article.objects.none()
 
         # Галерея изображений
         gallery_images = article.gallery_images.all()
@@ -290,22 +297,23 @@ class ArticleDetailView(DetailView):
         context['attached_links'] = attached_links
 
         context['page_title'] = f'{article.title} — Блог'
-        context['page_description'] = article.excerpt or article.post[:160]
+        context['page_description'] = article.excerpt or strip_tags(article.post_html)[:160]
         context['og_image'] = article.img.url if article.img else None
 
         return context
 
 
-class AchievementsView(ListView):
+class AchievementsView(PageCacheMixin, ListView):
     """Страница достижений."""
     model = Article
     template_name = 'achievements.html'
     context_object_name = 'achievements'
+    cache_dependencies = (Article, SiteSettings)
 
     def get_queryset(self):
         return Article.objects.filter(
             is_published=True, is_achievement=True
-        ).order_by('-achievement_date', '-date')
+        ).defer(*ARTICLE_BODY_FIELDS).order_by('-achievement_date', '-date')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -317,6 +325,7 @@ class AchievementsView(ListView):
         return context
 
 
+@method_decorator(rate_limit('contact'), name='post')
 class ContactsView(TemplateView):
     """Страница контактов."""
     template_name = 'contacts.html'
@@ -338,18 +347,8 @@ class ContactsView(TemplateView):
     def post(self, request, *args, **kwargs):
         form = ContactForm(request.POST)
         if form.is_valid():
-            message = form.save()
-
-            try:
-                send_mail(
-                    subject=f'[deev.space] Новое сообщение: {message.subject}',
-                    message=f'От: {message.name} ({message.email})\n\nТема: {message.subject}\n\n{message.message}',
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[settings.CONTACT_EMAIL],
-                    fail_silently=True,
-                )
-            except Exception as e:
-                logger.error(f'Ошибка отправки email: {e}')
+            # Уведомление отправит команда send_contact_mail (main.mail_queue)
+            form.save()
 
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                 return JsonResponse({'success': True, 'message': 'Сообщение успешно отправлено!'})
@@ -365,6 +364,7 @@ class ContactsView(TemplateView):
         return render(request, self.template_name, context)
 
 
+@rate_limit('register')
 def register_view(request):
     """Регистрация пользователя."""
     if request.user.is_authenticated:
@@ -389,6 +389,7 @@ def register_view(request):
     })
 
 
+@rate_limit('login')
 def login_view(request):
     """Авторизация пользователя."""
     if request.user.is_authenticated:
@@ -419,6 +420,7 @@ def logout_view(request):
     return redirect('index')
 
 
+@rate_limit('comment')
 @login_required
 @require_POST
 def add_comment(request, article_id):
@@ -460,6 +462,7 @@ def add_comment(request, article_id):
     return JsonResponse({'success': False, 'errors': form.errors}, status=400)
 
 
+@rate_limit('vote')
 @login_required
 @require_POST
 def toggle_article_like(request, article_id):
@@ -472,30 +475,17 @@ def toggle_article_like(request, article_id):
     except json.JSONDecodeError:
         return JsonResponse({'success': False, 'error': 'Invalid JSON'}, status=400)
 
-    like, created = ArticleLike.objects.get_or_create(
-        article=article, user=request.user,
-        defaults={'is_like': is_like}
-    )
-
-    user_vote = None
-    if not created:
-        if like.is_like == is_like:
-            like.delete()
-        else:
-            like.is_like = is_like
-            like.save()
-            user_vote = is_like
-    else:
-        user_vote = is_like
+    user_vote, likes, dislikes = toggle_vote(ArticleLike, article, request.user, bool(is_like))
 
     return JsonResponse({
         'success': True,
-        'likes': article.likes_count,
-        'dislikes': article.dislikes_count,
+        'likes': likes,
+        'dislikes': dislikes,
         'user_vote': user_vote
     })
 
 
+@rate_limit('vote')
 @login_required
 @require_POST
 def toggle_comment_like(request, comment_id):
@@ -508,30 +498,97 @@ def toggle_comment_like(request, comment_id):
     except json.JSONDecodeError:
         return JsonResponse({'success': False, 'error': 'Invalid JSON'}, status=400)
 
-    like, created = CommentLike.objects.get_or_create(
-        comment=comment, user=request.user,
-        defaults={'is_like': is_like}
-    )
-
-    user_vote = None
-    if not created:
-        if like.is_like == is_like:
-            like.delete()
-        else:
-            like.is_like = is_like
-            like.save()
-            user_vote = is_like
-    else:
-        user_vote = is_like
+    user_vote, likes, dislikes = toggle_vote(CommentLike, comment, request.user, bool(is_like))
 
     return JsonResponse({
         'success': True,
-        'likes': comment.likes_count,
-        'dislikes': comment.dislikes_count,
+        'likes': likes,
+        'dislikes': dislikes,
         'user_vote': user_vote
     })
 
 
+def _parse_vote(value):
+    if value is None or isinstance(value, bool):
+        return value
+    raise ValueError('Оценка должна быть true, false или null')
+
+
+def _parse_votes(data):
+    """Проверка тела пакетной записи голосов: {'article': ..., 'comments': {id: ...}}."""
+    if not isinstance(data, dict):
+        raise ValueError('Ожидается JSON-объект')
+    votes = {}
+    if 'article' in data:
+        votes['article'] = _parse_vote(data['article'])
+    comments = data.get('comments', {})
+    if not isinstance(comments, dict):
+        raise ValueError('comments должен быть объектом')
+    if len(comments) > settings.VOTES_BATCH_LIMIT:
+        raise ValueError(f'Не больше {settings.VOTES_BATCH_LIMIT} комментариев за запрос')
+    votes['comments'] = {int(comment_id): _parse_vote(value) for comment_id, value in comments.items()}
+    return votes
+
+
+@rate_limit('vote')
+@require_http_methods(['GET', 'POST'])
+def article_votes(request, article_id):
+    """
+    Голоса текущего пользователя за статью и её комментарии.
+
+    GET возвращает состояние для подсветки кнопок (страница статьи его не
+    выводит и одинакова для всех), POST применяет несколько оценок сразу.
+    """
+    if not request.user.is_authenticated:
+        if request.method == 'POST':
+            return JsonResponse({'success': False, 'error': 'Требуется авторизация'}, status=403)
+        return JsonResponse({'success': True, 'article': None, 'comments': {}})
+
+    if request.method == 'GET':
+        return JsonResponse({'success': True, **get_user_votes(article_id, request.user)})
+
+    article = get_object_or_404(Article, id=article_id, is_published=True)
+    try:
+        votes = _parse_votes(json.loads(request.body))
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'error': 'Invalid JSON'}, status=400)
+    except (TypeError, ValueError) as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    comment_ids = set(votes['comments'])
+    found = set(Comment.objects.filter(
+        pk__in=comment_ids, article=article, is_approved=True
+    ).values_list('pk', flat=True))
+    if found != comment_ids:
+        return JsonResponse({'success': False, 'error': 'Комментарий не найден'}, status=404)
+
+    apply_votes(article, request.user, votes)
+
+    counts = {'comments': {
+        pk: {'likes': likes, 'dislikes': dislikes}
+        for pk, likes, dislikes in Comment.objects.filter(pk__in=comment_ids).values_list(
+            'pk', 'likes_count', 'dislikes_count'
+        )
+    }}
+    if 'article' in votes:
+        likes, dislikes = Article.objects.filter(pk=article.pk).values_list('likes_count', 'dislikes_count').get()
+        counts['article'] = {'likes': likes, 'dislikes': dislikes}
+
+    return JsonResponse({'success': True, **get_user_votes(article.pk, request.user), 'counts': counts})
+
+
+@condition(etag_func=sitemap_etag, last_modified_func=sitemap_last_modified)
+def sitemap_file(request, name=INDEX_NAME):
+    """Отдача заранее построенного файла карты сайта (main.sitemaps)."""
+    return file_response(sitemap_path(name), 'application/xml')
+
+
+@condition(etag_func=feed_etag, last_modified_func=feed_last_modified)
+def feed_file(request, kind, category_slug=None):
+    """Отдача заранее построенной RSS/Atom ленты (main.feeds)."""
+    return file_response(get_feed_path(kind, category_slug), FEED_TYPES[kind].content_type)
+
+
 def handler404(request, exception):
     """Обработчик ошибки 404."""
     return render(request, 'errors/404.html', status=404)
@@ -0,0 +1,273 @@
+/**
+ * deev.space - Blog JavaScript (оценки, комментарии, копирование кода)
+ * Подключается после main.js: использует getCookie и showNotification
+ * @author Егор Деев
+ */
+
+(function() {
+    'use strict';
+
+    const getCookie = window.getCookie;
+
+    document.addEventListener('DOMContentLoaded', function() {
+        initCodeCopy();
+        initVoteState();
+    });
+
+    // ===== Vote State =====
+    // Страница статьи одинакова для всех посетителей, собственные оценки
+    // пользователя за статью и комментарии подгружаются одним запросом
+    async function initVoteState() {
+        const reactions = document.querySelector('.article-reactions[data-votes-url]');
+        if (!reactions) return;
+
+        try {
+            const response = await fetch(reactions.dataset.votesUrl, {
+                headers: { 'Accept': 'application/json' }
+            });
+            if (!response.ok) return;
+
+            const data = await response.json();
+            setVoteState(`article-${reactions.dataset.articleId}`, data.article);
+            Object.entries(data.comments || {}).forEach(([commentId, vote]) => {
+                setVoteState(`comment-${commentId}`, vote);
+            });
+        } catch (error) {
+            console.error('Error:', error);
+        }
+    }
+
+    // ===== Article Like/Dislike =====
+    window.toggleArticleLike = async function(articleId, isLike) {
+        try {
+            const response = await fetch(`/api/article/${articleId}/like/`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-CSRFToken': getCookie('csrftoken')
+                },
+                body: JSON.stringify({ is_like: isLike })
+            });
+
+            if (!response.ok) {
+                if (response.status === 403) {
+                    showNotification('Войдите, чтобы оценить статью', 'warning');
+                    return;
+                }
+                if (response.status === 429) {
+                    showNotification('Слишком много оценок, попробуйте позже', 'warning');
+                    return;
+                }
+                throw new Error('Network response was not ok');
+            }
+
+            const data = await response.json();
+
+            if (data.success) {
+                updateVoteButtons(`article-${articleId}`, data);
+            }
+        } catch (error) {
+            console.error('Error:', error);
+            showNotification('Ошибка при оценке статьи', 'error');
+        }
+    };
+
+    // ===== Comment Like/Dislike =====
+    window.toggleCommentLike = async function(commentId, isLike) {
+        try {
+            const response = await fetch(`/api/comment/${commentId}/like/`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-CSRFToken': getCookie('csrftoken')
+                },
+                body: JSON.stringify({ is_like: isLike })
+            });
+
+            if (!response.ok) {
+                if (response.status === 403) {
+                    showNotification('Войдите, чтобы оценить комментарий', 'warning');
+                    return;
+                }
+                if (response.status === 429) {
+                    showNotification('Слишком много оценок, попробуйте позже', 'warning');
+                    return;
+                }
+                throw new Error('Network response was not ok');
+            }
+
+            const data = await response.json();
+
+            if (data.success) {
+                updateVoteButtons(`comment-${commentId}`, data);
+            }
+        } catch (error) {
+            console.error('Error:', error);
+            showNotification('Ошибка при оценке комментария', 'error');
+        }
+    };
+
+    function updateVoteButtons(prefix, data) {
+        const likesEl = document.getElementById(`${prefix}-likes`);
+        const dislikesEl = document.getElementById(`${prefix}-dislikes`);
+
+        if (likesEl) likesEl.textContent = data.likes;
+        if (dislikesEl) dislikesEl.textContent = data.dislikes;
+
+        setVoteState(prefix, data.user_vote);
+    }
+
+    function setVoteState(prefix, userVote) {
+        const likeBtn = document.getElementById(`${prefix}-like-btn`);
+        const dislikeBtn = document.getElementById(`${prefix}-dislike-btn`);
+
+        if (likeBtn && dislikeBtn) {
+            likeBtn.classList.remove('active');
+            dislikeBtn.classList.remove('active');
+
+            // Update icons
+            const likeIcon = likeBtn.querySelector('i');
+            const dislikeIcon = dislikeBtn.querySelector('i');
+
+            if (likeIcon) {
+                likeIcon.className = userVote === true ? 'fas fa-thumbs-up' : 'far fa-thumbs-up';
+            }
+            if (dislikeIcon) {
+                dislikeIcon.className = userVote === false ? 'fas fa-thumbs-down' : 'far fa-thumbs-down';
+            }
+
+            if (userVote === true) {
+                likeBtn.classList.add('active');
+            } else if (userVote === false) {
+                dislikeBtn.classList.add('active');
+            }
+        }
+    }
+
+    // ===== Comments =====
+    window.submitComment = async function(articleId, parentId = null) {
+        const form = parentId
+            ? document.getElementById(`reply-form-${parentId}`)
+            : document.getElementById('comment-form');
+
+        if (!form) return;
+
+        const submitBtn = form.querySelector('button[type="submit"]');
+        const originalContent = submitBtn.innerHTML;
+        const textarea = form.querySelector('textarea');
+        const content = textarea.value.trim();
+
+        if (!content) {
+            showNotification('Введите текст комментария', 'warning');
+            return;
+        }
+
+        submitBtn.disabled = true;
+        submitBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i>';
+
+        try {
+            const formData = new FormData(form);
+            if (parentId) {
+                formData.append('parent_id', parentId);
+            }
+
+            const response = await fetch(`/api/article/${articleId}/comment/`, {
+                method: 'POST',
+                body: formData,
+                headers: {
+                    'X-CSRFToken': getCookie('csrftoken'),
+                    'X-Requested-With': 'XMLHttpRequest'
+                }
+            });
+
+            const data = await response.json();
+
+            if (data.success) {
+                showNotification('Комментарий добавлен!', 'success');
+                setTimeout(() => location.reload(), 1000);
+            } else {
+                const errorMsg = data.errors ? Object.values(data.errors).flat().join(', ') : (data.error || 'Ошибка');
+                showNotification(errorMsg, 'error');
+            }
+        } catch (error) {
+            console.error('Error:', error);
+            showNotification('Ошибка при добавлении комментария', 'error');
+        } finally {
+            submitBtn.disabled = false;
+            submitBtn.innerHTML = originalContent;
+        }
+    };
+
+    window.showReplyForm = function(commentId) {
+        // Hide all reply forms first
+        document.querySelectorAll('.reply-form-container').forEach(form => {
+            form.style.display = 'none';
+        });
+
+        // Show the specific reply form
+        const replyForm = document.getElementById(`reply-form-container-${commentId}`);
+        if (replyForm) {
+            replyForm.style.display = 'block';
+            const textarea = replyForm.querySelector('textarea');
+            if (textarea) {
+                textarea.focus();
+            }
+        }
+    };
+
+    window.hideReplyForm = function(commentId) {
+        const replyForm = document.getElementById(`reply-form-container-${commentId}`);
+        if (replyForm) {
+            replyForm.style.display = 'none';
+        }
+    };
+
+    // ===== Code Copy Functionality =====
+    // Кнопки копирования и якоря заголовков добавляются при сохранении статьи (main.article_render)
+    function initCodeCopy() {
+        document.addEventListener('click', async function(e) {
+            const copyButton = e.target.closest('.code-copy-btn');
+            if (!copyButton) return;
+
+            e.preventDefault();
+            const codeElement = copyButton.closest('pre').querySelector('code');
+            const codeText = codeElement.textContent || codeElement.innerText;
+
+            try {
+                await navigator.clipboard.writeText(codeText);
+                markCopied(copyButton);
+            } catch (err) {
+                console.error('Ошибка при копировании:', err);
+
+                // Fallback для старых браузеров
+                const textArea = document.createElement('textarea');
+                textArea.value = codeText;
+                textArea.style.position = 'fixed';
+                textArea.style.left = '-999999px';
+                document.body.appendChild(textArea);
+                textArea.select();
+
+                try {
+                    document.execCommand('copy');
+                    markCopied(copyButton);
+                } catch (err2) {
+                    showNotification('Не удалось скопировать код', 'error');
+                }
+
+                document.body.removeChild(textArea);
+            }
+        });
+    }
+
+    function markCopied(copyButton) {
+        copyButton.innerHTML = '<i class="fas fa-check"></i><span class="copy-text">Сохранено!</span>';
+        copyButton.classList.add('copied');
+
+        // Возвращаем исходное состояние через 2 секунды
+        setTimeout(() => {
+            copyButton.innerHTML = '<i class="fas fa-copy"></i><span class="copy-text">Копировать</span>';
+            copyButton.classList.remove('copied');
+        }, 2000);
+    }
+
+})();
\ No newline at end of file
@@ -13,8 +13,6 @@
         initBackToTop();
         initMessages();
         initContactForm();
-        initCodeBlocks();
-        addHeaderAnchors();
     });
 
     // ===== AOS Animation =====
@@ -221,6 +219,8 @@
         return cookieValue;
     }
 
+    window.getCookie = getCookie;
+
     // ===== Notifications =====
     window.showNotification = function(message, type = 'info') {
         const container = document.getElementById('messagesContainer') || createNotificationContainer();
@@ -265,177 +265,6 @@
         return icons[type] || icons.info;
     }
 
-    // ===== Article Like/Dislike =====
-    window.toggleArticleLike = async function(articleId, isLike) {
-        try {
-            const response = await fetch(`/api/article/${articleId}/like/`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                    'X-CSRFToken': getCookie('csrftoken')
-                },
-                body: JSON.stringify({ is_like: isLike })
-            });
-
-            if (!response.ok) {
-                if (response.status === 403) {
-                    showNotification('Войдите, чтобы оценить статью', 'warning');
-                    return;
-                }
-                throw new Error('Network response was not ok');
-            }
-
-            const data = await response.json();
-
-            if (data.success) {
-                updateVoteButtons(`article-${articleId}`, data);
-            }
-        } catch (error) {
-            console.error('Error:', error);
-            showNotification('Ошибка при оценке статьи', 'error');
-        }
-    };
-
-    // ===== Comment Like/Dislike =====
-    window.toggleCommentLike = async function(commentId, isLike) {
-        try {
-            const response = await fetch(`/api/comment/${commentId}/like/`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                    'X-CSRFToken': getCookie('csrftoken')
-                },
-                body: JSON.stringify({ is_like: isLike })
-            });
-
-            if (!response.ok) {
-                if (response.status === 403) {
-                    showNotification('Войдите, чтобы оценить комментарий', 'warning');
-                    return;
-                }
-                throw new Error('Network response was not ok');
-            }
-
-            const data = await response.json();
-
-            if (data.success) {
-                updateVoteButtons(`comment-${commentId}`, data);
-            }
-        } catch (error) {
-            console.error('Error:', error);
-            showNotification('Ошибка при оценке комментария', 'error');
-        }
-    };
-
-    function updateVoteButtons(prefix, data) {
-        const likesEl = document.getElementById(`${prefix}-likes`);
-        const dislikesEl = document.getElementById(`${prefix}-dislikes`);
-        const likeBtn = document.getElementById(`${prefix}-like-btn`);
-        const dislikeBtn = document.getElementById(`${prefix}-dislike-btn`);
-
-        if (likesEl) likesEl.textContent = data.likes;
-        if (dislikesEl) dislikesEl.textContent = data.dislikes;
-
-        if (likeBtn && dislikeBtn) {
-            likeBtn.classList.remove('active');
-            dislikeBtn.classList.remove('active');
-
-            // Update icons
-            const likeIcon = likeBtn.querySelector('i');
-            const dislikeIcon = dislikeBtn.querySelector('i');
-
-            if (likeIcon) {
-                likeIcon.className = data.user_vote === true ? 'fas fa-thumbs-up' : 'far fa-thumbs-up';
-            }
-            if (dislikeIcon) {
-                dislikeIcon.className = data.user_vote === false ? 'fas fa-thumbs-down' : 'far fa-thumbs-down';
-            }
-
-            if (data.user_vote === true) {
-                likeBtn.classList.add('active');
-            } else if (data.user_vote === false) {
-                dislikeBtn.classList.add('active');
-            }
-        }
-    }
-
-    // ===== Comments =====
-    window.submitComment = async function(articleId, parentId = null) {
-        const form = parentId
-            ? document.getElementById(`reply-form-${parentId}`)
-            : document.getElementById('comment-form');
-
-        if (!form) return;
-
-        const submitBtn = form.querySelector('button[type="submit"]');
-        const originalContent = submitBtn.innerHTML;
-        const textarea = form.querySelector('textarea');
-        const content = textarea.value.trim();
-
-        if (!content) {
-            showNotification('Введите текст комментария', 'warning');
-            return;
-        }
-
-        submitBtn.disabled = true;
-        submitBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i>';
-
-        try {
-            const formData = new FormData(form);
-            if (parentId) {
-                formData.append('parent_id', parentId);
-            }
-
-            const response = await fetch(`/api/article/${articleId}/comment/`, {
-                method: 'POST',
-                body: formData,
-                headers: {
-                    'X-CSRFToken': getCookie('csrftoken')
-                }
-            });
-
-            const data = await response.json();
-
-            if (data.success) {
-                showNotification('Комментарий добавлен!', 'success');
-                setTimeout(() => location.reload(), 1000);
-            } else {
-                const errorMsg = data.errors ? Object.values(data.errors).flat().join(', ') : 'Ошибка';
-                showNotification(errorMsg, 'error');
-            }
-        } catch (error) {
-            console.error('Error:', error);
-            showNotification('Ошибка при добавлении комментария', 'error');
-        } finally {
-            submitBtn.disabled = false;
-            submitBtn.innerHTML = originalContent;
-        }
-    };
-
-    window.showReplyForm = function(commentId) {
-        // Hide all reply forms first
-        document.querySelectorAll('.reply-form-container').forEach(form => {
-            form.style.display = 'none';
-        });
-
-        // Show the specific reply form
-        const replyForm = document.getElementById(`reply-form-container-${commentId}`);
-        if (replyForm) {
-            replyForm.style.display = 'block';
-            const textarea = replyForm.querySelector('textarea');
-            if (textarea) {
-                textarea.focus();
-            }
-        }
-    };
-
-    window.hideReplyForm = function(commentId) {
-        const replyForm = document.getElementById(`reply-form-container-${commentId}`);
-        if (replyForm) {
-            replyForm.style.display = 'none';
-        }
-    };
-
     // ===== Copy to Clipboard =====
     window.copyToClipboard = function(text, button) {
         navigator.clipboard.writeText(text).then(() => {
@@ -455,100 +284,6 @@
         });
     };
 
-    // ===== Code Copy Functionality =====
-    function initCodeBlocks() {
-        const codeBlocks = document.querySelectorAll('.article-body pre');
-        
-        codeBlocks.forEach((pre) => {
-            // Проверяем, не добавлена ли уже кнопка
-            if (pre.querySelector('.code-copy-btn')) {
-                return;
-            }
-            
-            const codeElement = pre.querySelector('code');
-            if (!codeElement) return;
-            
-            // Создаём кнопку копирования
-            const copyButton = document.createElement('button');
-            copyButton.className = 'code-copy-btn';
-            copyButton.type = 'button';
-            copyButton.setAttribute('aria-label', 'Копировать код');
-            copyButton.innerHTML = '<i class="fas fa-copy"></i><span class="copy-text">Копировать</span>';
-            
-            // Обработчик клика
-            copyButton.addEventListener('click', async function(e) {
-                e.preventDefault();
-                
-                // Получаем текст кода без HTML-тегов
-                const codeText = codeElement.textContent || codeElement.innerText;
-                
-                try {
-                    await navigator.clipboard.writeText(codeText);
-                    
-                    // Изменяем визуальное состояние кнопки
-                    copyButton.innerHTML = '<i class="fas fa-check"></i><span class="copy-text">Сохранено!</span>';
-                    copyButton.classList.add('copied');
-                    
-                    // Возвращаем исходное состояние через 2 секунды
-                    setTimeout(() => {
-                        copyButton.innerHTML = '<i class="fas fa-copy"></i><span class="copy-text">Копировать</span>';
-                        copyButton.classList.remove('copied');
-                    }, 2000);
-                    
-                } catch (err) {
-                    console.error('Ошибка при копировании:', err);
-                    
-                    // Fallback для старых браузеров
-                    const textArea = document.createElement('textarea');
-                    textArea.value = codeText;
-                    textArea.style.position = 'fixed';
-                    textArea.style.left = '-999999px';
-                    document.body.appendChild(textArea);
-                    textArea.select();
-                    
-                    try {
-                        document.execCommand('copy');
-                        copyButton.innerHTML = '<i class="fas fa-check"></i><span class="copy-text">Сохранено!</span>';
-                        copyButton.classList.add('copied');
-                        
-                        setTimeout(() => {
-                            copyButton.innerHTML = '<i class="fas fa-copy"></i><span class="copy-text">Копировать</span>';
-                            copyButton.classList.remove('copied');
-                        }, 2000);
-                    } catch (err2) {
-                        showNotification('Не удалось скопировать код', 'error');
-                    }
-                    
-                    document.body.removeChild(textArea);
-                }
-            });
-            
-            // Добавляем кнопку в блок кода
-            pre.style.position = 'relative';
-            pre.appendChild(copyButton);
-        });
-    }
-
-    function addHeaderAnchors() {
-        const headers = document.querySelectorAll('.article-body h2, .article-body h3');
-        headers.forEach(header => {
-            const id = header.textContent
-                .toLowerCase()
-                .replace(/[^a-zа-яё0-9]+/g, '-')
-                .replace(/^-|-$/g, '');
-            
-            header.id = id;
-            
-            const anchor = document.createElement('a');
-            anchor.className = 'header-anchor';
-            anchor.href = `#${id}`;
-            anchor.innerHTML = '<i class="fas fa-link"></i>';
-            anchor.setAttribute('aria-label', 'Ссылка на раздел');
-            
-            header.appendChild(anchor);
-        });
-    }
-
     // ===== Password Visibility Toggle =====
     window.togglePasswordVisibility = function(inputId, button) {
         const input = document.getElementById(inputId);